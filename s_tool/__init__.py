@@ -2,11 +2,43 @@
 
 Selenium wrapper to make your life easy.
 
+Importing the package is cheap: selenium, webdriver_manager and the
+package metadata are only loaded when one of the attributes below is
+first accessed.  Code that only parses stored HTML should import
+``s_tool.parser`` directly, which never touches selenium.
+
 MIT License
 
 Copyright (c) 2021 Python World
 """
 
-from importlib.metadata import version
+import importlib
+
+__all__ = ["__version__", "LxmlParser", "SeleniumDriver", "SeleniumTools"]
+
+_LAZY_ATTRIBUTES = {
+    "LxmlParser": ".parser",
+    "SeleniumDriver": ".driver",
+    "SeleniumTools": ".core",
+}
+
+
+def __getattr__(name):
+    """Resolve heavy package attributes on first access (PEP 562)."""
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value = version(__package__)
+    elif name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
 
-__version__ = version(__package__)
+def __dir__():
+    """List the module attributes including the lazy ones."""
+    return sorted(set(globals()) | set(__all__))
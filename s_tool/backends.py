@@ -0,0 +1,58 @@
+"""
+Pluggable driver backends
+
+A backend is a factory that receives the ``SeleniumDriver`` configuration
+and returns a driver object. SeleniumTools only relies on the part of the
+selenium WebDriver API it calls (``get``, ``current_url``, ``page_source``,
+``title``, ``name``, ``session_id``, ``find_element(s)``, the cookie methods,
+``close`` and ``quit``), so any object implementing it can be plugged in
+and selected per job with ``SeleniumTools(browser=<name>)``.
+"""
+
+import importlib
+from typing import Callable, Dict
+
+_BACKENDS: Dict[str, Callable] = {}
+
+# built-in backends, imported on first use
+_BUILTIN = {
+    'http': ('.http_backend', 'create_http_driver'),
+}
+
+
+def register_backend(name: str, factory: Callable) -> None:
+    """
+    Registers a driver backend.
+
+    Args:
+        name: str
+            - The browser name selecting the backend.
+        factory: callable
+            - Called with the SeleniumDriver instance, returns the driver.
+
+    Example:
+
+    .. code-block:: python
+
+        def create_my_driver(config):
+            return MyDriver(headless=config.headless)
+
+        register_backend("mine", create_my_driver)
+        selenium_tools = SeleniumTools(browser="mine")
+    """
+    _BACKENDS[name.lower()] = factory
+
+
+def get_backend(name: str):
+    """Returns the factory of a backend, or None if it is not registered"""
+    name = name.lower()
+    if name not in _BACKENDS and name in _BUILTIN:
+        module_name, factory_name = _BUILTIN[name]
+        module = importlib.import_module(module_name, __package__)
+        _BACKENDS[name] = getattr(module, factory_name)
+    return _BACKENDS.get(name)
+
+
+def backend_names() -> list:
+    """Returns the names of the registered and built-in backends"""
+    return sorted(set(_BACKENDS) | set(_BUILTIN))
@@ -0,0 +1,195 @@
+"""
+Page cache for SeleniumTools.get
+
+Entries are kept in an in-memory LRU tier and, when a directory is given,
+written through to gzip compressed files so they survive evictions and
+can be shared between jobs.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .logger import logger
+
+
+class PageCache:
+    """
+    LRU memory cache with an optional compressed on-disk tier and a TTL.
+
+    Args:
+        max_entries: int, optional
+            - Number of pages kept in memory. Defaults to 128.
+        ttl: float, optional
+            - Time to live of an entry in seconds. Defaults to 3600.
+        directory: str, optional
+            - Directory of the on-disk tier. Defaults to None (memory only).
+        compresslevel: int, optional
+            - gzip compression level of the on-disk tier. Defaults to 6.
+
+    Example:
+
+    .. code-block:: python
+
+        cache = PageCache(max_entries=64, ttl=600, directory="/tmp/s-tool-cache")
+        selenium_tools = SeleniumTools(driver, page_cache=cache)
+
+        selenium_tools.get("https://www.example.com", cacheable=True)
+        source = selenium_tools.text(cached_url="https://www.example.com")
+        print(cache.stats())
+    """
+
+    def __init__(self,
+                 max_entries: int = 128,
+                 ttl: float = 3600,
+                 directory: Optional[str] = None,
+                 compresslevel: int = 6,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.compresslevel = compresslevel
+        self._clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        """Returns the disk file of a URL, named by its sha256 digest"""
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def _is_fresh(self, entry: dict) -> bool:
+        """Returns True if an entry is younger than the ttl"""
+        return self._clock() - entry['stored_at'] < self.ttl
+
+    def _read_disk(self, url: str) -> Optional[dict]:
+        """Reads the disk entry of a URL, dropping unreadable files"""
+        if not self.directory:
+            return None
+        path = self._path(url)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.info("dropping unreadable cache file:%s", path)
+            self._remove_disk(url)
+            return None
+        return entry if entry.get('url') == url else None
+
+    def _write_disk(self, entry: dict) -> None:
+        """Writes an entry to disk atomically"""
+        path = self._path(entry['url'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8',
+                       compresslevel=self.compresslevel) as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, path)
+
+    def _remove_disk(self, url: str) -> None:
+        """Removes the disk entry of a URL if there is one"""
+        if self.directory:
+            try:
+                os.remove(self._path(url))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, entry: dict) -> None:
+        """Stores an entry in memory, evicting the least recently used"""
+        self._memory[entry['url']] = entry
+        self._memory.move_to_end(entry['url'])
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Returns the fresh cache entry of a URL.
+
+        Returns:
+            entry: dict
+                - ``url``, ``final_url``, ``page_source`` and ``stored_at``.
+                - None if the URL is not cached or the entry expired.
+        """
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                if self._is_fresh(entry):
+                    self._memory.move_to_end(url)
+                    self._counters['memory_hits'] += 1
+                    return entry
+                del self._memory[url]
+
+            entry = self._read_disk(url)
+            if entry is not None:
+                if self._is_fresh(entry):
+                    self._remember(entry)
+                    self._counters['disk_hits'] += 1
+                    return entry
+                self._remove_disk(url)
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, url: str, page_source: str, final_url: Optional[str] = None) -> dict:
+        """
+        Stores the page source of a URL in the memory and disk tiers.
+
+        Returns:
+            entry: dict
+                - The stored cache entry.
+        """
+        entry = {
+            'url': url,
+            'final_url': final_url or url,
+            'page_source': page_source,
+            'stored_at': self._clock(),
+        }
+        with self._lock:
+            self._remember(entry)
+            if self.directory:
+                self._write_disk(entry)
+        return entry
+
+    def invalidate(self, url: str) -> None:
+        """Removes a URL from both tiers."""
+        with self._lock:
+            self._memory.pop(url, None)
+            self._remove_disk(url)
+
+    def clear(self) -> None:
+        """Removes every entry from both tiers."""
+        with self._lock:
+            for url in list(self._memory):
+                self._remove_disk(url)
+            self._memory.clear()
+            if self.directory:
+                for name in os.listdir(self.directory):
+                    if name.endswith('.json.gz'):
+                        os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters of the cache.
+
+        Returns:
+            stats: dict
+                - ``memory_hits``, ``disk_hits``, ``misses``, ``hits``,
+                  ``hit_ratio`` and the number of ``entries`` in memory.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._memory)
+        stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,222 @@
+"""
+Command line interface
+
+.. code-block:: bash
+
+    # add jobs, one JSON object or URL per line
+    s-tool enqueue --queue sqlite:///jobs.db jobs.jsonl
+
+    # run them on four headless chrome sessions
+    s-tool worker --queue sqlite:///jobs.db --sink results.jsonl \\
+        --sessions 4 --browser chrome --headless
+
+    # or run a job file directly and print a throughput summary
+    s-tool run jobs.jsonl --concurrency 4 --headless > results.jsonl
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from .jobs import JsonlSink, open_queue
+from .logger import logger
+
+
+def _read_jobs(path: str):
+    """Yields jobs from a JSON lines file, plain lines are taken as URLs"""
+    file = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            yield json.loads(line) if line.startswith('{') else {'url': line}
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def _load_parser(spec: str):
+    """Imports a custom parser class given as ``module:Class``"""
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise argparse.ArgumentTypeError(f"parser must be module:Class, got {spec}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _session_options(args) -> dict:
+    """Returns the SeleniumTools options of the command line options"""
+    options = {'browser': args.browser, 'headless': args.headless}
+    if args.command_executor:
+        options['command_executor'] = args.command_executor
+    if args.parser:
+        options['parser'] = args.parser
+    if args.prune:
+        options['prune'] = True
+    return options
+
+
+def _add_session_arguments(parser) -> None:
+    """Adds the browser session options to a subcommand"""
+    parser.add_argument('--browser', default='chrome',
+                        help='browser or backend of the sessions (default: chrome)')
+    parser.add_argument('--headless', action='store_true', help='run the browsers headless')
+    parser.add_argument('--command-executor', help='selenium grid url for --browser remote')
+    parser.add_argument('--parser', type=_load_parser,
+                        help='custom parser class as module:Class, its methods become parse() tags')
+    parser.add_argument('--prune', action='store_true',
+                        help='strip scripts, styles, svgs and inline data from pages before parsing')
+
+
+def _add_concurrency_arguments(parser) -> None:
+    """Adds the adaptive concurrency options to a subcommand"""
+    parser.add_argument('--adaptive', action='store_true',
+                        help='adapt the number of working sessions to latency, errors and host load')
+    parser.add_argument('--domain-rate', type=float,
+                        help='maximum requests per second to each domain')
+
+
+def _controller(args, max_sessions: int):
+    """Returns the concurrency controller of the command line options, or None"""
+    if not args.adaptive and not args.domain_rate:
+        return None
+    from .concurrency import AdaptiveConcurrency, DomainRateLimiter
+
+    rate_limiter = DomainRateLimiter(args.domain_rate) if args.domain_rate else None
+    if args.adaptive:
+        return AdaptiveConcurrency(max_sessions=max_sessions, rate_limiter=rate_limiter)
+    return AdaptiveConcurrency(min_sessions=max_sessions, max_sessions=max_sessions,
+                               rate_limiter=rate_limiter, sampler=False)
+
+
+def enqueue(args) -> int:
+    """Handles ``s-tool enqueue``: adds the jobs of a file to a queue"""
+    queue = open_queue(args.queue, args.queue_name)
+    count = 0
+    for job in _read_jobs(args.jobs):
+        queue.put(job)
+        count += 1
+    queue.close()
+    print(f"{count} jobs added", file=sys.stderr)
+    return 0
+
+
+def worker(args) -> int:
+    """Handles ``s-tool worker``: runs jobs from a queue until it stops"""
+    from .worker import Worker
+
+    queue = open_queue(args.queue, args.queue_name)
+    sink = JsonlSink(args.sink)
+    try:
+        metrics = Worker(queue, sink,
+                         sessions=args.sessions,
+                         visibility_timeout=args.visibility_timeout,
+                         max_attempts=args.max_attempts,
+                         retry_delay=args.retry_delay,
+                         poll_interval=args.poll_interval,
+                         metrics_interval=args.metrics_interval,
+                         controller=_controller(args, args.sessions),
+                         **_session_options(args)).run(max_jobs=args.max_jobs,
+                                                       idle_timeout=args.idle_timeout)
+    finally:
+        sink.close()
+        queue.close()
+    print(json.dumps(metrics), file=sys.stderr)
+    return 0
+
+
+def format_summary(summary: dict) -> str:
+    """Formats the summary of a batch run for humans"""
+    latency = summary['latency']
+    return (f"{summary['jobs']} jobs: {summary['succeeded']} succeeded, "
+            f"{summary['failed']} failed, {summary.get('unfinished', 0)} unfinished, "
+            f"{summary['retried']} retried "
+            f"in {summary['seconds']:.2f}s ({summary['throughput']:.2f} jobs/s)\n"
+            f"latency: mean {latency['mean']:.3f}s p50 {latency['p50']:.3f}s "
+            f"p90 {latency['p90']:.3f}s p99 {latency['p99']:.3f}s max {latency['max']:.3f}s")
+
+
+def run(args) -> int:
+    """Handles ``s-tool run``: runs a job file and prints a summary"""
+    from .worker import run_batch
+
+    sink = JsonlSink(args.output)
+    try:
+        summary = run_batch(_read_jobs(args.jobs), sink,
+                            concurrency=args.concurrency,
+                            retries=args.retries,
+                            controller=_controller(args, args.concurrency),
+                            **_session_options(args))
+    finally:
+        sink.close()
+
+    print(json.dumps(summary) if args.summary_json else format_summary(summary),
+          file=sys.stderr)
+    return 1 if summary['failed'] or summary.get('unfinished') else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the argument parser of the s-tool command"""
+    parser = argparse.ArgumentParser(prog='s-tool', description='Selenium wrapper to make your life easy.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log progress to stderr')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    queue_help = 'sqlite:///jobs.db, file:///path/to/dir or redis://host:6379/0'
+
+    enqueue_parser = commands.add_parser('enqueue', help='add jobs to a queue')
+    enqueue_parser.add_argument('--queue', required=True, help=queue_help)
+    enqueue_parser.add_argument('--queue-name', help='queue name for sqlite and redis queues')
+    enqueue_parser.add_argument('jobs', help='JSON lines file with jobs or urls, - for stdin')
+    enqueue_parser.set_defaults(handler=enqueue)
+
+    worker_parser = commands.add_parser('worker', help='run jobs from a queue')
+    worker_parser.add_argument('--queue', required=True, help=queue_help)
+    worker_parser.add_argument('--queue-name', help='queue name for sqlite and redis queues')
+    worker_parser.add_argument('--sink', default='-', help='JSON lines result file (default: stdout)')
+    worker_parser.add_argument('--sessions', type=int, default=1, help='browser sessions (default: 1)')
+    worker_parser.add_argument('--visibility-timeout', type=float, default=300,
+                               help='seconds a reserved job is hidden from other workers')
+    worker_parser.add_argument('--max-attempts', type=int, default=3,
+                               help='attempts before a job is marked failed')
+    worker_parser.add_argument('--retry-delay', type=float, default=5,
+                               help='seconds before a failed job is retried')
+    worker_parser.add_argument('--poll-interval', type=float, default=1,
+                               help='seconds between polls of an empty queue')
+    worker_parser.add_argument('--metrics-interval', type=float, default=60,
+                               help='seconds between metrics log lines, 0 to disable')
+    worker_parser.add_argument('--max-jobs', type=int, help='stop after this many jobs')
+    worker_parser.add_argument('--idle-timeout', type=float,
+                               help='stop once the queue was empty for this many seconds')
+    _add_session_arguments(worker_parser)
+    _add_concurrency_arguments(worker_parser)
+    worker_parser.set_defaults(handler=worker)
+
+    run_parser = commands.add_parser('run', help='run a job file and print a summary')
+    run_parser.add_argument('jobs', help='JSON lines file with jobs or urls, - for stdin')
+    run_parser.add_argument('--output', default='-', help='JSON lines result file (default: stdout)')
+    run_parser.add_argument('--concurrency', type=int, default=1,
+                            help='browser sessions running jobs (default: 1)')
+    run_parser.add_argument('--retries', type=int, default=0, help='extra attempts for failed jobs')
+    run_parser.add_argument('--summary-json', action='store_true',
+                            help='print the summary as JSON')
+    _add_session_arguments(run_parser)
+    _add_concurrency_arguments(run_parser)
+    run_parser.set_defaults(handler=run)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the s-tool command, returns the exit status"""
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+        logger.setLevel(logging.INFO)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+Adaptive concurrency and per domain rate limits for crawls
+
+``AdaptiveConcurrency`` decides how many sessions may work at the same
+time. It measures the page latency, the error rate and, with psutil, the
+CPU and memory usage of the host, and adjusts the limit AIMD style: the
+limit grows by a step while there is more work than sessions and the host
+copes, and is cut by a factor as soon as it does not. ``Worker`` and
+``run_batch`` take it as ``controller``; other runners call ``acquire``
+and ``release`` around each page:
+
+.. code-block:: python
+
+    controller = AdaptiveConcurrency(max_sessions=8, rate_limiter=DomainRateLimiter(2))
+
+    def crawl(url):
+        with controller.slot(url):
+            selenium_tools.get(url)
+"""
+
+import contextlib
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from .exceptions import SToolException
+from .logger import logger
+
+
+def _host(url_or_host: str) -> str:
+    if '//' in url_or_host:
+        return urlparse(url_or_host).hostname or ''
+    return url_or_host.lower()
+
+
+class DomainRateLimiter:
+    """
+    Limits the request rate per domain.
+
+    Every domain gets ``rate`` requests per second with bursts of up to
+    ``burst`` requests. Callers reserve their start time under a lock and
+    sleep outside of it, so requests to other domains are never held up.
+
+    Args:
+        rate: float
+            - Requests per second for each domain.
+        burst: int, optional
+            - Requests allowed back to back. Defaults to 1.
+        rates: dict, optional
+            - Requests per second of single domains, a domain also covers
+              its subdomains. Defaults to None.
+
+    Example:
+
+    .. code-block:: python
+
+        limiter = DomainRateLimiter(2, rates={"example.com": 0.5})
+        limiter.wait("https://www.example.com/page")
+    """
+
+    def __init__(self, rate: float, burst: int = 1, rates: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.rates = {domain.lower(): value for domain, value in (rates or {}).items()}
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def _bucket(self, host: str):
+        """Returns the domain a host is limited as, and its rate"""
+        for domain, rate in self.rates.items():
+            if host == domain or host.endswith('.' + domain):
+                return domain, rate
+        return host, self.rate
+
+    def rate_for(self, host: str) -> float:
+        """Returns the requests per second allowed for a host"""
+        return self._bucket(_host(host))[1]
+
+    def reserve(self, url_or_host: str) -> float:
+        """
+        Reserves the next request slot of a domain.
+
+        Returns:
+            delay: float
+                - Seconds to wait before the request may start.
+        """
+        bucket, rate = self._bucket(_host(url_or_host))
+        interval = 1.0 / rate
+        with self._lock:
+            now = self._clock()
+            # theoretical arrival time of the next request (GCRA)
+            arrival = max(self._next.get(bucket, now), now) + interval
+            self._next[bucket] = arrival
+        return max(0.0, arrival - interval * self.burst - now)
+
+    def wait(self, url_or_host: str) -> float:
+        """Waits for the next request slot of a domain and returns the seconds waited."""
+        delay = self.reserve(url_or_host)
+        if delay:
+            self._sleep(delay)
+        return delay
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD controller for the number of concurrently working sessions.
+
+    Every ``interval`` seconds the pages finished since the last check
+    are evaluated. The limit is multiplied by ``decrease`` when
+
+    - the error rate is above ``max_error_rate``,
+    - the median latency is above ``latency_tolerance`` times the
+      baseline (``target_latency``, or the lowest median seen so far),
+    - the host CPU or memory usage is above its maximum.
+
+    Otherwise, if callers had to wait for a slot, the limit grows by
+    ``increase``. The limit always stays within ``min_sessions`` and
+    ``max_sessions``.
+
+    Args:
+        min_sessions: int, optional
+            - Defaults to 1.
+        max_sessions: int, optional
+            - Defaults to 8.
+        initial: int, optional
+            - Starting limit. Defaults to min_sessions.
+        increase: int, optional
+            - Additive increase. Defaults to 1.
+        decrease: float, optional
+            - Multiplicative decrease. Defaults to 0.5.
+        interval: float, optional
+            - Seconds between adjustments. Defaults to 5.
+        target_latency: float, optional
+            - Acceptable median page latency in seconds. Defaults to None.
+        latency_tolerance: float, optional
+            - Defaults to 2.
+        max_error_rate: float, optional
+            - Defaults to 0.2.
+        max_cpu_percent: float, optional
+            - Defaults to 90.
+        max_memory_percent: float, optional
+            - Defaults to 90.
+        sampler: callable, optional
+            - Returns the host ``cpu_percent`` and ``memory_percent``.
+            - Defaults to ``HostLoadSampler()`` if psutil is installed,
+              otherwise the host load is not checked. False disables it.
+        rate_limiter: DomainRateLimiter, optional
+            - Per domain rate limits applied by ``throttle()``.
+    """
+
+    def __init__(self, min_sessions: int = 1, max_sessions: int = 8,
+                 initial: Optional[int] = None, increase: int = 1,
+                 decrease: float = 0.5, interval: float = 5.0,
+                 target_latency: Optional[float] = None,
+                 latency_tolerance: float = 2.0, max_error_rate: float = 0.2,
+                 max_cpu_percent: float = 90.0, max_memory_percent: float = 90.0,
+                 sampler: Optional[Callable[[], dict]] = None,
+                 rate_limiter: Optional[DomainRateLimiter] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if not 1 <= min_sessions <= max_sessions:
+            raise ValueError("sessions must satisfy 1 <= min_sessions <= max_sessions")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+
+        self.min_sessions = min_sessions
+        self.max_sessions = max_sessions
+        self.limit = min(max(initial or min_sessions, min_sessions), max_sessions)
+        self.increase = increase
+        self.decrease = decrease
+        self.interval = interval
+        self.target_latency = target_latency
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.max_cpu_percent = max_cpu_percent
+        self.max_memory_percent = max_memory_percent
+        self.sampler = sampler if sampler is not None else self._default_sampler()
+        self.rate_limiter = rate_limiter
+        self._clock = clock
+        self._condition = threading.Condition()
+
+        self.active = 0
+        self.completed = 0
+        self.errors = 0
+        self.baseline = None
+        self.adjustments = 0
+        self.history = deque([(clock(), self.limit, 'start')], maxlen=100)
+        self._latencies = []
+        self._window_errors = 0
+        self._waited = False
+        self._checked_at = clock()
+
+    @staticmethod
+    def _default_sampler() -> Optional[Callable[[], dict]]:
+        from .resources import HostLoadSampler
+
+        try:
+            return HostLoadSampler()
+        except SToolException:
+            logger.info('psutil is not installed, the host load is not monitored')
+            return None
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for a free slot.
+
+        Returns:
+            bool: False if no slot became free within ``timeout`` seconds.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._condition:
+            while self.active >= self.limit:
+                self._waited = True
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self.active += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, error: bool = False) -> None:
+        """
+        Frees a slot and records the page it was used for.
+
+        Args:
+            latency: float, optional
+                - Seconds the page took, None if the slot was not used.
+            error: bool, optional
+                - Whether the page failed. Defaults to False.
+        """
+        with self._condition:
+            self.active -= 1
+            if latency is not None:
+                self.completed += 1
+                self._latencies.append(latency)
+                if error:
+                    self.errors += 1
+                    self._window_errors += 1
+            if self._clock() - self._checked_at >= self.interval:
+                self._adjust()
+            self._condition.notify()
+
+    def throttle(self, url: Optional[str]) -> float:
+        """Waits for the rate limit of the domain of a URL, returns the seconds waited."""
+        if self.rate_limiter is None or not url:
+            return 0.0
+        return self.rate_limiter.wait(url)
+
+    @contextlib.contextmanager
+    def slot(self, url: Optional[str] = None):
+        """Holds a slot for one page, rate limited by its domain, and records it."""
+        self.acquire()
+        start = self._clock()
+        error = True
+        try:
+            self.throttle(url)
+            yield self
+            error = False
+        finally:
+            self.release(self._clock() - start, error)
+
+    def _pressure(self) -> Optional[str]:
+        """Returns why the limit has to shrink, or None"""
+        latencies = self._latencies
+        if latencies:
+            if self._window_errors / len(latencies) > self.max_error_rate:
+                return f'error rate {self._window_errors}/{len(latencies)}'
+            median = statistics.median(latencies)
+            if self.target_latency is None:
+                self.baseline = median if self.baseline is None else min(self.baseline, median)
+            baseline = self.target_latency or self.baseline
+            if median > baseline * self.latency_tolerance:
+                return f'median latency {median:.2f}s'
+
+        if self.sampler:
+            load = self.sampler() or {}
+            if load.get('cpu_percent', 0) > self.max_cpu_percent:
+                return f"host cpu {load['cpu_percent']:.0f}%"
+            if load.get('memory_percent', 0) > self.max_memory_percent:
+                return f"host memory {load['memory_percent']:.0f}%"
+        return None
+
+    def _adjust(self) -> None:
+        """Applies one AIMD step, called with the condition held"""
+        reason = self._pressure()
+        limit = self.limit
+        if reason is not None:
+            limit = max(self.min_sessions, int(limit * self.decrease))
+        elif self._waited:
+            limit = min(self.max_sessions, limit + self.increase)
+            reason = 'saturated'
+
+        if limit != self.limit:
+            logger.info('concurrency %s -> %s (%s)', self.limit, limit, reason)
+            self.limit = limit
+            self.adjustments += 1
+            self.history.append((self._clock(), limit, reason))
+            self._condition.notify_all()
+
+        self._latencies = []
+        self._window_errors = 0
+        self._waited = False
+        self._checked_at = self._clock()
+
+    def stats(self) -> dict:
+        """Returns the current limit and the counters"""
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'active': self.active,
+                'completed': self.completed,
+                'errors': self.errors,
+                'baseline_latency': self.baseline,
+                'adjustments': self.adjustments,
+            }
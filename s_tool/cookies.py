@@ -0,0 +1,97 @@
+"""
+Cookie conversion helpers for batched cookie operations
+"""
+
+from email.utils import formatdate
+from typing import Optional
+
+# selenium cookie keys and their CDP Network.CookieParam counterparts
+_CDP_KEYS = {
+    'name': 'name',
+    'value': 'value',
+    'domain': 'domain',
+    'path': 'path',
+    'secure': 'secure',
+    'httpOnly': 'httpOnly',
+    'sameSite': 'sameSite',
+    'expiry': 'expires',
+}
+
+
+def domain_matches(cookie_domain: Optional[str], domain: str, host_only: bool = False) -> bool:
+    """
+    Returns True if a cookie set for ``cookie_domain`` is sent to ``domain``.
+
+    Host-only cookies (set without a Domain attribute) are only sent
+    to the exact host, other cookies to its subdomains too.
+    """
+    if not cookie_domain:
+        return False
+    cookie_domain = cookie_domain.lstrip('.').lower()
+    domain = domain.lstrip('.').lower()
+    if host_only:
+        return domain == cookie_domain
+    return domain == cookie_domain or domain.endswith('.' + cookie_domain)
+
+
+def normalize(cookie: dict) -> dict:
+    """Returns a copy of the cookie with string name and value"""
+    cookie = dict(cookie)
+    cookie['name'] = str(cookie['name'])
+    cookie['value'] = str(cookie.get('value', ''))
+    return cookie
+
+
+def to_cdp(cookie: dict, default_url: Optional[str] = None) -> dict:
+    """
+    Converts a selenium cookie dict to a CDP ``Network.CookieParam``.
+
+    CDP needs a url or a domain for every cookie, ``default_url`` is used
+    when the cookie has no domain.
+    """
+    param = {_CDP_KEYS[key]: value for key, value in cookie.items()
+             if key in _CDP_KEYS and value is not None}
+    if 'domain' not in param and default_url:
+        param['url'] = default_url
+    return param
+
+
+def from_cdp(cookie: dict) -> dict:
+    """
+    Converts a CDP ``Network.Cookie`` to a selenium cookie dict.
+
+    Session cookies, which CDP reports with ``expires`` -1, get no expiry.
+    """
+    converted = {key: cookie[cdp_key] for key, cdp_key in _CDP_KEYS.items()
+                 if cookie.get(cdp_key) is not None}
+    if cookie.get('session') or converted.get('expiry', -1) < 0:
+        converted.pop('expiry', None)
+    else:
+        converted['expiry'] = int(converted['expiry'])
+    return converted
+
+
+def expire(cookie: dict) -> dict:
+    """Returns a copy of the cookie that deletes it when set"""
+    cookie = dict(cookie, value='', expiry=1)
+    return cookie
+
+
+def to_document_cookie(cookie: dict) -> str:
+    """
+    Serializes a cookie into a ``document.cookie`` assignment string.
+
+    httpOnly cookies can not be written from JavaScript, callers have to
+    set those through the WebDriver cookie endpoint.
+    """
+    parts = [f"{cookie['name']}={cookie.get('value', '')}"]
+    parts.append(f"path={cookie.get('path') or '/'}")
+    if cookie.get('domain'):
+        parts.append(f"domain={cookie['domain']}")
+    if cookie.get('expiry') is not None:
+        parts.append(f"expires={formatdate(cookie['expiry'], usegmt=True)}")
+    if cookie.get('secure'):
+        parts.append("secure")
+    if cookie.get('sameSite'):
+        parts.append(f"samesite={cookie['sameSite']}")
+    return "; ".join(parts)
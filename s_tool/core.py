@@ -3,27 +3,72 @@ SeleniumTools
 
 """
 
+import contextlib
+import importlib
 import inspect
 import os
 import string
+import time
 import types
-from typing import List, Optional, Type
+import uuid
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Iterator, List, Optional, Type, Union
 from urllib.parse import urlparse
 
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.ui import WebDriverWait
 
-from .driver import SeleniumDriver
+from .backends import backend_names
+from .cookies import (
+    domain_matches,
+    expire,
+    from_cdp,
+    normalize,
+    to_cdp,
+    to_document_cookie,
+)
+from .dropdown import OptionIndex
 from .exceptions import InvalidWebDriverError, SToolException
+from .keys import InputSequence, parse_combo
 from .logger import logger
-from .parser import LxmlParser
+from .parser import LxmlParser, feed_parse, fromstring, locate, outer_html
+from .scripts import (
+    HARVEST_SCRIPT,
+    PAGE_SOURCE_SCRIPT,
+    PRUNE_SCRIPT,
+    PRUNE_SIZES_SCRIPT,
+    PRUNED_SOURCE_SCRIPT,
+    SELECT_SCRIPT,
+    VISIBILITY_SCRIPT,
+    WAIT_SCRIPT,
+    ScriptRegistry,
+    WaitResult,
+    iter_chunks,
+    js_locator,
+    normalize_locators,
+)
+
+if TYPE_CHECKING:
+    from .screenshot import ScreenshotWriter
+
+
+def _opt_in(option, module: str, factory: str):
+    """
+    Builds an opt-in feature with ``factory`` of ``module``, the module
+    is only imported when the option is set.
+    """
+    if option is None or option is False:
+        return None
+    return getattr(importlib.import_module(module, __package__), factory)(option)
 
 
 class SeleniumTools:
@@ -39,11 +84,46 @@ class SeleniumTools:
         self.browser = kwargs.get('browser')
         self.headless = kwargs.get('headless')
         self.executable_path = kwargs.get('exc_path')
+        self.remote_options = {key: kwargs[key] for key in (
+            'command_executor', 'remote_browser', 'pool_size',
+            'keep_alive', 'command_timeout') if key in kwargs}
 
-        if 'parser' in kwargs:
-            self._attach_custom_parsers(kwargs['parser'])
+        self.profiler = _opt_in(kwargs.get('profiler'), '.profiling', 'make_profiler')
         self.parser = LxmlParser()
-
+        if 'parser' in kwargs:
+            with self.profiler.span('SeleniumTools._attach_custom_parsers') \
+                    if self.profiler is not None else contextlib.nullcontext():
+                self._attach_custom_parsers(kwargs['parser'])
+
+        self.retry_policy = kwargs.get('retry_policy')
+        self.circuit_breaker = kwargs.get('circuit_breaker')
+        self.page_cache = kwargs.get('page_cache')
+
+        self._parser_class = kwargs.get('parser')
+        self.parse_workers = kwargs.get('parse_workers')
+        self._offloader = None
+        self._scripts = ScriptRegistry()
+        self._screenshot_writer = None
+
+        self.budget = kwargs.get('budget')
+        self.recorder = kwargs.get('recorder')
+        self.element_cache = _opt_in(kwargs.get('element_cache'), '.elements', 'make_element_cache')
+        self._option_indexes = {}
+        self.pruner = _opt_in(kwargs.get('prune'), '.prune', 'make_pruner')
+        self.session_guard = _opt_in(kwargs.get('thread_safe'), '.threadsafe', 'make_session_guard')
+        if kwargs.get('downloads') and (self.browser or '').lower() == 'remote':
+            # the grid node would save the files to its own disk
+            raise SToolException("DOWNLOADS_NOT_SUPPORTED: downloads need a local browser, not browser='remote'")
+        self.downloads = _opt_in(kwargs.get('downloads'), '.downloads', 'make_download_manager')
+        self._owns_downloads = self.downloads is not kwargs.get('downloads')
+        self._owns_driver = driver is None
+
+        if self.profiler is not None:
+            self.profiler.instrument(self)
+
+        # attach to a given driver first, so its validation commands are recorded too
+        if self.driver is not None:
+            self._start_session()
         if self._validate_driver() is False:
             self.driver = self._load_driver()
 
@@ -57,6 +137,9 @@ class SeleniumTools:
         """
         if self._validate_driver() is True:
             self._close()
+        if self.budget is not None:
+            logger.info('session resources: %s pages, %s recycles, peak rss %s bytes',
+                        self.budget.pages, self.budget.recycles, self.budget.peak_rss)
 
     def __enter__(self):
         """Returns an selenium webdriver
@@ -74,25 +157,157 @@ class SeleniumTools:
 
     def _load_driver(self):
         """Create Selenium webdriver object"""
+        from .driver import SeleniumDriver
+
         if self.browser is None:
-            self.browser='chrome'
+            self.browser = 'chrome'
 
         obj = SeleniumDriver(browser=self.browser,
                              headless=self.headless,
-                             executable_path=self.executable_path)
+                             executable_path=self.executable_path,
+                             download_dir=self.downloads.directory if self.downloads else None,
+                             **self.remote_options)
         self.driver = obj.load_driver()
+        self._owns_driver = True
+        self._start_session()
 
         return self.driver
 
+    def _start_session(self) -> None:
+        """Attaches the budget, recorder, session guard, profiler and downloads to a new driver"""
+        if self.element_cache is not None:
+            self.element_cache.clear()
+        self._option_indexes.clear()
+        if self.recorder is not None:
+            self.recorder.attach(self.driver)
+        if self.session_guard is not None:
+            self.session_guard.attach(self.driver)
+        if self.profiler is not None:
+            self.profiler.attach(self.driver)
+        if self.downloads is not None:
+            self.downloads.attach(self.driver)
+        if self.budget is not None:
+            self.budget.start(self.driver)
+
     def _close(self):
         """will stop driver after program execution"""
         self.driver.close()
-        print("selenium driver object closed")
+        if self._offloader is not None:
+            self._offloader.shutdown()
+            self._offloader = None
+        if self._screenshot_writer is not None:
+            self._screenshot_writer.close()
+            self._screenshot_writer = None
+        if self.downloads is not None and self._owns_downloads:
+            self.downloads.close()
         logger.info('selenium driver object closed')
 
+    def recycle(self, reason: str = "manual") -> bool:
+        """
+        Quits the browser and launches a new session with the same cookies.
+
+        SeleniumTools recycles sessions automatically when its ``budget``
+        is exceeded. Sessions of a driver passed in by the caller can not be
+        relaunched and are left as they are.
+
+        Args:
+            reason: str, optional
+                - Logged with the recycle. Defaults to "manual".
+
+        Returns:
+            bool: True if the session was relaunched.
+
+        Example:
+
+        .. code-block:: python
+
+            budget = ResourceBudget(max_rss_mb=1500)
+            selenium_tools = SeleniumTools(browser="chrome", budget=budget)
+            selenium_tools.recycle()
+        """
+        if not self._owns_driver:
+            logger.warning('can not recycle a driver passed to SeleniumTools (%s)', reason)
+            return False
+
+        # get_cookies() only returns the cookies of the current page
+        if hasattr(self.driver, 'execute_cdp_cmd'):
+            cookies = [from_cdp(cookie) for cookie in
+                       self.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']]
+        else:
+            cookies = self.driver.get_cookies()
+        url = self.driver.current_url
+        try:
+            self.driver.quit()
+        except WebDriverException as exc:
+            logger.warning('closing the recycled session failed: %s', exc)
+
+        self.driver = self._load_driver()
+        if cookies:
+            # without CDP cookies can only be set on a page of their domain
+            if not hasattr(self.driver, 'execute_cdp_cmd') and urlparse(url).scheme in ('http', 'https'):
+                self.driver.get(url)
+            self.set_cookies_bulk(cookies)
+
+        if self.budget is not None:
+            self.budget.recycles += 1
+        logger.info('selenium session recycled: %s', reason)
+        return True
+
+    def exclusive(self):
+        """
+        Runs a block of commands without commands of other threads in
+        between.
+
+        Needs the ``thread_safe`` option; without it the block runs
+        unguarded.
+
+        Raises:
+            ConcurrentSessionError: In "detect" mode, if another thread
+                uses the session.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(browser="chrome", thread_safe=True)
+
+            with selenium_tools.exclusive():
+                selenium_tools.fill({"q": "s-tool"})
+                selenium_tools.click("search")
+            print(selenium_tools.session_guard.stats())
+        """
+        if self.session_guard is None:
+            return contextlib.nullcontext()
+        return self.session_guard.exclusive()
+
+    def _current_host(self) -> Optional[str]:
+        """Returns the host of the loaded page when a circuit breaker is used"""
+        if self.circuit_breaker is None:
+            return None
+        return urlparse(self.driver.current_url).netloc
+
+    def _run_action(self, host: Optional[str], func, *args, **kwargs):
+        """
+        Runs an action through the configured retry policy and,
+        for a known host, through the circuit breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host is open.
+        """
+        def attempt():
+            if self.retry_policy is None:
+                return func(*args, **kwargs)
+            return self.retry_policy.call(func, *args, **kwargs)
+
+        if self.circuit_breaker is None or not host:
+            return attempt()
+        return self.circuit_breaker.call(host, attempt)
+
     def _attach_custom_parsers(self, parser_class: Type) -> None:
         """
-        Attaches custom parsers from the given parser class to the LxmlParser class.
+        Attaches custom parsers from the given parser class to the parser of
+        this instance. The LxmlParser class itself is left unchanged, so
+        sessions with different parsers can run side by side.
 
         Args:
             parser_class (class): The parser class containing custom parsers.
@@ -111,17 +326,17 @@ class SeleniumTools:
         source_methods = inspect.getmembers(
             parser_class(), predicate=inspect.ismethod)
 
-        # Attach the methods to the source class
+        # Bind the methods to the parser of this instance
         for method_name, method_obj in source_methods:
-            func = types.FunctionType(
-                method_obj.__func__.__code__, globals(), method_name)
-            setattr(LxmlParser, method_name, func)
+            setattr(self.parser, method_name,
+                    types.MethodType(method_obj.__func__, self.parser))
 
     def parse(
             self,
             ele_tag: str,
             locator_text: str,
             locator_type: str = "id",
+            cached_url: Optional[str] = None,
             **kwargs):
         """
         Parses an HTML element using the specified tag and locator.
@@ -133,6 +348,10 @@ class SeleniumTools:
                 - The locator text to find the HTML element.
             locator_type: str, optional
                 - The locator type. Defaults to id.
+            cached_url: str, optional
+                - Parse the cached source of this URL with lxml instead of
+                  the loaded page. A miss visits and caches the URL, see
+                  ``text()``. Defaults to None.
             kwargs: dict
                 - Additional keyword arguments to pass to the parser.
 
@@ -156,18 +375,145 @@ class SeleniumTools:
 
             # Parse a table with xpath
             result = selenium_tools.parse("table", "//table","xpath", attr1=value1)
+
+            # Parse a table from the page cache without navigating
+            result = selenium_tools.parse("table", "table_id", cached_url="https://www.example.com")
         """
         final_result = []
         method = getattr(self.parser, ele_tag, None)
         if method is not None and callable(method):
-            element = self.get_element(locator_text, locator_type)
-            html_string = element.get_property('outerHTML')
+            if cached_url is not None:
+                html_string = self._cached_outer_html(
+                    cached_url, locator_text, locator_type)
+            else:
+                html_string = self._outer_html(
+                    self.get_element(locator_text, locator_type))
             final_result = method(html_string, **kwargs)
         else:
             raise NotImplementedError(f"{ele_tag} parser not implemented")
 
         return final_result
 
+    def parse_async(
+            self,
+            ele_tag: str,
+            locator_text: str,
+            locator_type: str = "id",
+            cached_url: Optional[str] = None,
+            **kwargs) -> Future:
+        """
+        Like ``parse()``, but runs the parser in a process pool.
+
+        The element HTML is read on the calling thread, the parser runs in a
+        worker process. The number of unfinished jobs is bounded, so this call
+        blocks when the pool falls behind. Custom parser classes must be
+        defined at module level to be usable from the worker processes.
+
+        Args:
+            ele_tag: str
+                - The HTML tag to parse.
+            locator_text: str
+                - The locator text to find the HTML element.
+            locator_type: str, optional
+                - The locator type. Defaults to id.
+            cached_url: str, optional
+                - Parse the cached source of this URL, see ``parse()``.
+            kwargs: dict
+                - Additional keyword arguments to pass to the parser.
+
+        Returns:
+            future : concurrent.futures.Future
+                - Resolves to the parsed result.
+
+        Raises:
+            NotImplementedError: exception
+                - If the parser for the specified tag is not implemented.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver, parser=MyCustomParser, parse_workers=4)
+
+            futures = []
+            for url in urls:
+                selenium_tools.get(url)
+                # navigation of the next url overlaps with parsing of this one
+                futures.append(selenium_tools.parse_async("table", "//table", "xpath"))
+
+            results = [future.result() for future in futures]
+        """
+        method = getattr(self.parser, ele_tag, None)
+        if method is None or not callable(method):
+            raise NotImplementedError(f"{ele_tag} parser not implemented")
+
+        if cached_url is not None:
+            html_string = self._cached_outer_html(
+                cached_url, locator_text, locator_type)
+        else:
+            html_string = self._outer_html(
+                self.get_element(locator_text, locator_type))
+
+        if self._offloader is None:
+            from .offload import ParseOffloader
+
+            self._offloader = ParseOffloader(max_workers=self.parse_workers,
+                                             parser_class=self._parser_class)
+        return self._offloader.submit(ele_tag, html_string, **kwargs)
+
+    def _pruned_html(self, element: Optional[WebElement] = None) -> str:
+        """
+        Returns the pruned HTML of an element or of the page and records
+        the bytes saved.
+        """
+        if not getattr(self.driver, 'supports_javascript', True):
+            html = self.driver.page_source if element is None else element.get_property('outerHTML')
+            return self.pruner.prune_html(html)
+
+        html, bytes_before, bytes_after = self.driver.execute_script(
+            PRUNE_SCRIPT, element, self.pruner.config())
+        self.pruner.record(bytes_before, bytes_after)
+        logger.debug('pruned %s of %s bytes', bytes_before - bytes_after, bytes_before)
+        return html
+
+    def _outer_html(self, element: WebElement) -> str:
+        """Returns the outerHTML of an element, pruned with the ``prune`` option"""
+        if self.pruner is not None:
+            return self._pruned_html(element)
+        return element.get_property('outerHTML')
+
+    def _cached_source(self, url: str) -> str:
+        """
+        Returns the page source of a URL from the page cache,
+        navigating to it and caching it on a miss. Asking for a
+        ``cached_url`` opts the URL in, like ``get(url, cacheable=True)``.
+        """
+        if self.page_cache is None:
+            raise SToolException("PAGE_CACHE_NOT_CONFIGURED")
+
+        entry = self.page_cache.get(url)
+        if entry is not None:
+            return entry['page_source']
+
+        self.get(url)
+        return self._cache_page(url)['page_source']
+
+    def _cache_page(self, url: str) -> dict:
+        """Stores the page source of the current page in the page cache"""
+        return self.page_cache.set(url, self.driver.page_source, self.driver.current_url)
+
+    def _cached_outer_html(
+            self,
+            url: str,
+            locator_text: str,
+            locator_type: str) -> str:
+        """Locates an element in the cached source of a URL with lxml"""
+        tree = fromstring(self._cached_source(url))
+        elements = locate(tree, locator_text, locator_type)
+        if not elements:
+            raise NoSuchElementException(locator_text)
+        return outer_html(elements[0])
+
     def _get_supported_browsers(self) -> List[str]:
         """
         Get a list of all supported browsers by Selenium.
@@ -188,7 +534,7 @@ class SeleniumTools:
             ele for ele in dir(webdriver) if 'webdriver' in dir(
                 getattr(
                     webdriver, ele))]
-        return supported_browsers
+        return supported_browsers + backend_names()
 
     def _validate_driver(self) -> None:
         """
@@ -282,13 +628,19 @@ class SeleniumTools:
 
         return content
 
-    def get(self, url_or_html: str) -> None:
+    def get(self, url_or_html: str, cacheable: bool = False) -> None:
         """
         Visits the given URL or local HTML file or html content using the Selenium WebDriver.
 
         Args:
             url: str
                 - The URL or local HTML file path to visit.
+            cacheable: bool, optional
+                - Store the page source and final URL in the page cache
+                  after navigation. Defaults to False.
+
+        With a ``budget`` the session is recycled before the navigation
+        once one of its limits is exceeded.
 
         Raises:
             ValueError: If the URL is empty or not a valid string.
@@ -308,6 +660,9 @@ class SeleniumTools:
 
             # Visit a local HTML file
             selenium_tools.visit("file:///path/to/local/file.html")
+
+            # Visit a URL and keep its source in the page cache
+            selenium_tools.get("https://www.example.com", cacheable=True)
         """
         # Validate the URL or HTML content
         if not isinstance(url_or_html, str) or not url_or_html.strip():
@@ -316,7 +671,21 @@ class SeleniumTools:
 
         # Check if it's HTML content
         content = self._is_valid_html(url_or_html)
-        self.driver.get(content)
+        if self.budget is not None:
+            reason = self.budget.exceeded(self.driver)
+            if reason is not None:
+                self.recycle(reason)
+
+        if self.element_cache is not None:
+            self.element_cache.clear()
+        self._option_indexes.clear()
+
+        self._run_action(urlparse(content).netloc, self.driver.get, content)
+        if self.budget is not None:
+            self.budget.record_page()
+
+        if cacheable and self.page_cache is not None:
+            self._cache_page(url_or_html)
 
     def get_locator(
             self,
@@ -401,14 +770,31 @@ class SeleniumTools:
             else:
                 print("Element click failed.")
         """
-        try:
-
-            elem_locator = self.get_locator(locator_text, locator_type)
-
+        elem_locator = self.get_locator(locator_text, locator_type)
+        cache_key = (locator_type.upper(), locator_text, False)
+        # reuse an element found before on this page
+        cached = self.element_cache.get(cache_key) if self.element_cache is not None else None
+
+        def _click():
+            nonlocal cached
+            if cached is not None:
+                try:
+                    element = WebDriverWait(
+                        self.driver, click_time).until(
+                        EC.element_to_be_clickable(cached))
+                    element.click()
+                    return
+                except StaleElementReferenceException:
+                    # the element left the page, wait for it by its locator
+                    self.element_cache.discard(cache_key)
+                    cached = None
             element = WebDriverWait(
                 self.driver, click_time).until(
                 EC.element_to_be_clickable(elem_locator))
             element.click()
+
+        try:
+            self._run_action(self._current_host(), _click)
             logger.info(
                 "clicked on value:%s attribute:%s",
                 locator_text,
@@ -438,14 +824,18 @@ class SeleniumTools:
                 - returns a single element if False or None.
                 - Defaults to None.
 
+        With an ``element_cache`` repeated lookups of a single element on
+        the same page return the cached element without a WebDriver call.
+        Lists are always looked up again.
+
         Raises:
             SToolException: If an invalid selector is provided.
+            NoSuchElementException: If no single element matches.
 
         Returns:
             element :  [List[WebElement]]
-                - A list of elements if many=True.
+                - A list of elements if many=True, empty if none match.
                 - A single element if many=False or None.
-                - None if the element is not found.
 
         Example:
 
@@ -460,16 +850,35 @@ class SeleniumTools:
             # Get multiple elements by class name
             elements = selenium_tools.get_element('myClass', 'class_name', many=True)
         """
+        return self._find_elements(locator_text, locator_type, many)
+
+    def _find_elements(self, locator_text: str, locator_type: str, many: Optional[bool],
+                       retry: bool = True):
+        """
+        Looks elements up like ``get_element``; with ``retry`` False the
+        retry policy is skipped, for callers that already retry the lookup.
+        """
         locator_type = locator_type.upper()
         if hasattr(By, locator_type):
             try:
+                # lists are not cached, they miss elements added after the lookup
+                cache = self.element_cache if not many else None
+                cache_key = (locator_type, locator_text, False)
+                if cache is not None:
+                    cached = cache.get(cache_key)
+                    if cached is not None:
+                        return cached
+
                 locator = self.get_locator(locator_text, locator_type)
                 elements = None
-                if many:
-                    elements = self.driver.find_elements(*locator)
+                find = self.driver.find_elements if many else self.driver.find_element
+                if self.retry_policy is None or not retry:
+                    elements = find(*locator)
                 else:
-                    elements = self.driver.find_element(*locator)
+                    elements = self.retry_policy.call(find, *locator)
 
+                if cache is not None:
+                    elements = cache.set(cache_key, elements, lambda: find(*locator))
                 return elements
             except NoSuchElementException as exc:
                 raise NoSuchElementException(locator_text) from exc
@@ -484,11 +893,17 @@ class SeleniumTools:
         """
         Selects a dropdown option based on the specified criteria.
 
+        With JavaScript the options are indexed once per page (see
+        ``option_index()``) and selected by index with a single script that
+        fires the input and change events, which keeps repeated selections
+        on selects with thousands of options fast.
+
         Args:
             element: WebElement
                 - The Selenium WebElement representing the dropdown element.
             _value: str
                 - The value, text, or index to select the option by.
+                - A list selects several options of a multi-select at once.
 
             _by: int, optional
                 - The selector type. Defaults to 0.
@@ -500,6 +915,7 @@ class SeleniumTools:
             * SToolException: If the element is not a select (dropdown) element.
             * SToolException: If an invalid selector is provided.
             * SToolException: If an invalid value is provided when selecting by index.
+            * NoSuchElementException: If no option matches a value.
 
         Returns:
             None
@@ -520,6 +936,9 @@ class SeleniumTools:
 
             # Select an option by index
             selenium_tools.select_option(dropdown_element, 2, _by=2)
+
+            # Select several options of a multi-select in one call
+            selenium_tools.select_option(dropdown_element, ['en', 'fr'])
         """
 
         # Validate if element is a select element
@@ -530,19 +949,82 @@ class SeleniumTools:
         if _by not in [0, 1, 2]:
             raise SToolException("INVALIDSELECTOR")
 
+        values = list(_value) if isinstance(_value, (list, tuple)) else [_value]
+
         # Validate the value when selecting by index
-        if _by == 2 and not isinstance(_value, int):
+        if _by == 2 and not all(isinstance(value, int) for value in values):
             raise SToolException("INVALIDVALUE")
 
-        # Select the option based on the selector type
-        select = Select(element)
-        select_type = {
-            0: select.select_by_value,
-            1: select.select_by_visible_text,
-            2: select.select_by_index,
-        }
+        if getattr(self.driver, 'supports_javascript', True):
+            self._select_indexed(element, values, _by)
+            return
+
+        # without JavaScript click the options like selenium's Select does
+        options = element.find_elements(By.TAG_NAME, 'option')
+        index, positions = self._resolve_options(element, values, _by)
+        if len(index) != len(options):
+            index, positions = self._resolve_options(element, values, _by, refresh=True)
+            if len(index) != len(options):
+                raise SToolException("OPTIONS_CHANGED")
+        for position in positions:
+            if not options[position].is_selected():
+                options[position].click()
+
+    def option_index(self, element: WebElement, refresh: bool = False) -> OptionIndex:
+        """
+        Returns the option index of a select element.
+
+        The options are read with one transfer of the select's outerHTML
+        and parsed with lxml. The index is cached per element until the
+        next navigation.
+
+        Args:
+            element: WebElement
+                - The select element.
+            refresh: bool, optional
+                - Read the options again. Defaults to False.
+
+        Returns:
+            index : OptionIndex
+                - Lookup tables of the option values and texts.
 
-        select_type[_by](_value)
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            countries = selenium_tools.get_element("country", "name")
+            index = selenium_tools.option_index(countries)
+            print(len(index), "options")
+        """
+        index = None if refresh else self._option_indexes.get(element.id)
+        if index is None:
+            index = OptionIndex.from_html(element.get_property('outerHTML'))
+            self._option_indexes[element.id] = index
+        return index
+
+    def _resolve_options(self, element: WebElement, values: list, _by: int,
+                         refresh: bool = False) -> tuple:
+        """Returns the index and the option positions of values, a miss in a cached index reads the options again"""
+        cached = not refresh and element.id in self._option_indexes
+        index = self.option_index(element, refresh=refresh)
+        try:
+            return index, index.resolve(values, _by)
+        except NoSuchElementException:
+            if not cached:
+                raise
+        # options added since the index was built, e.g. by a dependent dropdown
+        index = self.option_index(element, refresh=True)
+        return index, index.resolve(values, _by)
+
+    def _select_indexed(self, element: WebElement, values: list, _by: int) -> None:
+        """Selects options by their index with one script that also fires the change events"""
+        for refresh in (False, True):
+            index, indices = self._resolve_options(element, values, _by, refresh)
+            expected = [index.options[position][0] for position in indices]
+            if self.driver.execute_script(SELECT_SCRIPT, element, indices, expected):
+                return
+        raise SToolException("OPTIONS_CHANGED")
 
     def fill(self, kwargs: dict, _by: int = 0) -> None:
         """
@@ -588,29 +1070,42 @@ class SeleniumTools:
         if _by not in [0, 1, 2]:
             raise SToolException("INVALIDSELECTOR")
 
+        host = self._current_host()
         for element, value in kwargs.items():
-            web_element = self.get_element(element, 'name', many=False)
-            if not web_element:
-                raise NoSuchElementException("value:{element} attribute:name")
-
-            if isinstance(value, str):
-                web_element.clear()
-                web_element.send_keys(value)
-            elif isinstance(value, (int, bool, float)):
-                web_element.clear()
-                web_element.send_keys(str(value))
-            elif isinstance(value, list):
-                self.select_option(web_element, value, _by=_by)
-            else:
-                raise SToolException("INVALIDVALUE")
+            self._run_action(host, self._fill_element, element, value, _by)
+
+    def _fill_element(self, element: str, value, _by: int) -> None:
+        """Inserts or selects the value of a single form element"""
+        # fill() retries the whole field, the lookup is not retried on its own
+        web_element = self._find_elements(element, 'name', many=False, retry=False)
+        if not web_element:
+            raise NoSuchElementException("value:{element} attribute:name")
+
+        if isinstance(value, str):
+            web_element.clear()
+            web_element.send_keys(value)
+        elif isinstance(value, (int, bool, float)):
+            web_element.clear()
+            web_element.send_keys(str(value))
+        elif isinstance(value, list):
+            self.select_option(web_element, value, _by=_by)
+        else:
+            raise SToolException("INVALIDVALUE")
 
-    def press_multiple_keys(self, keys: list):
+    def press_multiple_keys(self, keys: list, *combos: list) -> None:
         """
         Presses multiple keys simultaneously using Selenium.
 
+        Keys are pressed in order and released in reverse order. Further
+        combinations are pressed one after the other, all of them are sent
+        in a single WebDriver request. Single letters are sent upper-case,
+        use ``send_input`` to press a lower-case letter.
+
         Args:
             keys:list
                 - A list of keys to press.
+            combos: list, optional
+                - More key lists pressed after the first one.
 
         Raises:
             ValueError: If any of the keys are not valid.
@@ -622,50 +1117,74 @@ class SeleniumTools:
             selenium_tools = SeleniumTools(driver)
             keys_to_press = ['CTRL','SHIFT','A']  # Example: Pressing CTRL+SHIFT+A
             selenium_tools.press_multiple_keys(keys_to_press)
+
+            # Select all and copy in one request
+            selenium_tools.press_multiple_keys(['CTRL', 'a'], ['CTRL', 'c'])
         """
+        sequence = InputSequence()
+        for combo in (keys,) + combos:
+            sequence.combo([key.upper() if key in string.ascii_letters else key
+                            for key in parse_combo(combo)])
+        sequence.perform(self.driver)
 
-        valid_non_modifier_keys = string.ascii_uppercase
-        keys = [key.upper() for key in keys]
+    def send_input(
+            self,
+            sequence: InputSequence,
+            locator_text: Optional[str] = None,
+            locator_type: str = "id") -> None:
+        """
+        Sends a sequence of key combinations, text and pauses in a single
+        W3C actions request.
 
-        # Validate the keys
-        for key in keys:
-            if not isinstance(key, str) and key not in vars(
-                    Keys).values() and key not in valid_non_modifier_keys:
-                raise ValueError(
-                    f"Invalid key: {key}. Keys must be either strings, valid keys from the Keys class, or valid non-modifier keys.")
+        Args:
+            sequence: InputSequence
+                - The precompiled input sequence.
+            locator_text: str, optional
+                - Click this element first to focus it. Defaults to None.
+            locator_type: str, optional
+                - The locator type of the element. Defaults to "id".
 
-        # Create an ActionChains object
-        action_chains = ActionChains(self.driver)
+        Raises:
+            NoSuchElementException: If the element to focus is not found.
 
-        # Press each key in the list
-        for key in keys:
-            if isinstance(key, str):
-                if key in valid_non_modifier_keys:
-                    action_chains.send_keys(key)
-                else:
-                    key = getattr(Keys, key)
-            action_chains.key_down(key)
-
-        # Release each key in reverse order
-        for key in reversed(keys):
-            if isinstance(key, str):
-                if key in valid_non_modifier_keys:
-                    action_chains.send_keys(key)
-                else:
-                    key = getattr(Keys, key)
-            action_chains.key_up(key)
+        Example:
 
-        # Perform the actions
-        action_chains.perform()
+        .. code-block:: python
 
-    def cookies(self) -> dict:
+            selenium_tools = SeleniumTools(driver)
+            sequence = InputSequence().text("hello").key("tab").text("world")
+            selenium_tools.send_input(sequence, "search", "name")
+        """
+        element = None
+        if locator_text is not None:
+            element = self.get_element(locator_text, locator_type, many=False)
+            if element is None:
+                raise NoSuchElementException(f"value:{locator_text} attribute:{locator_type}")
+        sequence.perform(self.driver, element)
+
+    def cookies(
+            self,
+            full: bool = False,
+            domain: Optional[str] = None) -> Union[dict, List[dict]]:
         """
         Returns the cookies of the given Selenium WebDriver instance as a dictionary.
 
+        All cookies are fetched with a single WebDriver call.
+
+        Args:
+            full: bool, optional
+                - If True, return a list of cookie dicts with all attributes
+                  (domain, path, expiry, secure, httpOnly, sameSite).
+                - Defaults to False.
+            domain: str, optional
+                - Only return cookies that are sent to this domain.
+                - Defaults to None.
+
         Returns:
             cookies_dict :dict
                 - The cookies as a dictionary.
                 - If no cookies are present,an empty dictionary is returned.
+                - A list of cookie dicts if full is True.
 
         Example:
 
@@ -674,9 +1193,17 @@ class SeleniumTools:
             selenium_tools = SeleniumTools(driver)
             cookies = selenium_tools.cookies()
             print(cookies)
+
+            # Save the full session cookies of a domain
+            session = selenium_tools.cookies(full=True, domain="example.com")
         """
 
         cookies = self.driver.get_cookies()
+        if domain is not None:
+            cookies = [cookie for cookie in cookies
+                       if domain_matches(cookie.get('domain'), domain)]
+        if full:
+            return cookies
         cookies_dict = {cookie["name"]: cookie["value"] for cookie in cookies}
         return cookies_dict or {}
 
@@ -710,22 +1237,95 @@ class SeleniumTools:
             selenium_tools = SeleniumTools(driver)
             selenium_tools.set_cookies(drop_all=True, cookie1='value1', cookie2='value2')
         """
+        cookie_list = [{"name": name, "value": value}
+                       for name, value in cookies.items()]
+        self.set_cookies_bulk(cookie_list, drop_all=drop_all, drop_keys=drop_keys)
+
+    def set_cookies_bulk(
+            self,
+            cookies: List[dict],
+            drop_all: bool = False,
+            drop_keys: Optional[List[str]] = None,
+            domain: Optional[str] = None) -> None:
+        """
+        Adds many cookies with all their attributes in as few WebDriver
+        calls as possible.
 
-        # Convert cookie names and values to strings
-        cookie = {str(k): str(v) for k, v in cookies.items()}
+        Chromium drivers set and drop all cookies with one CDP
+        ``Network.setCookies`` call. Other drivers write them with a single
+        ``document.cookie`` script; httpOnly cookies, which JavaScript
+        can not write, fall back to one ``add_cookie`` call each.
+
+        Args:
+            cookies: list
+                - Cookie dicts as returned by ``cookies(full=True)``.
+            drop_all: bool, optional
+                - If True, delete all cookies before adding the new ones.
+                - Defaults to False.
+            drop_keys: list, optional
+                - Cookie names to delete before adding the new ones.
+                - Defaults to None.
+            domain: str, optional
+                - Only add cookies that are sent to this domain.
+                - Defaults to None.
+
+        Returns:
+            None
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            saved = selenium_tools.cookies(full=True)
+
+            # ... later, in a new session on the same site
+            selenium_tools.set_cookies_bulk(saved, drop_all=True)
+        """
+        cookies = [normalize(cookie) for cookie in cookies]
+        if domain is not None:
+            cookies = [cookie for cookie in cookies
+                       if domain_matches(cookie.get('domain'), domain)]
 
         # Delete all cookies if specified
         if drop_all:
             self.driver.delete_all_cookies()
 
-        # Delete specific cookies by name
-        drop_keys = drop_keys if drop_keys else []
-        for name in drop_keys:
-            self.driver.delete_cookie(name)
+        # Expire specific cookies by name, keeping their domain and path
+        if drop_keys:
+            cookies = [expire(cookie) for cookie in self.driver.get_cookies()
+                       if cookie['name'] in drop_keys] + cookies
+
+        if not cookies:
+            return
 
-        # Add new cookies
-        for name, value in cookie.items():
-            self.driver.add_cookie({"name": name, "value": value})
+        if not getattr(self.driver, 'supports_javascript', True):
+            for cookie in cookies:
+                if cookie.get('expiry') == 1:
+                    self.driver.delete_cookie(cookie['name'])
+                else:
+                    self.driver.add_cookie(cookie)
+            return
+
+        if hasattr(self.driver, 'execute_cdp_cmd'):
+            default_url = self.driver.current_url
+            self.driver.execute_cdp_cmd(
+                'Network.setCookies',
+                {'cookies': [to_cdp(cookie, default_url) for cookie in cookies]})
+            return
+
+        scripted = [to_document_cookie(cookie)
+                    for cookie in cookies if not cookie.get('httpOnly')]
+        if scripted:
+            self.driver.execute_script(
+                "for (const cookie of arguments[0]) { document.cookie = cookie; }",
+                scripted)
+        for cookie in cookies:
+            if cookie.get('httpOnly'):
+                if cookie.get('expiry') == 1:
+                    self.driver.delete_cookie(cookie['name'])
+                else:
+                    self.driver.add_cookie(cookie)
 
     def execute_js(self, statement: str) -> str:
         """
@@ -763,13 +1363,460 @@ class SeleniumTools:
         # Execute the JavaScript statement and return the output
         return str(self.driver.execute_script(statement))
 
-    def text(self) -> str:
+    def execute_script(
+            self,
+            script: str,
+            *args,
+            async_script: bool = False,
+            timeout: Optional[float] = None):
+        """
+        Execute JavaScript and return its result as native Python values.
+
+        Unlike ``execute_js()`` the result is not converted to a string:
+        arrays become lists, objects become dicts and DOM nodes become
+        WebElements.
+
+        Args:
+            script: str
+                - The JavaScript function body to run.
+            args:
+                - Arguments available to the script as ``arguments``.
+            async_script: bool, optional
+                - Run with ``execute_async_script``; the script must call
+                  ``arguments[arguments.length - 1]`` with its result.
+                - Defaults to False.
+            timeout: float, optional
+                - Script timeout in seconds for this call only.
+                - Defaults to None (keep the driver setting).
+
+        Raises:
+            ValueError: If the script is not a valid string.
+
+        Returns:
+            result : object
+                - The script result.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            links = selenium_tools.execute_script(
+                "return [...document.links].map(a => a.href)")
+
+            status = selenium_tools.execute_script(
+                "const done = arguments[arguments.length - 1];"
+                "fetch(arguments[0]).then(r => done(r.status));",
+                "/health", async_script=True, timeout=5)
+        """
+        if not isinstance(script, str) or not script.strip():
+            raise ValueError(
+                "Invalid script. The script must be a non-empty string.")
+
+        execute = self.driver.execute_async_script if async_script \
+            else self.driver.execute_script
+        if timeout is None:
+            return execute(script, *args)
+
+        previous = self.driver.timeouts.script
+        self.driver.set_script_timeout(timeout)
+        try:
+            return execute(script, *args)
+        finally:
+            self.driver.set_script_timeout(previous)
+
+    def execute_chunked(
+            self,
+            script: str,
+            *args,
+            chunk_size: int = 1000,
+            stream: bool = False):
+        """
+        Execute JavaScript returning a large array or string and transfer
+        the result in several smaller WebDriver calls.
+
+        The script runs once; its result is kept in the page and read back
+        ``chunk_size`` items (or characters) at a time.
+
+        Args:
+            script: str
+                - The JavaScript function body returning an array or string.
+            args:
+                - Arguments available to the script as ``arguments``.
+            chunk_size: int, optional
+                - Items or characters per call. Defaults to 1000.
+            stream: bool, optional
+                - Return an iterator over the chunks instead of the joined
+                  result. Defaults to False.
+
+        Returns:
+            result : list or str
+                - The complete result, or an iterator of chunks if stream is True.
+                - None if the script returned null or an empty value.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            rows = selenium_tools.execute_chunked(
+                "return window.reportRows", chunk_size=5000)
+        """
+        chunks = iter_chunks(self.driver, script, *args, chunk_size=chunk_size)
+        if stream:
+            return chunks
+
+        result = None
+        for chunk in chunks:
+            if result is None:
+                result = chunk
+            else:
+                result += chunk
+        return result
+
+    def register_script(self, source: str) -> str:
+        """
+        Registers a JavaScript snippet and returns a handle for ``call_script()``.
+
+        The snippet is sent to the page on its first call only; later calls
+        send the handle and the arguments. It is reinstalled automatically
+        after navigation.
+
+        Args:
+            source: str
+                - The JavaScript function body.
+
+        Returns:
+            handle : str
+                - The script handle.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            handle = selenium_tools.register_script(
+                "return [...document.querySelectorAll(arguments[0])].map(e => e.textContent)")
+
+            for url in urls:
+                selenium_tools.get(url)
+                titles = selenium_tools.call_script(handle, "h2")
+        """
+        return self._scripts.register(source)
+
+    def call_script(self, handle: str, *args):
+        """
+        Calls a script registered with ``register_script()``.
+
+        Raises:
+            SToolException: If the handle is not registered.
+
+        Returns:
+            result : object
+                - The script result as native Python values.
+        """
+        return self._scripts.call(self.driver, handle, *args)
+
+    def extract_schema(self, schema: dict, root: Optional[WebElement] = None):
+        """
+        Extracts typed records described by a declarative schema with a
+        single script call.
+
+        The schema is compiled once into a JavaScript extractor, which is
+        registered like ``register_script()``, so repeated extractions only
+        send its handle. See ``s_tool.schema`` for the schema format.
+
+        Args:
+            schema: dict
+                - Nested CSS selectors and field types.
+            root: WebElement, optional
+                - Restrict the extraction to this element.
+                - Defaults to None (the whole document).
+
+        Raises:
+            ValueError: If the schema is invalid.
+
+        Returns:
+            records : list or dict
+                - A list of records if the schema has a top level selector,
+                  a single record otherwise.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            results = selenium_tools.extract_schema({
+                "selector": ".result",
+                "fields": {
+                    "title": "h3",
+                    "href": {"selector": "a", "prop": "href"},
+                    "price": {"selector": ".price", "type": "float"},
+                },
+            })
+        """
+        from .schema import coerce, compile_schema
+
+        spec, source = compile_schema(schema)
+        handle = self._scripts.register(source)
+        return coerce(spec, self._scripts.call(self.driver, handle, root))
+
+    def screenshot(
+            self,
+            path: Optional[str] = None,
+            locator_text: Optional[str] = None,
+            locator_type: str = "id",
+            full_page: bool = False,
+            fmt: Optional[str] = None,
+            quality: Optional[int] = None,
+            scale: Optional[float] = None,
+            background: bool = False,
+            writer: Optional['ScreenshotWriter'] = None):
+        """
+        Takes a screenshot of the page or of a single element.
+
+        Only the capture runs on the calling thread. With ``background``
+        or a ``writer`` the base64 decoding, re-encoding and the disk write
+        run on a writer thread and a future is returned.
+
+        Args:
+            path: str, optional
+                - File to write. The format follows the extension
+                  (png, jpg/jpeg, webp). Defaults to None (return the bytes).
+            locator_text: str, optional
+                - Capture only the element with this locator.
+            locator_type: str, optional
+                - The locator type. Defaults to id.
+            full_page: bool, optional
+                - Capture the whole page instead of the viewport.
+                - Defaults to False.
+            fmt: str, optional
+                - Output format, overrides the file extension.
+            quality: int, optional
+                - JPEG/WebP quality (1-100).
+            scale: float, optional
+                - Downscale factor, e.g. 0.5. Requires Pillow.
+            background: bool, optional
+                - Write on the writer thread owned by this instance.
+                - Defaults to False.
+            writer: ScreenshotWriter, optional
+                - Write on the given writer.
+
+        Raises:
+            SToolException: If conversion is needed and Pillow is missing.
+
+        Returns:
+            result : bytes or str or Future
+                - The image bytes if no path is given.
+                - The written path, or a future of it when writing in the background.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+
+            # full page audit screenshot, written without blocking
+            selenium_tools.screenshot("audit/page.jpg", full_page=True,
+                                      quality=70, background=True)
+
+            # a single element as png bytes
+            png = selenium_tools.screenshot(locator_text="chart")
+        """
+        from .screenshot import ScreenshotWriter, capture, encode, format_from_path, normalize_format, write
+
+        fmt = normalize_format(fmt or format_from_path(path))
+        element = None
+        if locator_text is not None:
+            element = self.get_element(locator_text, locator_type)
+
+        data, source_fmt = capture(self.driver, element, full_page, fmt, quality)
+        options = {'fmt': fmt, 'quality': quality, 'scale': scale}
+
+        if path is None:
+            return encode(data, source_fmt, **options)
+
+        if background and writer is None:
+            if self._screenshot_writer is None:
+                self._screenshot_writer = ScreenshotWriter()
+            writer = self._screenshot_writer
+        if writer is not None:
+            return writer.submit(path, data, source_fmt, **options)
+
+        return write(path, data, source_fmt, **options)
+
+    def download(
+            self,
+            locator_text: str,
+            locator_type: str = "id",
+            timeout: float = 60,
+            pattern: Optional[str] = None,
+            sink=None):
+        """
+        Clicks an element and waits for the file it downloads.
+
+        Needs the ``downloads`` option, which gives the session a download
+        directory (a temporary one for ``downloads=True``, removed when the
+        session closes). Remote sessions save files on the grid node and
+        can not use it.
+
+        Args:
+            locator_text: str
+                - The attribute value of the element to click.
+            locator_type: str, optional
+                - The type of locator to use. Defaults to "id".
+            timeout: float, optional
+                - Seconds to wait for the download. Defaults to 60.
+            pattern: str, optional
+                - Only accept file names matching this glob, e.g. "*.csv".
+            sink: optional
+                - Hands the file to ``Download.hand_off(sink)`` and returns
+                  its result instead of the download.
+
+        Returns:
+            Download: The finished download.
+
+        Raises:
+            SToolException: If downloads are not configured, the element
+                can not be clicked or the download does not finish in time.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(browser="chrome", downloads=True)
+            selenium_tools.get("https://example.com/reports")
+
+            download = selenium_tools.download("export-csv", pattern="*.csv")
+            for row in download.rows():
+                print(row)
+
+            # or stream it to a file-like sink without reading it into memory
+            with open("report.csv", "wb") as file:
+                selenium_tools.download("export-csv", sink=file)
+        """
+        if self.downloads is None:
+            raise SToolException("DOWNLOADS_NOT_CONFIGURED")
+
+        with self.downloads.expect(timeout=timeout, pattern=pattern) as expectation:
+            if not self.click(locator_text, locator_type):
+                raise SToolException("DOWNLOAD_NOT_STARTED")
+        download = expectation.download
+        if sink is not None:
+            return download.hand_off(sink)
+        return download
+
+    def harvest(
+            self,
+            locator_text: str,
+            locator_type: str = "css_selector",
+            next_locator: Optional[str] = None,
+            next_locator_type: str = "id",
+            max_items: Optional[int] = None,
+            max_steps: int = 100,
+            idle_steps: int = 2,
+            pause: float = 0.5,
+            as_html: bool = False) -> Iterator[list]:
+        """
+        Harvests an infinite scroll or paginated listing incrementally.
+
+        Every step runs one script that returns only the items not seen
+        before and marks them with a marker attribute, then scrolls to the
+        bottom of the page (or, with ``next_locator``, clicks the next
+        button). Work per step is proportional to the new items only.
+
+        Harvesting stops when ``idle_steps`` consecutive steps find no new
+        items, the next button is gone, ``max_items`` items were returned
+        or ``max_steps`` steps were taken.
+
+        Args:
+            locator_text: str
+                - Locator of the listing items.
+            locator_type: str, optional
+                - The locator type. Defaults to css_selector.
+            next_locator: str, optional
+                - Locator of the "next" button. Defaults to None (scroll).
+            next_locator_type: str, optional
+                - The locator type of the next button. Defaults to id.
+            max_items: int, optional
+                - Stop after this many items. Defaults to None.
+            max_steps: int, optional
+                - Stop after this many steps. Defaults to 100.
+            idle_steps: int, optional
+                - Stop after this many steps without new items. Defaults to 2.
+            pause: float, optional
+                - Seconds to wait for content after scrolling or clicking.
+                - Defaults to 0.5.
+            as_html: bool, optional
+                - Return the outerHTML of the items instead of WebElements.
+                - Defaults to False.
+
+        Yields:
+            items : list
+                - The new items of a step, WebElements or HTML strings.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            selenium_tools.get("https://example.com/feed")
+
+            posts = []
+            for items in selenium_tools.harvest(".post", max_items=500, as_html=True):
+                posts.extend(items)
+
+            # "next" button pagination
+            for items in selenium_tools.harvest("tr.row", next_locator="next-page"):
+                ...
+        """
+        is_xpath, expression = js_locator(locator_text, locator_type)
+        handle = self.register_script(HARVEST_SCRIPT)
+        marker = f"data-stool-seen-{uuid.uuid4().hex[:8]}"
+        scroll = next_locator is None
+
+        returned = 0
+        idle = 0
+        for _ in range(max_steps):
+            items = self.call_script(
+                handle, is_xpath, expression, marker, as_html, scroll)
+
+            if items:
+                idle = 0
+                if max_items is not None:
+                    items = items[:max_items - returned]
+                returned += len(items)
+                yield items
+                if max_items is not None and returned >= max_items:
+                    return
+            else:
+                idle += 1
+                if idle >= idle_steps:
+                    return
+
+            if not scroll and not self.click(next_locator, next_locator_type):
+                return
+            time.sleep(pause)
+
+    def text(self, cached_url: Optional[str] = None) -> str:
         """
         Returns the HTML source code of the currently loaded page
         in the given Selenium WebDriver instance.
 
+        With the ``prune`` option the source is pruned in the browser before
+        it is transferred, see ``s_tool.prune.Pruner``. ``parse()`` and
+        ``iter_text()`` prune the same way.
+
+        Args:
+            cached_url: str, optional
+                - Return the source of this URL from the page cache without
+                  navigating. On a miss the URL is visited and cached, a
+                  ``cached_url`` opts the URL into the page cache even if it
+                  was not loaded with ``cacheable=True``. Defaults to None.
+
         Raises:
             ValueError: If the driver is not a valid WebDriver instance.
+            SToolException: If cached_url is given without a page cache.
 
         Returns:
             html_string: str
@@ -782,10 +1829,87 @@ class SeleniumTools:
             selenium_tools = SeleniumTools(driver)
             source = selenium_tools.page_source()
             print("Page Source:", source)
+
+            # Read a cached page without navigating
+            source = selenium_tools.text(cached_url="https://www.example.com")
         """
+        if cached_url is not None:
+            return self._cached_source(cached_url)
+
+        if self.pruner is not None:
+            return self._pruned_html()
+
         # Return the page source
         return self.driver.page_source
 
+    def iter_text(self, chunk_size: int = 1000000) -> Iterator[str]:
+        """
+        Returns the serialized DOM of the current page in chunks.
+
+        The page is serialized once in the browser and transferred
+        ``chunk_size`` characters per WebDriver call, so very large pages
+        never travel as one huge response. Drivers without JavaScript
+        return slices of their page source.
+
+        Args:
+            chunk_size: int, optional
+                - Characters per WebDriver call. Defaults to 1000000.
+
+        Yields:
+            chunk: str
+                - Consecutive parts of the HTML source.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            with open("report.html", "w") as file:
+                for chunk in selenium_tools.iter_text():
+                    file.write(chunk)
+        """
+        if not getattr(self.driver, 'supports_javascript', True):
+            source = self.text()
+            return (source[start:start + chunk_size]
+                    for start in range(0, len(source), chunk_size))
+
+        if self.pruner is not None:
+            return self._iter_pruned(chunk_size)
+        return iter_chunks(self.driver, PAGE_SOURCE_SCRIPT, chunk_size=chunk_size)
+
+    def _iter_pruned(self, chunk_size: int) -> Iterator[str]:
+        yield from iter_chunks(self.driver, PRUNED_SOURCE_SCRIPT,
+                               self.pruner.config(), chunk_size=chunk_size)
+        sizes = self.driver.execute_script(PRUNE_SIZES_SCRIPT)
+        if sizes:
+            self.pruner.record(*sizes)
+
+    def document(self, chunk_size: int = 1000000):
+        """
+        Parses the current page with lxml while it is transferred.
+
+        The chunks of ``iter_text()`` are fed into an lxml feed parser as
+        they arrive, parsing overlaps the transfer and the page source is
+        never held as one string.
+
+        Args:
+            chunk_size: int, optional
+                - Characters per WebDriver call. Defaults to 1000000.
+
+        Returns:
+            root: lxml.html.HtmlElement
+                - The root element of the page, None for an empty page.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            root = selenium_tools.document()
+            errors = root.xpath("//tr[td[@class='level' and text()='ERROR']]")
+        """
+        return feed_parse(self.iter_text(chunk_size=chunk_size))
+
     def url(self) -> str:
         """
         Returns the current loaded URL in the given Selenium WebDriver instance.
@@ -848,21 +1972,154 @@ class SeleniumTools:
             raise TimeoutException(
                 f"Element with locator '{locator_type}={locator_text}' was not found within {timeout} seconds.") from exc
 
+    def _first_visible(self, locator_text: str, locator_type: str):
+        """Returns the first displayed element of a locator or None"""
+        for element in self.driver.find_elements(*self.get_locator(locator_text, locator_type)):
+            try:
+                if element.is_displayed():
+                    return element
+            except WebDriverException:
+                continue
+        return None
+
+    def _wait_for_locators(self, locators, locator_type: str, timeout: float,
+                           poll_frequency: float, match_any: bool) -> WaitResult:
+        pairs = normalize_locators(locators, locator_type)
+        if getattr(self.driver, 'supports_javascript', True):
+            handle = self.register_script(WAIT_SCRIPT)
+            compiled = [list(js_locator(*pair)) for pair in pairs]
+
+            def check_all():
+                return self.call_script(handle, compiled, match_any)
+        else:
+            def check_all():
+                found = [None] * len(pairs)
+                for index, pair in enumerate(pairs):
+                    found[index] = self._first_visible(*pair)
+                    if match_any and found[index] is not None:
+                        break
+                return found
+
+        first = None
+
+        def condition(_driver):
+            nonlocal first
+            found = check_all()
+            if first is None:
+                first = next((index for index, element in enumerate(found)
+                              if element is not None), None)
+            done = any(element is not None for element in found) if match_any \
+                else all(element is not None for element in found)
+            return found if done else False
+
+        try:
+            found = WebDriverWait(self.driver, timeout, poll_frequency).until(condition)
+        except TimeoutException as exc:
+            names = ', '.join(f"{kind}={text}" for text, kind in pairs)
+            condition_name = 'any of' if match_any else 'all of'
+            raise TimeoutException(
+                f"Elements with locators {condition_name} '{names}' were not found within {timeout} seconds.") from exc
+        return WaitResult(found, first)
+
+    def wait_for_all(self, locators: list, locator_type: str = 'id',
+                     timeout: float = 10, poll_frequency: float = 0.25) -> WaitResult:
+        """
+        Waits until the elements of all the locators are present and visible.
+
+        All the locators are checked by a single script call per poll, so
+        waiting for ten elements costs as many round trips as waiting for
+        one. Drivers without JavaScript check the locators one by one.
+
+        Args:
+            locators: list
+                - Locator strings of ``locator_type`` or
+                  ``(locator_text, locator_type)`` pairs.
+            locator_type: str, optional
+                - The type of plain string locators. Defaults to 'id'.
+            timeout: float, optional
+                - The maximum time in seconds to wait. Defaults to 10.
+            poll_frequency: float, optional
+                - Seconds between checks. Defaults to 0.25.
+
+        Raises:
+            TimeoutException: If an element is not visible within the timeout.
+
+        Returns:
+            result : WaitResult
+                - ``elements`` in locator order and ``first``, the index of
+                  the locator that was visible first.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            result = selenium_tools.wait_for_all(
+                ["username", "password", ("button[type=submit]", "css_selector")])
+            username, password, submit = result.elements
+        """
+        return self._wait_for_locators(locators, locator_type, timeout, poll_frequency, False)
+
+    def wait_for_any(self, locators: list, locator_type: str = 'id',
+                     timeout: float = 10, poll_frequency: float = 0.25) -> WaitResult:
+        """
+        Waits until the element of any of the locators is present and visible.
+
+        Useful when a page can end in different states, e.g. a result list
+        or an error message. Takes the same arguments as ``wait_for_all()``.
+
+        Raises:
+            TimeoutException: If no element is visible within the timeout.
+
+        Returns:
+            result : WaitResult
+                - ``first`` is the index of the matching locator and
+                  ``elements[first]`` its element.
+
+        Example:
+
+        .. code-block:: python
+
+            selenium_tools = SeleniumTools(driver)
+            result = selenium_tools.wait_for_any(["results", "no-results", "captcha"])
+            if result.first == 2:
+                print("blocked")
+        """
+        return self._wait_for_locators(locators, locator_type, timeout, poll_frequency, True)
+
     def element_visibility(
             self,
-            element: WebElement,
-            hide: bool = True) -> None:
+            element: Union[WebElement, List[WebElement], None] = None,
+            hide: bool = True,
+            locators: Optional[list] = None,
+            locator_type: str = "css_selector") -> int:
         """
-        Toggles the visibility of an element on the page.
+        Toggles the visibility of elements on the page.
+
+        All the elements, given directly or through locators, are toggled
+        with a single script call. Elements hidden by this method get their
+        previous inline display back when shown again.
 
         Args:
-            element: WebElement
-                The WebElement object representing the element to be toggled.
+            element: WebElement or list, optional
+                The element or elements to be toggled.
 
             hide: bool, optional
-                - Determines whether to hide the element.
-                - If True (default), the element will be hidden.
-                - If False,the element will be shown.
+                - Determines whether to hide the elements.
+                - If True (default), the elements will be hidden.
+                - If False,the elements will be shown.
+
+            locators: list, optional
+                - Locators of more elements to toggle, all matches are toggled.
+                - Locator strings of ``locator_type`` or
+                  ``(locator_text, locator_type)`` pairs.
+
+            locator_type: str, optional
+                - The type of plain string locators. Defaults to 'css_selector'.
+
+        Returns:
+            count : int
+                - Number of toggled elements.
 
         Example usage:
 
@@ -878,10 +2135,17 @@ class SeleniumTools:
 
             # Show the element
             selenium_tools.element_visibility(element, hide=False)
+
+            # Hide cookie banners and overlays in one call
+            selenium_tools.element_visibility(locators=["#cookie-banner", ".modal-backdrop"])
         """
-        display_value = 'none' if hide else 'block'
-        self.driver.execute_script(
-            f"arguments[0].style.display = '{display_value}';", element)
+        elements = [] if element is None else \
+            list(element) if isinstance(element, (list, tuple)) else [element]
+        compiled = [list(js_locator(*pair))
+                    for pair in normalize_locators(locators, locator_type)] if locators else []
+        if not elements and not compiled:
+            return 0
+        return self.driver.execute_script(VISIBILITY_SCRIPT, elements, compiled, hide)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,527 @@
+"""
+Download directories and completion detection for browser downloads
+
+A ``DownloadManager`` owns the download directory of a session. The
+browser is pointed at it through its preferences, completed files are
+detected from inotify events on Linux (directory polling elsewhere) and
+handed over as ``Download`` objects that stream the file instead of
+reading it into memory:
+
+.. code-block:: python
+
+    selenium_tools = SeleniumTools(browser="chrome", downloads=True)
+    selenium_tools.get("https://example.com/reports")
+
+    with selenium_tools.downloads.expect(timeout=120) as expectation:
+        selenium_tools.click("export-csv")
+    for row in expectation.download.rows():
+        print(row)
+"""
+
+import contextlib
+import csv
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Iterator, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from .exceptions import SToolException
+from .logger import logger
+
+# files browsers write while a download is in progress
+PARTIAL_SUFFIXES = ('.crdownload', '.part', '.download', '.tmp')
+
+# content types firefox saves without asking
+DOWNLOAD_MIME_TYPES = (
+    'text/csv', 'text/plain', 'application/csv', 'application/json',
+    'application/octet-stream', 'application/pdf', 'application/zip',
+    'application/gzip', 'application/x-gzip', 'application/vnd.ms-excel',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+)
+
+
+def chrome_prefs(directory: str) -> dict:
+    """Returns the chrome preferences saving downloads to ``directory``"""
+    return {
+        'download.default_directory': directory,
+        'download.prompt_for_download': False,
+        'download.directory_upgrade': True,
+        'plugins.always_open_pdf_externally': True,
+        'safebrowsing.enabled': True,
+    }
+
+
+def firefox_prefs(directory: str) -> dict:
+    """Returns the firefox preferences saving downloads to ``directory``"""
+    return {
+        'browser.download.folderList': 2,
+        'browser.download.dir': directory,
+        'browser.download.useDownloadDir': True,
+        'browser.download.manager.showWhenStarting': False,
+        'browser.helperApps.neverAsk.saveToDisk': ','.join(DOWNLOAD_MIME_TYPES),
+        'pdfjs.disabled': True,
+    }
+
+
+def is_partial(name: str) -> bool:
+    """Whether a file name is an unfinished download"""
+    return name.endswith(PARTIAL_SUFFIXES)
+
+
+class Download:
+    """
+    A completed download.
+
+    Args:
+        path: str
+            - Path of the downloaded file.
+        size: int
+            - Size of the file in bytes when it completed.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        self.path = path
+        self.size = size
+
+    @property
+    def name(self) -> str:
+        """File name of the download"""
+        return os.path.basename(self.path)
+
+    def __repr__(self):
+        """Shows the file name and size"""
+        return f"<Download {self.name} {self.size} bytes>"
+
+    def open(self, mode: str = 'rb', encoding: Optional[str] = None, newline: Optional[str] = None):
+        """Opens the file, text modes default to utf-8"""
+        if 'b' not in mode and encoding is None:
+            encoding = 'utf-8'
+        return open(self.path, mode, encoding=encoding, newline=newline)
+
+    def stream(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Yields the content of the file in chunks of ``chunk_size`` bytes"""
+        with self.open() as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def rows(self, encoding: str = 'utf-8', **fmtparams) -> Iterator[list]:
+        """Yields the rows of a CSV export one at a time, see ``csv.reader``"""
+        with self.open('r', encoding=encoding, newline='') as file:
+            yield from csv.reader(file, **fmtparams)
+
+    def hand_off(self, sink, chunk_size: int = 65536):
+        """
+        Passes the file to a sink without loading it into memory.
+
+        Args:
+            sink:
+                - An object with a ``write`` method receives the bytes of
+                  the file in chunks; any other callable is called with the
+                  open binary file and its result returned.
+            chunk_size: int, optional
+                - Size of the chunks written to a file-like sink.
+
+        Example:
+
+        .. code-block:: python
+
+            with open("export.csv", "wb") as file:
+                download.hand_off(file)
+
+            total = download.hand_off(lambda file: sum(1 for _ in file))
+        """
+        with self.open() as file:
+            if hasattr(sink, 'write'):
+                shutil.copyfileobj(file, sink, chunk_size)
+                return None
+            return sink(file)
+
+    def move(self, destination: str) -> 'Download':
+        """
+        Moves the file out of the download directory, so it outlives a
+        temporary directory of the session.
+
+        Returns:
+            Download: The download at its new path.
+        """
+        if os.path.isdir(destination):
+            destination = os.path.join(destination, self.name)
+        self.path = shutil.move(self.path, destination)
+        return self
+
+
+class DirectoryWatcher:
+    """
+    Waits for files of a directory to be written or moved in.
+
+    Uses inotify through ctypes on Linux, other platforms (and kernels
+    without inotify) sleep for the timeout instead and rely on the
+    directory scans of the caller.
+
+    Args:
+        directory: str
+            - The directory to watch.
+        inotify: bool, optional
+            - Use inotify when available. Defaults to True.
+    """
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory: str, inotify: bool = True) -> None:
+        self.directory = directory
+        self._fd = None
+        if inotify:
+            self._fd = self._open_inotify(directory)
+
+    @classmethod
+    def _open_inotify(cls, directory: str) -> Optional[int]:
+        """Returns an inotify descriptor watching the directory, None if unavailable"""
+        name = ctypes.util.find_library('c')
+        if not hasattr(select, 'select') or name is None:
+            return None
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+            flags = os.O_NONBLOCK | os.O_CLOEXEC
+        except (OSError, AttributeError):
+            return None
+
+        fd = init(flags)
+        if fd < 0:
+            logger.debug('inotify unavailable: %s', os.strerror(ctypes.get_errno()))
+            return None
+        if add_watch(fd, os.fsencode(directory), cls.MASK) < 0:
+            logger.debug('can not watch %s: %s', directory, os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return None
+        return fd
+
+    @property
+    def inotify(self) -> bool:
+        """True if changes are reported by inotify rather than polling"""
+        return self._fd is not None
+
+    def wait(self, timeout: float) -> Optional[set]:
+        """
+        Waits up to ``timeout`` seconds for changes.
+
+        Returns:
+            set: Names of the files closed after writing or moved into the
+            directory, or None if the changes are unknown (polling, or the
+            event queue overflowed) and the directory has to be scanned.
+        """
+        if self._fd is None:
+            time.sleep(max(timeout, 0))
+            return None
+
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return set()
+
+        names = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = self._EVENT.unpack_from(data, offset)
+                offset += self._EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+                if mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO):
+                    names.add(name)
+
+    def close(self) -> None:
+        """Closes the inotify descriptor"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class Expectation:
+    """Downloads expected from the actions inside a ``DownloadManager.expect`` block"""
+
+    def __init__(self, manager: 'DownloadManager', count: int, timeout: float,
+                 pattern: Optional[str]) -> None:
+        self.manager = manager
+        self.count = count
+        self.timeout = timeout
+        self.pattern = pattern
+        self.existing = manager._names()
+        self.downloads: List[Download] = []
+
+    @property
+    def download(self) -> Download:
+        """The first download"""
+        return self.downloads[0]
+
+    def wait(self) -> List[Download]:
+        """Waits for the expected downloads and returns them"""
+        self.downloads = self.manager.wait(self.count, self.timeout, self.pattern, self.existing)
+        return self.downloads
+
+
+class DownloadManager:
+    """
+    Tracks the downloads of a browser session in one directory.
+
+    A file counts as finished when the browser renamed it from its partial
+    name (``.crdownload``, ``.part``) or closed it after writing, which
+    inotify reports right away. Without inotify, or when an event was
+    missed, a file is finished once its size stayed the same for
+    ``settle`` seconds and no partial file of the same name is left.
+
+    Every finished file is handed to exactly one waiter, so several threads
+    can wait for downloads of the same directory; without a ``pattern`` they
+    get the files in the order they finished.
+
+    Args:
+        directory: str, optional
+            - The download directory. Defaults to a new temporary directory
+              that is removed with ``close()``.
+        settle: float, optional
+            - Seconds the size of a file must stay the same to count as
+              finished without a completion event. Defaults to 1.
+        poll_interval: float, optional
+            - Seconds between directory scans. Defaults to 0.25.
+        inotify: bool, optional
+            - Use inotify when available. Defaults to True.
+        clock: callable, optional
+            - Monotonic clock. Defaults to time.monotonic.
+    """
+
+    def __init__(self, directory: Optional[str] = None, settle: float = 1.0,
+                 poll_interval: float = 0.25, inotify: bool = True,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.temporary = directory is None
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='s-tool-downloads-')
+        else:
+            os.makedirs(directory, exist_ok=True)
+        self.directory = os.path.abspath(directory)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.watcher = DirectoryWatcher(self.directory, inotify=inotify)
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._watch_lock = threading.Lock()
+        self._closed = set()
+        self._sizes = {}
+        self._claimed = {}
+        self.completed: List[Download] = []
+
+    def __enter__(self):
+        """Returns the manager"""
+        return self
+
+    def __exit__(self, *exc):
+        """Closes the manager"""
+        self.close()
+
+    def _names(self) -> set:
+        """Returns the names of the files in the download directory"""
+        with os.scandir(self.directory) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+
+    def attach(self, driver) -> None:
+        """
+        Points a running chromium session at the download directory.
+
+        Browsers launched by SeleniumDriver already get the directory in
+        their preferences; this also covers drivers created elsewhere and
+        older headless chrome, which ignores the preference.
+        """
+        if not hasattr(driver, 'execute_cdp_cmd'):
+            return
+        try:
+            driver.execute_cdp_cmd('Browser.setDownloadBehavior',
+                                   {'behavior': 'allow', 'downloadPath': self.directory})
+        except WebDriverException as exc:
+            # older chromium only has the page level command
+            logger.debug('Browser.setDownloadBehavior failed: %s', exc)
+            driver.execute_cdp_cmd('Page.setDownloadBehavior',
+                                   {'behavior': 'allow', 'downloadPath': self.directory})
+
+    def pending(self) -> List[tuple]:
+        """Returns ``(name, bytes written)`` of the downloads in progress"""
+        pending = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and is_partial(entry.name):
+                    with contextlib.suppress(FileNotFoundError):
+                        pending.append((entry.name, entry.stat().st_size))
+        return sorted(pending)
+
+    def _scan(self, existing: set, pattern: Optional[str]) -> List[tuple]:
+        """Returns ``(download, identity)`` of the finished, unclaimed files; called with the lock held"""
+        now = self.clock()
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                with contextlib.suppress(FileNotFoundError):
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+        in_progress = set()
+        for name in files:
+            if is_partial(name):
+                in_progress.add(os.path.splitext(name)[0])
+
+        ready = []
+        for name, signature in files.items():
+            # a new download can reuse the name of a claimed file moved away
+            if (name in existing or self._claimed.get(name) == signature[1:] or name.startswith('.')
+                    or is_partial(name) or name in in_progress):
+                continue
+            if pattern is not None and not fnmatch.fnmatch(name, pattern):
+                continue
+            seen = self._sizes.get(name)
+            if seen is None or seen[0] != signature:
+                self._sizes[name] = (signature, now)
+                seen = self._sizes[name]
+            if name in self._closed or now - seen[1] >= self.settle:
+                ready.append((name, signature))
+
+        for name in set(self._sizes) - set(files):
+            del self._sizes[name]
+        self._claimed = {name: identity for name, identity in self._claimed.items() if name in files}
+        self._closed &= set(files)
+        return [(Download(os.path.join(self.directory, name), signature[0]), signature[1:])
+                for name, signature in sorted(ready)]
+
+    def _pump(self, timeout: float) -> None:
+        """Waits for directory changes, one thread reads the events for all waiters"""
+        if self._watch_lock.acquire(blocking=False):
+            try:
+                names = self.watcher.wait(timeout)
+            finally:
+                self._watch_lock.release()
+            with self._changed:
+                if names:
+                    self._closed.update(names)
+                self._changed.notify_all()
+        else:
+            with self._changed:
+                self._changed.wait(timeout)
+
+    def wait(self, count: int = 1, timeout: float = 60, pattern: Optional[str] = None,
+             existing: Optional[set] = None) -> List[Download]:
+        """
+        Waits for downloads to finish.
+
+        Args:
+            count: int, optional
+                - Number of downloads to wait for. Defaults to 1.
+            timeout: float, optional
+                - Seconds to wait. Defaults to 60.
+            pattern: str, optional
+                - Only accept file names matching this glob, e.g. "*.csv".
+            existing: set, optional
+                - File names to ignore, usually the files present before
+                  the download started.
+
+        Returns:
+            list: The ``Download`` objects, in the order they finished.
+
+        Raises:
+            SToolException: If fewer downloads finished within the timeout.
+        """
+        existing = existing or set()
+        deadline = self.clock() + timeout
+        found = []
+        while True:
+            with self._lock:
+                for download, identity in self._scan(existing, pattern)[:count - len(found)]:
+                    self._claimed[download.name] = identity
+                    self._closed.discard(download.name)
+                    self.completed.append(download)
+                    found.append(download)
+            if len(found) >= count:
+                logger.info('downloads finished: %s', ', '.join(download.name for download in found))
+                return found
+
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                with self._lock:
+                    for download in found:
+                        self._claimed.pop(download.name, None)
+                    self.completed = [download for download in self.completed if download not in found]
+                pending = ', '.join(name for name, _ in self.pending()) or 'none'
+                raise SToolException(
+                    f"DOWNLOAD_TIMEOUT: {len(found)} of {count} downloads finished "
+                    f"within {timeout}s, in progress: {pending}")
+            self._pump(min(remaining, self.poll_interval))
+
+    @contextlib.contextmanager
+    def expect(self, count: int = 1, timeout: float = 60, pattern: Optional[str] = None):
+        """
+        Waits for the downloads started by the actions inside the block.
+
+        Files already in the directory when the block starts are ignored.
+        If the block raises, nothing is awaited.
+
+        Example:
+
+        .. code-block:: python
+
+            with manager.expect(pattern="*.csv") as expectation:
+                selenium_tools.click("export")
+            expectation.download.hand_off(sink)
+        """
+        expectation = Expectation(self, count, timeout, pattern)
+        yield expectation
+        expectation.wait()
+
+    def stats(self) -> dict:
+        """Returns the number and total size of the finished downloads"""
+        with self._lock:
+            completed = list(self.completed)
+        return {
+            'completed': len(completed),
+            'bytes': sum(download.size for download in completed),
+            'pending': len(self.pending()),
+            'watcher': 'inotify' if self.watcher.inotify else 'polling',
+        }
+
+    def close(self) -> None:
+        """Stops watching; a temporary directory is removed with its files"""
+        self.watcher.close()
+        if self.temporary:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def make_download_manager(option) -> Optional[DownloadManager]:
+    """Returns the download manager for the ``downloads`` option"""
+    if option is None or option is False:
+        return None
+    if option is True:
+        return DownloadManager()
+    if isinstance(option, (str, os.PathLike)):
+        return DownloadManager(os.fspath(option))
+    return option
@@ -1,13 +1,75 @@
 """
 Create Driver instance
+
+Browser specific selenium services and webdriver_manager installers are
+imported inside the ``get_*_driver`` methods, so only the browser that is
+actually launched pays for its imports.
 """
 
+import threading
+
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.ie.service import Service as IEService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import IEDriverManager
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+
+class PooledRemoteConnection(RemoteConnection):
+    """
+    Remote connection with a tuned urllib3 pool and per-command timeouts.
+
+    With keep-alive enabled all connections to the same grid with the same
+    pool settings share one urllib3 PoolManager, so sessions reuse open
+    TCP/TLS connections instead of setting up a new one per command.
+
+    Args:
+        remote_server_addr: str
+            - The command executor URL of the grid.
+        keep_alive: bool, optional
+            - Reuse HTTP connections between commands. Defaults to True.
+        pool_size: int, optional
+            - Maximum number of connections kept open per grid host.
+              Defaults to 10.
+        command_timeout: float, optional
+            - Timeout in seconds of a single command. Defaults to None
+              (the selenium default).
+    """
+
+    _shared_managers = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, remote_server_addr, keep_alive=True, pool_size=10,
+                 command_timeout=None, ignore_proxy=False):
+        self.pool_size = pool_size
+        self.command_timeout = command_timeout
+        super().__init__(remote_server_addr, keep_alive=keep_alive,
+                         ignore_proxy=ignore_proxy)
+
+    def _new_connection_manager(self):
+        """Returns a urllib3 pool manager with the pool size and timeout"""
+        manager = super()._get_connection_manager()
+        manager.connection_pool_kw['maxsize'] = self.pool_size
+        if self.command_timeout is not None:
+            manager.connection_pool_kw['timeout'] = self.command_timeout
+        return manager
+
+    def _get_connection_manager(self):
+        """Returns the pool manager shared by keep-alive connections to the same grid"""
+        if not self.keep_alive:
+            # without keep-alive the manager is closed after every request
+            return self._new_connection_manager()
+
+        key = (self._url, self.pool_size, self.command_timeout,
+               getattr(self, '_proxy_url', None))
+        with self._shared_lock:
+            manager = self._shared_managers.get(key)
+            if manager is None:
+                manager = self._new_connection_manager()
+                self._shared_managers[key] = manager
+        return manager
+
+    def close(self):
+        """Release the connection, the shared pool stays open for other sessions"""
+        if hasattr(self, '_conn'):
+            del self._conn
 
 
 class SeleniumDriver:
@@ -15,10 +77,17 @@ class SeleniumDriver:
     driver class
     """
 
-    def __init__(self, browser=None, headless=False, executable_path=None):
+    def __init__(self, browser=None, headless=False, executable_path=None,
+                 download_dir=None, **remote_options):
         self.browser = browser.lower()
         self.headless = headless
         self.executable_path = executable_path
+        self.download_dir = download_dir
+        self.command_executor = remote_options.get('command_executor')
+        self.remote_browser = remote_options.get('remote_browser') or 'chrome'
+        self.pool_size = remote_options.get('pool_size') or 10
+        self.keep_alive = remote_options.get('keep_alive', True)
+        self.command_timeout = remote_options.get('command_timeout')
 
     def load_driver(self):
         """
@@ -30,8 +99,15 @@ class SeleniumDriver:
             driver = self.get_firefox_driver()
         elif self.browser == 'ie':
             driver = self.get_ie_driver()
+        elif self.browser == 'remote':
+            driver = self.get_remote_driver()
         else:
-            raise ValueError(f"Invalid browser: {self.browser}")
+            from .backends import get_backend
+
+            factory = get_backend(self.browser)
+            if factory is None:
+                raise ValueError(f"Invalid browser: {self.browser}")
+            driver = factory(self)
 
         return driver
 
@@ -39,9 +115,11 @@ class SeleniumDriver:
         """
         Return chrome driver instance
         """
+        from selenium.webdriver.chrome.service import Service as ChromeService
+
         driver = webdriver.Chrome(service=ChromeService(),
                                   options=self._get_chrome_options(),
-                                  executable_path=self.executable_path or ChromeDriverManager().install())
+                                  executable_path=self.executable_path or self._install('chrome'))
 
         return driver
 
@@ -50,7 +128,7 @@ class SeleniumDriver:
         Return firefox driver instance
         """
         driver = webdriver.Firefox(options=self._get_firefox_options(),
-                                   executable_path=self.executable_path or GeckoDriverManager().install())
+                                   executable_path=self.executable_path or self._install('firefox'))
 
         return driver
 
@@ -58,19 +136,70 @@ class SeleniumDriver:
         """
         Return firefox driver instance
         """
+        from selenium.webdriver.ie.service import Service as IEService
+
         driver = webdriver.Ie(service=IEService(),
                               options=self._get_ie_options(),
-                              executable_path=self.executable_path or IEDriverManager().install())
+                              executable_path=self.executable_path or self._install('ie'))
         return driver
 
+    def get_remote_driver(self):
+        """
+        Return remote driver instance connected to a Selenium Grid
+        """
+        if not self.command_executor:
+            raise ValueError("command_executor is required for the remote browser")
+        if self.download_dir:
+            raise ValueError("download_dir is a local path, the remote browser can not save to it")
+
+        options = {
+            'chrome': self._get_chrome_options,
+            'firefox': self._get_firefox_options,
+            'ie': self._get_ie_options,
+        }.get(self.remote_browser)
+        if options is None:
+            raise ValueError(f"Invalid remote browser: {self.remote_browser}")
+
+        executor = PooledRemoteConnection(self.command_executor,
+                                          keep_alive=self.keep_alive,
+                                          pool_size=self.pool_size,
+                                          command_timeout=self.command_timeout)
+        return webdriver.Remote(command_executor=executor, options=options())
+
+    @staticmethod
+    def _install(browser):
+        """
+        Download the driver binary for the given browser with webdriver_manager
+        and return its path. Only the manager module of that browser is imported.
+        """
+        if browser == 'chrome':
+            from webdriver_manager.chrome import ChromeDriverManager as Manager
+        elif browser == 'firefox':
+            from webdriver_manager.firefox import GeckoDriverManager as Manager
+        elif browser == 'ie':
+            from webdriver_manager.microsoft import IEDriverManager as Manager
+        else:
+            raise ValueError(f"Invalid browser: {browser}")
+
+        return Manager().install()
+
     def _get_chrome_options(self):
         options = webdriver.ChromeOptions()
         options.headless = self.headless
+        if self.download_dir:
+            from .downloads import chrome_prefs
+
+            options.add_experimental_option('prefs', chrome_prefs(self.download_dir))
         return options
 
     def _get_firefox_options(self):
         options = webdriver.FirefoxOptions()
         options.headless = self.headless
+        if self.download_dir:
+            from .downloads import firefox_prefs
+
+            for name, value in firefox_prefs(self.download_dir).items():
+                options.set_preference(name, value)
         return options
 
     def _get_ie_options(self):
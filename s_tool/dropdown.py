@@ -0,0 +1,82 @@
+"""
+Indexed option lookup for large select elements
+"""
+
+from typing import Dict, List
+
+from selenium.common.exceptions import NoSuchElementException
+
+from .parser import fromstring, parse_options
+
+BY_VALUE = 0
+BY_TEXT = 1
+BY_INDEX = 2
+
+
+class OptionIndex:
+    """
+    Lookup tables of the options of one select element.
+
+    Built from a single transfer of the select's outerHTML, after which
+    finding an option by value or visible text is a dict lookup instead of
+    selenium's per call XPath scan over all options.
+
+    Args:
+        options: list
+            - ``(value, text, disabled)`` tuples in option order, see
+              ``parse_options``.
+        multiple: bool, optional
+            - Whether the select allows multiple selections.
+    """
+
+    def __init__(self, options: List[tuple], multiple: bool = False) -> None:
+        self.options = options
+        self.multiple = multiple
+        self.by_value: Dict[str, List[int]] = {}
+        self.by_text: Dict[str, List[int]] = {}
+        for index, (value, text, _) in enumerate(options):
+            self.by_value.setdefault(value, []).append(index)
+            self.by_text.setdefault(text, []).append(index)
+
+    @classmethod
+    def from_html(cls, html_string: str) -> 'OptionIndex':
+        """Builds the index from the outerHTML of a select element"""
+        tree = fromstring(html_string)
+        return cls(parse_options(tree), tree.get('multiple') is not None)
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def lookup(self, value, by: int = BY_VALUE) -> List[int]:
+        """
+        Returns the indices of the options matching a value.
+
+        Like selenium's Select, every matching option is returned for a
+        multi-select and the first one otherwise.
+
+        Raises:
+            NoSuchElementException: If no option matches.
+            NotImplementedError: If a matching option is disabled.
+        """
+        if by == BY_INDEX:
+            indices = [value] if 0 <= value < len(self.options) else []
+        else:
+            table = self.by_value if by == BY_VALUE else self.by_text
+            key = str(value) if by == BY_VALUE else ' '.join(str(value).split())
+            indices = table.get(key, [])
+        if not indices:
+            kind = ('value', 'text', 'index')[by]
+            raise NoSuchElementException(f"Cannot locate option with {kind}: {value}")
+        if not self.multiple:
+            indices = indices[:1]
+        if any(self.options[index][2] for index in indices):
+            raise NotImplementedError("You may not select a disabled option")
+        return indices
+
+    def resolve(self, values: list, by: int = BY_VALUE) -> List[int]:
+        """Returns the indices to select for a list of values, in order and without duplicates"""
+        indices = {}
+        for value in values:
+            for index in self.lookup(value, by):
+                indices.setdefault(index)
+        return list(indices)
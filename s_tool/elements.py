@@ -0,0 +1,153 @@
+"""
+Per-page element cache with transparent refetching of stale elements
+"""
+
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+from selenium.webdriver.remote.webelement import WebElement
+
+
+class CachedElement(WebElement):
+    """
+    WebElement that finds itself again when its reference went stale.
+
+    When the browser reports a stale reference the element is looked up
+    again with its locator and the command is retried once with the new
+    reference. This covers element commands and the atoms selenium runs
+    through ``execute_script`` (attributes, visibility, submit).
+    """
+
+    def __init__(self, element: WebElement, refetch: Callable[[], WebElement]) -> None:
+        super().__init__(element.parent, element.id)
+        self._refetch = refetch
+
+    def _retry(self, func, *args):
+        """Runs a call, once more with a fresh reference if the element went stale"""
+        try:
+            return func(*args)
+        except StaleElementReferenceException as exc:
+            try:
+                fresh = self._refetch()
+            except NoSuchElementException:
+                raise exc from None
+            self._id = fresh.id
+            return func(*args)
+
+    def _execute(self, command, params=None):
+        """Runs an element command with the stale element retry"""
+        return self._retry(super()._execute, command, params)
+
+    def get_attribute(self, name):
+        """Returns an attribute with the stale element retry"""
+        return self._retry(super().get_attribute, name)
+
+    def is_displayed(self) -> bool:
+        """Returns the visibility with the stale element retry"""
+        return self._retry(super().is_displayed)
+
+    def submit(self):
+        """Submits the form with the stale element retry"""
+        return self._retry(super().submit)
+
+
+class ElementCache:
+    """
+    Caches the elements found for a locator on the current page.
+
+    SeleniumTools clears the cache when it navigates. Elements that went
+    stale otherwise (clicked links, scripts replacing the document or
+    parts of it) are refetched with their locator on first use, so a
+    cached element always refers to the current document.
+
+    Only single elements are cached. A list can not tell that scripts
+    appended matching elements or that a click loaded a new document, so
+    ``many=True`` lookups always ask the browser.
+
+    Args:
+        max_entries: int, optional
+            - Number of locators kept, least recently used first out.
+              Defaults to 256.
+
+    Example:
+
+    .. code-block:: python
+
+        selenium_tools = SeleniumTools(driver, element_cache=True)
+        selenium_tools.fill({"q": "s-tool"})
+        selenium_tools.click("q", "name")  # no second lookup
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable):
+        """Returns the cached element for a key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: Hashable, elements, find: Callable):
+        """
+        Caches the result of a lookup and returns it.
+
+        Args:
+            key: hashable
+                - The locator key.
+            elements: WebElement
+                - The lookup result.
+            find: callable
+                - Repeats the lookup, used to refetch stale elements.
+
+        Returns:
+            elements: The result with a selenium element made refetchable.
+        """
+        if not elements:
+            return elements
+
+        if isinstance(elements, WebElement):
+            elements = CachedElement(elements, find)
+
+        self._entries[key] = elements
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return elements
+
+    def discard(self, key: Hashable) -> None:
+        """Drops the cached element of a key, if there is one"""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops all cached elements, called on navigation."""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def make_element_cache(option) -> Optional[ElementCache]:
+    """Returns the element cache for the ``element_cache`` option"""
+    if option is None or option is False:
+        return None
+    if option is True:
+        return ElementCache()
+    return option
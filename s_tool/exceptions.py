@@ -28,3 +28,11 @@ class SToolException(Exception):
             [str]: Exception
         """
         return str(self.message)
+
+
+class CircuitOpenError(SToolException):
+    """Raised when a call is shed because the circuit of its host is open."""
+
+
+class ConcurrentSessionError(SToolException):
+    """Raised when a session is used by two threads at once."""
@@ -0,0 +1,479 @@
+"""
+Lightweight HTTP backend for static pages
+
+``HttpDriver`` implements the part of the selenium WebDriver API used by
+SeleniumTools on top of a pooled urllib3 client and lxml.html, so pages
+that need no JavaScript can be processed without launching a browser:
+
+.. code-block:: python
+
+    with SeleniumTools(browser="http") as selenium_tools:
+        selenium_tools.get("https://www.example.com")
+        links = selenium_tools.get_element("a", "tag_name", many=True)
+
+Forms are filled with ``fill()`` and submitted by clicking a submit
+button, links are followed by clicking them. JavaScript is not executed.
+"""
+
+import base64
+import re
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+from http.cookies import CookieError, SimpleCookie
+from typing import List, Optional
+from urllib.parse import unquote, urlencode, urljoin, urlparse, urlunparse
+
+import urllib3
+from lxml import etree
+from lxml.html import document_fromstring
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+
+from .cookies import domain_matches
+from .exceptions import SToolException
+from .parser import locate, outer_html
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+_CHARSET = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_SUBMIT_TYPES = ('submit', 'image')
+
+
+def _locator_type(by: str) -> str:
+    """Converts a selenium By value ('css selector') to a locator type"""
+    return by.replace(' ', '_')
+
+
+def _inline_style(element) -> dict:
+    """Returns the declarations of the style attribute of an element"""
+    style = {}
+    for declaration in (element.get('style') or '').split(';'):
+        name, _, value = declaration.partition(':')
+        value = value.replace('!important', '').strip().lower()
+        if value:
+            style[name.strip().lower()] = value
+    return style
+
+
+class HttpElement:
+    """
+    An lxml element exposed through the selenium WebElement API.
+
+    Elements become stale when their driver navigates to another page.
+    """
+
+    def __init__(self, driver: 'HttpDriver', element, generation: int) -> None:
+        self._driver = driver
+        self._element = element
+        self._generation = generation
+
+    @property
+    def element(self):
+        """The wrapped lxml element"""
+        if self._generation != self._driver._generation:
+            raise StaleElementReferenceException("page changed since the element was found")
+        return self._element
+
+    @property
+    def id(self) -> str:
+        """Reference of the element, unique within its page"""
+        return f"{self._generation}:{id(self._element)}"
+
+    @property
+    def tag_name(self) -> str:
+        """Tag name of the element"""
+        return self.element.tag
+
+    @property
+    def text(self) -> str:
+        """Text content of the element with collapsed whitespace"""
+        return ' '.join(self.element.text_content().split())
+
+    def __eq__(self, other):
+        """Elements are equal if they wrap the same lxml element"""
+        return isinstance(other, HttpElement) and other._element is self._element
+
+    def __hash__(self):
+        """Hash of the wrapped lxml element"""
+        return hash(self._element)
+
+    def get_dom_attribute(self, name: str) -> Optional[str]:
+        """Returns an attribute as written in the HTML"""
+        return self.element.get(name)
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        """Returns an attribute, or the current value of form fields"""
+        element = self.element
+        if name == 'index' and element.tag == 'option':
+            select = next(element.iterancestors('select'), None)
+            options = list(select.iter('option')) if select is not None else [element]
+            return str(options.index(element))
+        if name == 'value' and element.tag in ('input', 'textarea', 'select'):
+            value = element.value
+            return value if isinstance(value, str) or value is None else list(value)
+        if name == 'value' and element.tag == 'option':
+            return element.get('value', element.text_content())
+        return element.get(name)
+
+    def get_property(self, name: str):
+        """Returns outerHTML, innerHTML, textContent or an attribute"""
+        element = self.element
+        if name == 'outerHTML':
+            return outer_html(element)
+        if name == 'innerHTML':
+            return (element.text or '') + ''.join(
+                etree.tostring(child, encoding='unicode') for child in element)
+        if name == 'textContent':
+            return element.text_content()
+        return self.get_attribute(name)
+
+    def is_displayed(self) -> bool:
+        """
+        Returns False for hidden inputs and for elements hidden by the
+        ``hidden`` attribute or an inline ``display: none`` or
+        ``visibility: hidden`` style, of their own or of an ancestor.
+        Stylesheets are not applied.
+        """
+        element = self.element
+        if element.tag == 'input' and element.get('type') == 'hidden':
+            return False
+        visibility = None
+        for node in (element, *element.iterancestors()):
+            style = _inline_style(node)
+            if node.get('hidden') is not None or style.get('display') == 'none':
+                return False
+            # the nearest visibility wins, a child may show itself again
+            if visibility is None:
+                visibility = style.get('visibility')
+        return visibility not in ('hidden', 'collapse')
+
+    def is_enabled(self) -> bool:
+        """Returns False if the element is disabled"""
+        return self.element.get('disabled') is None
+
+    def is_selected(self) -> bool:
+        """Returns True for selected options and checked inputs"""
+        element = self.element
+        if element.tag == 'option':
+            return element.get('selected') is not None
+        return element.get('checked') is not None
+
+    def clear(self) -> None:
+        """Empties the value of an input or textarea"""
+        element = self.element
+        if element.tag in ('input', 'textarea'):
+            element.value = ''
+
+    def send_keys(self, *values) -> None:
+        """Appends text to the value of an input or textarea"""
+        element = self.element
+        if element.tag not in ('input', 'textarea'):
+            raise SToolException(f"can not type into <{element.tag}> with the http backend")
+        element.value = (element.value or '') + ''.join(str(value) for value in values)
+
+    def click(self) -> None:
+        """Follows links, toggles options and checkboxes and submits forms"""
+        element = self.element
+        input_type = (element.get('type') or '').lower()
+
+        if element.tag == 'a' and element.get('href') is not None:
+            self._driver.get(urljoin(self._driver.current_url, element.get('href')))
+        elif element.tag == 'option':
+            self._select_option(element)
+        elif element.tag == 'input' and input_type == 'checkbox':
+            element.checked = not element.checked
+        elif element.tag == 'input' and input_type == 'radio':
+            element.checked = True
+        elif (element.tag == 'input' and input_type in _SUBMIT_TYPES) or \
+                (element.tag == 'button' and input_type in ('', 'submit')):
+            self._driver.submit_form(element)
+
+    def submit(self) -> None:
+        """Submits the form of the element"""
+        self._driver.submit_form(self.element)
+
+    @staticmethod
+    def _select_option(option) -> None:
+        """Selects an option, toggling it in a multiple select"""
+        select = next(option.iterancestors('select'), None)
+        if select is None:
+            return
+        if select.get('multiple') is not None:
+            if option.get('selected') is None:
+                option.set('selected', 'selected')
+            else:
+                del option.attrib['selected']
+            return
+        for other in select.iter('option'):
+            other.attrib.pop('selected', None)
+        option.set('selected', 'selected')
+
+    def find_element(self, by: str = 'id', value: Optional[str] = None) -> 'HttpElement':
+        """Returns the first descendant matching a locator"""
+        return self._driver._find(self.element, by, value, many=False)
+
+    def find_elements(self, by: str = 'id', value: Optional[str] = None) -> List['HttpElement']:
+        """Returns all descendants matching a locator"""
+        return self._driver._find(self.element, by, value, many=True)
+
+
+class HttpDriver:
+    """
+    WebDriver compatible client for static pages.
+
+    Args:
+        pool_size: int, optional
+            - Connections kept open per host. Defaults to 10.
+        timeout: float, optional
+            - Timeout of a request in seconds. Defaults to 30.
+        headers: dict, optional
+            - Extra headers sent with every request.
+        max_redirects: int, optional
+            - Redirects followed per navigation. Defaults to 10.
+    """
+
+    name = 'http'
+    supports_javascript = False
+
+    def __init__(self, pool_size: int = 10, timeout: float = 30,
+                 headers: Optional[dict] = None, max_redirects: int = 10) -> None:
+        default_headers = {'User-Agent': 's-tool http backend'}
+        default_headers.update(headers or {})
+        self._http = urllib3.PoolManager(maxsize=pool_size, timeout=timeout,
+                                         retries=False, headers=default_headers)
+        self.max_redirects = max_redirects
+        self.session_id = uuid.uuid4().hex
+        self.status_code = None
+        self._cookies: List[dict] = []
+        self._url = 'about:blank'
+        self._source = ''
+        self._tree = None
+        self._generation = 0
+
+    # navigation
+
+    @property
+    def current_url(self) -> str:
+        """URL of the current page"""
+        return self._url
+
+    @property
+    def page_source(self) -> str:
+        """Source of the current page as received"""
+        return self._source
+
+    @property
+    def title(self) -> str:
+        """Title of the current page"""
+        if self._tree is None:
+            return ''
+        return (self._tree.findtext('.//title') or '').strip()
+
+    def get(self, url: str) -> None:
+        """Loads a http(s), file, data or about:blank URL."""
+        scheme = urlparse(url).scheme
+        if url == 'about:blank':
+            self._load(url, '')
+        elif scheme == 'data':
+            self._load(url, self._read_data_url(url))
+        elif scheme == 'file':
+            with open(unquote(urlparse(url).path), encoding='utf-8') as file:
+                self._load(url, file.read())
+        elif scheme in ('http', 'https'):
+            self._request('GET', url)
+        else:
+            raise SToolException(f"unsupported url for the http backend: {url}")
+
+    @staticmethod
+    def _read_data_url(url: str) -> str:
+        """Returns the decoded content of a data URL"""
+        header, _, data = url[len('data:'):].partition(',')
+        if header.endswith(';base64'):
+            return base64.b64decode(data).decode('utf-8', 'replace')
+        return unquote(data)
+
+    def _load(self, url: str, source: str) -> None:
+        """Makes a source the current page, staling found elements"""
+        self._url = url
+        self._source = source
+        self._generation += 1
+        try:
+            self._tree = document_fromstring(source, base_url=url) if source.strip() else None
+        except etree.ParserError:
+            self._tree = None
+
+    def _request(self, method: str, url: str, body: Optional[str] = None,
+                 headers: Optional[dict] = None) -> None:
+        """Sends a request, following redirects and storing cookies"""
+        for _ in range(self.max_redirects + 1):
+            request_headers = dict(headers or {})
+            cookie_header = self._cookie_header(url)
+            if cookie_header:
+                request_headers['Cookie'] = cookie_header
+
+            response = self._http.request(method, url, body=body,
+                                          headers=request_headers, redirect=False)
+            self._store_cookies(url, response.headers.getlist('Set-Cookie'))
+
+            location = response.headers.get('Location')
+            if response.status in _REDIRECTS and location:
+                url = urljoin(url, location)
+                if response.status in (301, 302, 303):
+                    method, body, headers = 'GET', None, None
+                continue
+
+            self.status_code = response.status
+            match = _CHARSET.search(response.headers.get('Content-Type', ''))
+            encoding = match.group(1) if match else 'utf-8'
+            try:
+                source = response.data.decode(encoding, 'replace')
+            except LookupError:
+                source = response.data.decode('utf-8', 'replace')
+            self._load(url, source)
+            return
+
+        raise SToolException(f"too many redirects: {url}")
+
+    def submit_form(self, element) -> None:
+        """Submits the form of an element, including the clicked submitter."""
+        form = element if element.tag == 'form' else next(element.iterancestors('form'), None)
+        if form is None:
+            raise SToolException("element is not inside a form")
+
+        values = list(form.form_values())
+        if element is not form and element.get('name'):
+            values.append((element.get('name'), element.get('value', '')))
+
+        action = urljoin(self._url, form.get('action') or self._url)
+        if (form.get('method') or 'get').lower() == 'post':
+            self._request('POST', action, body=urlencode(values),
+                          headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        else:
+            parts = urlparse(action)
+            self._request('GET', urlunparse(parts._replace(query=urlencode(values), fragment='')))
+
+    # elements
+
+    def _find(self, scope, by: str, value: str, many: bool):
+        """Locates elements below a scope of the current page"""
+        if scope is None:
+            elements = []
+        else:
+            try:
+                elements = locate(scope, value, _locator_type(by))
+            except ValueError as exc:
+                raise SToolException("INVALID_SELECTOR") from exc
+        elements = [HttpElement(self, element, self._generation)
+                    for element in elements if isinstance(element.tag, str)]
+        if many:
+            return elements
+        if not elements:
+            raise NoSuchElementException(f"{by}={value}")
+        return elements[0]
+
+    def find_element(self, by: str = 'id', value: Optional[str] = None) -> HttpElement:
+        """Returns the first element of the page matching a locator"""
+        return self._find(self._tree, by, value, many=False)
+
+    def find_elements(self, by: str = 'id', value: Optional[str] = None) -> List[HttpElement]:
+        """Returns all elements of the page matching a locator"""
+        return self._find(self._tree, by, value, many=True)
+
+    def execute_script(self, script, *args):
+        """Raises SToolException, JavaScript is not run"""
+        raise SToolException("JAVASCRIPT_NOT_SUPPORTED: the http backend does not run JavaScript")
+
+    execute_async_script = execute_script
+
+    # cookies
+
+    def _store_cookies(self, url: str, headers: List[str]) -> None:
+        """Stores the cookies of Set-Cookie headers"""
+        host = urlparse(url).hostname or ''
+        for header in headers:
+            try:
+                parsed = SimpleCookie(header)
+            except CookieError:
+                continue
+            for name, morsel in parsed.items():
+                cookie = {
+                    'name': name,
+                    'value': morsel.value,
+                    # without a Domain attribute the cookie is host-only
+                    'domain': '.' + morsel['domain'].lstrip('.') if morsel['domain'] else host,
+                    'path': morsel['path'] or '/',
+                    'secure': bool(morsel['secure']),
+                    'httpOnly': bool(morsel['httponly']),
+                }
+                if morsel['samesite']:
+                    cookie['sameSite'] = morsel['samesite']
+                if morsel['max-age']:
+                    cookie['expiry'] = int(time.time()) + int(morsel['max-age'])
+                elif morsel['expires']:
+                    cookie['expiry'] = int(parsedate_to_datetime(morsel['expires']).timestamp())
+                self.add_cookie(cookie)
+
+    def _matching_cookies(self, url: str) -> List[dict]:
+        """Returns the unexpired cookies sent to a URL"""
+        parts = urlparse(url)
+        host = parts.hostname or ''
+        path = parts.path or '/'
+        now = time.time()
+        self._cookies = [cookie for cookie in self._cookies
+                         if cookie.get('expiry') is None or cookie['expiry'] > now]
+        return [cookie for cookie in self._cookies
+                if domain_matches(cookie['domain'], host, host_only=not cookie['domain'].startswith('.'))
+                and path.startswith(cookie.get('path') or '/')
+                and (parts.scheme == 'https' or not cookie.get('secure'))]
+
+    def _cookie_header(self, url: str) -> str:
+        """Returns the Cookie header for a URL"""
+        return '; '.join(f"{cookie['name']}={cookie['value']}"
+                         for cookie in self._matching_cookies(url))
+
+    def get_cookies(self) -> List[dict]:
+        """Returns the cookies visible to the current page"""
+        return [dict(cookie) for cookie in self._matching_cookies(self._url)]
+
+    def get_cookie(self, name: str) -> Optional[dict]:
+        """Returns a cookie of the current page by name"""
+        return next((cookie for cookie in self.get_cookies() if cookie['name'] == name), None)
+
+    def add_cookie(self, cookie_dict: dict) -> None:
+        """Adds a cookie, host-only for the current host without a domain"""
+        cookie = dict(cookie_dict)
+        cookie.setdefault('domain', urlparse(self._url).hostname or '')
+        cookie.setdefault('path', '/')
+        self._cookies = [existing for existing in self._cookies
+                         if (existing['name'], existing['domain'], existing['path']) !=
+                         (cookie['name'], cookie['domain'], cookie['path'])]
+        if cookie.get('expiry') is None or cookie['expiry'] > time.time():
+            self._cookies.append(cookie)
+
+    def delete_cookie(self, name: str) -> None:
+        """Deletes the cookies of the current page with a name"""
+        visible = {id(cookie) for cookie in self._matching_cookies(self._url)}
+        self._cookies = [cookie for cookie in self._cookies
+                         if not (cookie['name'] == name and id(cookie) in visible)]
+
+    def delete_all_cookies(self) -> None:
+        """Deletes every cookie"""
+        self._cookies = []
+
+    # session
+
+    def close(self) -> None:
+        """Closes the pooled connections"""
+        self._http.clear()
+
+    def quit(self) -> None:
+        """Ends the session"""
+        self.close()
+
+
+def create_http_driver(config) -> HttpDriver:
+    """Backend factory used for ``SeleniumTools(browser='http')``"""
+    return HttpDriver(pool_size=getattr(config, 'pool_size', None) or 10,
+                      timeout=getattr(config, 'command_timeout', None) or 30)
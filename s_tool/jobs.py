@@ -0,0 +1,641 @@
+"""
+Job queues, result sinks and the job runner used by ``s-tool worker``
+
+A job is a JSON object naming a ``url`` and what to extract from it:
+
+.. code-block:: python
+
+    {"url": "https://www.example.com", "schema": {"title": "h1"}}
+    {"url": "https://www.example.com", "schema": {"title": "h1"}, "root": "#main"}
+    {"url": "https://www.example.com", "text": true}
+    {"url": "https://www.example.com",
+     "parse": {"ele_tag": "dropdown", "locator_text": "lang", "locator_type": "name"}}
+
+``root`` is a css selector of the element the ``schema`` is extracted
+from, without it the whole page is used. ``parse`` runs a parser of
+``SeleniumTools.parse()``, a list of them runs several; extra keys are
+passed to the parser as keyword arguments.
+
+Queues hand out jobs with a visibility timeout: a reserved job that is not
+acknowledged in time becomes visible again, so jobs of crashed workers are
+picked up by others. Every reservation carries a receipt, acknowledging
+with an outdated receipt has no effect.
+
+``SQLiteQueue`` and ``FileQueue`` work on a local disk or a shared volume,
+``RedisQueue`` needs the optional redis package.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from .exceptions import SToolException
+
+
+class Reservation:
+    """A reserved job and the receipt needed to acknowledge it"""
+
+    __slots__ = ('job_id', 'job', 'attempts', 'receipt')
+
+    def __init__(self, job_id: str, job: dict, attempts: int, receipt: str) -> None:
+        self.job_id = job_id
+        self.job = job
+        self.attempts = attempts
+        self.receipt = receipt
+
+    def __repr__(self):
+        """Shows the job id and attempt of the reservation"""
+        return f"Reservation(job_id={self.job_id!r}, attempts={self.attempts})"
+
+
+def _new_job(job: dict, clock: Callable[[], float]) -> tuple:
+    """Returns the id and a copy of a job with its defaults set"""
+    if 'url' not in job:
+        raise ValueError("A job needs a url.")
+    job = dict(job)
+    job.setdefault('id', uuid.uuid4().hex)
+    job.setdefault('enqueued_at', clock())
+    return job['id'], job
+
+
+class SQLiteQueue:
+    """
+    Job queue in a SQLite database, safe across threads and processes.
+
+    Args:
+        path: str
+            - The database file.
+        name: str, optional
+            - Queue name, several queues can share a database.
+            - Defaults to "jobs".
+    """
+
+    def __init__(self, path: str, name: str = 'jobs',
+                 clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.name = name
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS stool_jobs (
+                id TEXT PRIMARY KEY,
+                queue TEXT NOT NULL,
+                body TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                visible_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                receipt TEXT,
+                failed INTEGER NOT NULL DEFAULT 0,
+                error TEXT)""")
+        self._db.execute("""
+            CREATE INDEX IF NOT EXISTS stool_jobs_visible
+            ON stool_jobs (queue, failed, visible_at)""")
+
+    def put(self, job: dict, delay: float = 0) -> str:
+        """Adds a job and returns its id."""
+        job_id, job = _new_job(job, self.clock)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO stool_jobs (id, queue, body, enqueued_at, visible_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (job_id, self.name, json.dumps(job), job['enqueued_at'], self.clock() + delay))
+        return job_id
+
+    def reserve(self, visibility_timeout: float = 60) -> Optional[Reservation]:
+        """Reserves the oldest visible job, None if there is none."""
+        now = self.clock()
+        receipt = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._db.execute(
+                    'SELECT id, body, attempts FROM stool_jobs '
+                    'WHERE queue = ? AND failed = 0 AND visible_at <= ? '
+                    'ORDER BY visible_at LIMIT 1', (self.name, now)).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        'UPDATE stool_jobs SET visible_at = ?, attempts = attempts + 1, receipt = ? '
+                        'WHERE id = ?', (now + visibility_timeout, receipt, row[0]))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+        if row is None:
+            return None
+        return Reservation(row[0], json.loads(row[1]), row[2] + 1, receipt)
+
+    def _update(self, sql: str, *args) -> bool:
+        """Runs a statement, returns True if it changed a row"""
+        with self._lock:
+            cursor = self._db.execute(sql, args)
+        return cursor.rowcount > 0
+
+    def ack(self, reservation: Reservation) -> bool:
+        """Removes a finished job."""
+        return self._update('DELETE FROM stool_jobs WHERE id = ? AND receipt = ?',
+                            reservation.job_id, reservation.receipt)
+
+    def nack(self, reservation: Reservation, delay: float = 0) -> bool:
+        """Makes a reserved job visible again after ``delay`` seconds."""
+        return self._update(
+            'UPDATE stool_jobs SET visible_at = ?, receipt = NULL WHERE id = ? AND receipt = ?',
+            self.clock() + delay, reservation.job_id, reservation.receipt)
+
+    def fail(self, reservation: Reservation, error: str = '') -> bool:
+        """Moves a job that failed too often out of the queue."""
+        return self._update(
+            'UPDATE stool_jobs SET failed = 1, error = ?, receipt = NULL WHERE id = ? AND receipt = ?',
+            error, reservation.job_id, reservation.receipt)
+
+    def stats(self) -> dict:
+        """Returns the queue size and the lag of the oldest visible job"""
+        now = self.clock()
+        with self._lock:
+            visible, oldest = self._db.execute(
+                'SELECT COUNT(*), MIN(visible_at) FROM stool_jobs '
+                'WHERE queue = ? AND failed = 0 AND visible_at <= ?', (self.name, now)).fetchone()
+            total, failed = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(failed), 0) FROM stool_jobs WHERE queue = ?',
+                (self.name,)).fetchone()
+        return {
+            'visible': visible,
+            'in_flight': total - failed - visible,
+            'failed': failed,
+            'lag': now - oldest if oldest is not None else 0.0,
+        }
+
+    def close(self) -> None:
+        """Closes the database connection"""
+        with self._lock:
+            self._db.close()
+
+
+class FileQueue:
+    """
+    Job queue in a directory, one JSON file per job.
+
+    Jobs move between the ``ready``, ``reserved`` and ``failed``
+    subdirectories with atomic renames, which makes the queue safe for
+    several worker processes on the same file system. File names start
+    with the time the job becomes visible (or its reservation expires).
+
+    Args:
+        directory: str
+            - The queue directory, created if needed.
+    """
+
+    def __init__(self, directory: str, clock: Callable[[], float] = time.time) -> None:
+        self.directory = directory
+        self.clock = clock
+        for state in ('ready', 'reserved', 'failed'):
+            os.makedirs(os.path.join(directory, state), exist_ok=True)
+
+    def _path(self, state: str, name: str = '') -> str:
+        """Returns the path of a file in a state directory"""
+        return os.path.join(self.directory, state, name)
+
+    @staticmethod
+    def _stamp(when: float) -> str:
+        """Formats a time so file names sort by it"""
+        return f"{int(when * 1e6):020d}"
+
+    def _write(self, path: str, record: dict) -> None:
+        """Writes a record atomically through a temporary file"""
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(record, file)
+        os.replace(tmp_path, path)
+
+    def put(self, job: dict, delay: float = 0) -> str:
+        """Adds a job and returns its id."""
+        job_id, job = _new_job(job, self.clock)
+        # the id becomes part of a file name, it must not leave the directory
+        if str(job_id) in ('', '.', '..') or any(sep in str(job_id) for sep in ('/', '\\', '\0')):
+            raise ValueError(f"Invalid job id for a file queue: {job_id!r}")
+        name = f"{self._stamp(self.clock() + delay)}-{job_id}.json"
+        self._write(self._path('ready', name), {'job': job, 'attempts': 0})
+        return job_id
+
+    def _requeue_expired(self, now: float) -> None:
+        """Moves reservations past their visibility timeout back to ready"""
+        for name in os.listdir(self._path('reserved')):
+            if not name.endswith('.json') or name[:20] > self._stamp(now):
+                continue
+            job_id = name[21:-5].rsplit('-', 1)[0]
+            try:
+                os.rename(self._path('reserved', name),
+                          self._path('ready', f"{self._stamp(now)}-{job_id}.json"))
+            except FileNotFoundError:
+                pass  # acknowledged or requeued meanwhile
+
+    def reserve(self, visibility_timeout: float = 60) -> Optional[Reservation]:
+        """Reserves the oldest visible job, None if there is none."""
+        now = self.clock()
+        self._requeue_expired(now)
+
+        for name in sorted(os.listdir(self._path('ready'))):
+            if not name.endswith('.json') or name[:20] > self._stamp(now):
+                continue
+            job_id = name[21:-5]
+            receipt = uuid.uuid4().hex
+            reserved = self._path(
+                'reserved', f"{self._stamp(now + visibility_timeout)}-{job_id}-{receipt}.json")
+            try:
+                os.rename(self._path('ready', name), reserved)
+            except FileNotFoundError:
+                continue  # taken by another worker
+
+            with open(reserved, encoding='utf-8') as file:
+                record = json.load(file)
+            record['attempts'] += 1
+            self._write(reserved, record)
+            return Reservation(job_id, record['job'], record['attempts'],
+                               os.path.basename(reserved))
+        return None
+
+    def _move(self, reservation: Reservation, state: Optional[str], name: str = '',
+              **changes) -> bool:
+        """Moves a reserved job to a state, or removes it if state is None"""
+        reserved = self._path('reserved', reservation.receipt)
+        try:
+            if state is None:
+                os.unlink(reserved)
+                return True
+            with open(reserved, encoding='utf-8') as file:
+                record = json.load(file)
+            record.update(changes)
+            self._write(reserved, record)
+            os.rename(reserved, self._path(state, name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def ack(self, reservation: Reservation) -> bool:
+        """Removes a finished job."""
+        return self._move(reservation, None)
+
+    def nack(self, reservation: Reservation, delay: float = 0) -> bool:
+        """Makes a reserved job visible again after ``delay`` seconds."""
+        name = f"{self._stamp(self.clock() + delay)}-{reservation.job_id}.json"
+        return self._move(reservation, 'ready', name)
+
+    def fail(self, reservation: Reservation, error: str = '') -> bool:
+        """Moves a job that failed too often out of the queue."""
+        return self._move(reservation, 'failed', f"{reservation.job_id}.json", error=error)
+
+    def stats(self) -> dict:
+        """Returns the queue size and the lag of the oldest visible job"""
+        now = self.clock()
+        ready = sorted(name for name in os.listdir(self._path('ready')) if name.endswith('.json'))
+        visible = [name for name in ready if name[:20] <= self._stamp(now)]
+        in_flight = [name for name in os.listdir(self._path('reserved')) if name.endswith('.json')]
+        failed = [name for name in os.listdir(self._path('failed')) if name.endswith('.json')]
+        return {
+            'visible': len(visible),
+            'in_flight': len(in_flight) + len(ready) - len(visible),
+            'failed': len(failed),
+            'lag': now - int(visible[0][:20]) / 1e6 if visible else 0.0,
+        }
+
+    def close(self) -> None:
+        """Nothing to close, files are opened per operation"""
+        pass
+
+
+class MemoryQueue:
+    """
+    In-process job queue, used to run a batch of jobs without a broker.
+
+    Jobs are ordered in a heap by the time they become visible; entries
+    left behind by reservations are skipped when they reach the top.
+    """
+
+    def __init__(self, jobs=(), clock: Callable[[], float] = time.time) -> None:
+        self.clock = clock
+        self.failed = {}
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        for job in jobs:
+            self.put(job)
+
+    def _schedule(self, job_id: str, visible_at: float) -> None:
+        """Makes a job visible at a time"""
+        self._jobs[job_id]['visible_at'] = visible_at
+        heapq.heappush(self._heap, (visible_at, next(self._sequence), job_id))
+
+    def put(self, job: dict, delay: float = 0) -> str:
+        """Adds a job and returns its id."""
+        job_id, job = _new_job(job, self.clock)
+        with self._lock:
+            self._jobs[job_id] = {'job': job, 'attempts': 0, 'receipt': None}
+            self._schedule(job_id, self.clock() + delay)
+        return job_id
+
+    def _top(self, now: float) -> Optional[str]:
+        """Returns the id of the oldest visible job, dropping outdated entries"""
+        while self._heap:
+            visible_at, _, job_id = self._heap[0]
+            entry = self._jobs.get(job_id)
+            if entry is None or entry['visible_at'] != visible_at:
+                heapq.heappop(self._heap)
+                continue
+            return job_id if visible_at <= now else None
+        return None
+
+    def reserve(self, visibility_timeout: float = 60) -> Optional[Reservation]:
+        """Reserves the oldest visible job, None if there is none."""
+        now = self.clock()
+        with self._lock:
+            job_id = self._top(now)
+            if job_id is None:
+                return None
+            entry = self._jobs[job_id]
+            entry['attempts'] += 1
+            entry['receipt'] = uuid.uuid4().hex
+            self._schedule(job_id, now + visibility_timeout)
+            return Reservation(job_id, entry['job'], entry['attempts'], entry['receipt'])
+
+    def _finish(self, reservation: Reservation, delay: Optional[float] = None) -> bool:
+        """Removes a reserved job, or reschedules it after ``delay``"""
+        with self._lock:
+            entry = self._jobs.get(reservation.job_id)
+            if entry is None or entry['receipt'] != reservation.receipt:
+                return False
+            entry['receipt'] = None
+            if delay is None:
+                del self._jobs[reservation.job_id]
+            else:
+                self._schedule(reservation.job_id, self.clock() + delay)
+            return True
+
+    def ack(self, reservation: Reservation) -> bool:
+        """Removes a finished job."""
+        return self._finish(reservation)
+
+    def nack(self, reservation: Reservation, delay: float = 0) -> bool:
+        """Makes a reserved job visible again after ``delay`` seconds."""
+        return self._finish(reservation, delay)
+
+    def fail(self, reservation: Reservation, error: str = '') -> bool:
+        """Moves a job that failed too often out of the queue."""
+        if not self._finish(reservation):
+            return False
+        with self._lock:
+            self.failed[reservation.job_id] = error
+        return True
+
+    def stats(self) -> dict:
+        """Returns the queue size and the lag of the oldest visible job"""
+        now = self.clock()
+        with self._lock:
+            visible = [entry['visible_at'] for entry in self._jobs.values()
+                       if entry['visible_at'] <= now]
+            return {
+                'visible': len(visible),
+                'in_flight': len(self._jobs) - len(visible),
+                'failed': len(self.failed),
+                'lag': now - min(visible) if visible else 0.0,
+            }
+
+    def close(self) -> None:
+        """Nothing to close"""
+        pass
+
+
+_REDIS_RESERVE = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #ids == 0 then return false end
+local id = ids[1]
+redis.call('ZADD', KEYS[1], ARGV[2], id)
+redis.call('HSET', KEYS[4], id, ARGV[3])
+local attempts = redis.call('HINCRBY', KEYS[3], id, 1)
+return {id, redis.call('HGET', KEYS[2], id), attempts}
+"""
+
+_REDIS_FINISH = """
+if redis.call('HGET', KEYS[4], ARGV[1]) ~= ARGV[2] then return 0 end
+redis.call('HDEL', KEYS[4], ARGV[1])
+if ARGV[3] == 'nack' then
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+    return 1
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+local body = redis.call('HGET', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if ARGV[3] == 'fail' then
+    redis.call('HSET', KEYS[5], ARGV[1], cjson.encode({job = cjson.decode(body), error = ARGV[4]}))
+end
+return 1
+"""
+
+
+class RedisQueue:
+    """
+    Job queue in Redis (or a Redis compatible server).
+
+    Visible and reserved jobs live in one sorted set scored by the time
+    they become visible, reservations and acknowledgements are atomic Lua
+    scripts.
+
+    Args:
+        url: str
+            - Redis URL, for example ``redis://localhost:6379/0``.
+        name: str, optional
+            - Key prefix of the queue. Defaults to "s-tool:jobs".
+
+    Raises:
+        SToolException: If the redis package is not installed.
+    """
+
+    def __init__(self, url: str, name: str = 's-tool:jobs',
+                 clock: Callable[[], float] = time.time) -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise SToolException(
+                "redis is required for Redis job queues: pip install redis") from exc
+
+        self.clock = clock
+        self._client = redis.Redis.from_url(url)
+        self._keys = [f"{name}:{key}" for key in
+                      ('schedule', 'bodies', 'attempts', 'receipts', 'failed')]
+        self._reserve = self._client.register_script(_REDIS_RESERVE)
+        self._finish = self._client.register_script(_REDIS_FINISH)
+
+    def put(self, job: dict, delay: float = 0) -> str:
+        """Adds a job and returns its id."""
+        job_id, job = _new_job(job, self.clock)
+        schedule, bodies = self._keys[:2]
+        pipeline = self._client.pipeline()
+        pipeline.hset(bodies, job_id, json.dumps(job))
+        pipeline.zadd(schedule, {job_id: self.clock() + delay})
+        pipeline.execute()
+        return job_id
+
+    def reserve(self, visibility_timeout: float = 60) -> Optional[Reservation]:
+        """Reserves the oldest visible job, None if there is none."""
+        now = self.clock()
+        receipt = uuid.uuid4().hex
+        result = self._reserve(keys=self._keys[:4],
+                               args=[now, now + visibility_timeout, receipt])
+        if not result:
+            return None
+        job_id, body, attempts = result
+        return Reservation(job_id.decode(), json.loads(body), int(attempts), receipt)
+
+    def _complete(self, reservation: Reservation, action: str, value='') -> bool:
+        """Acks, nacks or fails a reservation in one atomic script"""
+        return bool(self._finish(keys=self._keys,
+                                 args=[reservation.job_id, reservation.receipt, action, value]))
+
+    def ack(self, reservation: Reservation) -> bool:
+        """Removes a finished job."""
+        return self._complete(reservation, 'ack')
+
+    def nack(self, reservation: Reservation, delay: float = 0) -> bool:
+        """Makes a reserved job visible again after ``delay`` seconds."""
+        return self._complete(reservation, 'nack', self.clock() + delay)
+
+    def fail(self, reservation: Reservation, error: str = '') -> bool:
+        """Moves a job that failed too often out of the queue."""
+        return self._complete(reservation, 'fail', error)
+
+    def stats(self) -> dict:
+        """Returns the queue size and the lag of the oldest visible job"""
+        now = self.clock()
+        schedule, _, _, receipts, failed = self._keys
+        pipeline = self._client.pipeline()
+        pipeline.zcount(schedule, '-inf', now)
+        pipeline.zrangebyscore(schedule, '-inf', now, start=0, num=1, withscores=True)
+        pipeline.zcard(schedule)
+        pipeline.hlen(failed)
+        visible, oldest, total, failed_count = pipeline.execute()
+        return {
+            'visible': visible,
+            'in_flight': total - visible,
+            'failed': failed_count,
+            'lag': now - oldest[0][1] if oldest else 0.0,
+        }
+
+    def close(self) -> None:
+        """Closes the redis connection"""
+        self._client.close()
+
+
+def open_queue(spec: str, name: Optional[str] = None):
+    """
+    Opens a queue from a URL like string.
+
+    Args:
+        spec: str
+            - ``sqlite:///path/to/jobs.db``, ``file:///path/to/dir`` (or a
+              plain directory path) or ``redis://host:port/db``.
+        name: str, optional
+            - Queue name for SQLite and Redis queues.
+
+    Raises:
+        ValueError: If the queue type is unknown.
+    """
+    scheme = urlparse(spec).scheme
+    options = {'name': name} if name else {}
+    if scheme == 'sqlite':
+        return SQLiteQueue(spec[len('sqlite://'):], **options)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisQueue(spec, **options)
+    if scheme == 'file':
+        return FileQueue(urlparse(spec).path)
+    if scheme == '':
+        return FileQueue(spec)
+    raise ValueError(f"Invalid queue: {spec}")
+
+
+class JsonlSink:
+    """
+    Appends results to a JSON lines file, one line per job.
+
+    Args:
+        path: str
+            - The output file, ``-`` for standard output.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def __call__(self, result: dict) -> None:
+        """Appends a result as a JSON line"""
+        line = json.dumps(result, default=str) + '\n'
+        with self._lock:
+            if self.path == '-':
+                print(line, end='', flush=True)
+                return
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """Closes the result file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _run_parser(selenium_tools, spec: dict):
+    """Runs a ``parse`` spec of a job"""
+    options = {key: value for key, value in spec.items()
+               if key not in ('ele_tag', 'locator_text', 'locator_type')}
+    return selenium_tools.parse(spec['ele_tag'], spec['locator_text'],
+                                spec.get('locator_type', 'id'), **options)
+
+
+def run_job(selenium_tools, job: dict) -> dict:
+    """
+    Runs a job with a SeleniumTools session.
+
+    Returns:
+        result: dict
+            - The job id and url, the final url, the extracted values and
+              the time taken in seconds.
+    """
+    from selenium.common.exceptions import NoSuchElementException
+
+    start = time.perf_counter()
+    selenium_tools.get(job['url'])
+    result = {'id': job.get('id'), 'url': job['url'], 'final_url': selenium_tools.url()}
+
+    if 'schema' in job:
+        root = None
+        if job.get('root'):
+            # a css selector, like the selectors of the schema
+            try:
+                root = selenium_tools.get_element(job['root'], 'css_selector')
+            except NoSuchElementException as exc:
+                raise SToolException(f"ROOT_NOT_FOUND: no element matches {job['root']!r}") from exc
+        result['data'] = selenium_tools.extract_schema(job['schema'], root=root)
+    if 'parse' in job:
+        parse = job['parse']
+        if isinstance(parse, list):
+            result['parsed'] = [_run_parser(selenium_tools, spec) for spec in parse]
+        else:
+            result['parsed'] = _run_parser(selenium_tools, parse)
+    if job.get('text'):
+        result['text'] = selenium_tools.text()
+
+    result['elapsed'] = round(time.perf_counter() - start, 6)
+    return result
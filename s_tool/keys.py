@@ -0,0 +1,143 @@
+"""
+Keyboard input sequences sent as one W3C actions request
+"""
+
+from typing import List, Union
+
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.keys import Keys
+
+# aliases accepted in addition to the names of selenium's Keys class
+_ALIASES = {
+    'CTRL': 'CONTROL',
+    'CMD': 'COMMAND',
+    'OPTION': 'ALT',
+    'ESC': 'ESCAPE',
+    'DEL': 'DELETE',
+    'INS': 'INSERT',
+    'PGUP': 'PAGE_UP',
+    'PGDN': 'PAGE_DOWN',
+}
+
+# key name -> WebDriver key code, built once
+KEY_TABLE = {name: value for name, value in vars(Keys).items()
+             if not name.startswith('_') and isinstance(value, str)}
+KEY_TABLE.update({alias: KEY_TABLE[name] for alias, name in _ALIASES.items()})
+
+
+def resolve_key(key: str) -> str:
+    """
+    Returns the WebDriver key code of a key.
+
+    Args:
+        key: str
+            - A single character (including a ``Keys`` value) or a key
+              name like "CONTROL", "ctrl", "enter" or "f5".
+
+    Raises:
+        ValueError: If the key is not valid.
+    """
+    if isinstance(key, str):
+        if len(key) == 1:
+            return key
+        code = KEY_TABLE.get(key.upper())
+        if code is not None:
+            return code
+    raise ValueError(
+        f"Invalid key: {key}. Keys must be single characters or names of the Keys class.")
+
+
+def parse_combo(combo: Union[str, List[str]]) -> List[str]:
+    """
+    Resolves a key combination given as a list or a "ctrl+shift+a" string.
+
+    Raises:
+        ValueError: If a key is not valid or the combination is empty.
+    """
+    if isinstance(combo, str):
+        keys = [combo] if len(combo) == 1 else combo.split('+')
+    else:
+        keys = list(combo)
+    if not keys:
+        raise ValueError("A key combination needs at least one key.")
+    return [resolve_key(key) for key in keys]
+
+
+class InputSequence:
+    """
+    A precompiled sequence of key combinations, text and pauses.
+
+    Keys are resolved while the sequence is built. ``perform`` sends the
+    whole sequence to the browser in a single W3C actions request, and a
+    sequence can be performed any number of times.
+
+    Example:
+
+    .. code-block:: python
+
+        sequence = (InputSequence()
+                    .combo("ctrl+a")
+                    .text("s-tool")
+                    .pause(0.2)
+                    .key("enter"))
+        selenium_tools.send_input(sequence)
+    """
+
+    def __init__(self) -> None:
+        self.steps = []
+
+    def combo(self, *keys) -> 'InputSequence':
+        """Presses the keys in order and releases them in reverse order."""
+        codes = parse_combo(keys[0] if len(keys) == 1 else list(keys))
+        self.steps.append(('combo', codes))
+        return self
+
+    def key(self, key: str) -> 'InputSequence':
+        """Presses and releases a single key."""
+        self.steps.append(('combo', [resolve_key(key)]))
+        return self
+
+    def text(self, text: str) -> 'InputSequence':
+        """Types a text."""
+        if not isinstance(text, str):
+            raise ValueError("text must be a string")
+        self.steps.append(('text', text))
+        return self
+
+    def pause(self, seconds: float) -> 'InputSequence':
+        """Waits before the next step."""
+        if seconds < 0:
+            raise ValueError("seconds must not be negative")
+        self.steps.append(('pause', seconds))
+        return self
+
+    def actions(self, driver, element=None) -> ActionChains:
+        """Builds the ActionChains of the sequence without performing it."""
+        action_chains = ActionChains(driver)
+        if element is not None:
+            action_chains.click(element)
+
+        for kind, value in self.steps:
+            if kind == 'combo':
+                for code in value:
+                    action_chains.key_down(code)
+                for code in reversed(value):
+                    action_chains.key_up(code)
+            elif kind == 'text':
+                action_chains.send_keys(value)
+            else:
+                action_chains.pause(value)
+        return action_chains
+
+    def perform(self, driver, element=None) -> None:
+        """
+        Sends the sequence in one request.
+
+        Args:
+            driver: webdriver
+                - The selenium webdriver.
+            element: WebElement, optional
+                - Click this element first to focus it.
+        """
+        if self.steps or element is not None:
+            self.actions(driver, element).perform()
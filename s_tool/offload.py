@@ -0,0 +1,94 @@
+"""
+Process pool offload for CPU heavy parsers
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Type
+
+from .parser import LxmlParser
+
+
+def _run_parser(parser_class, ele_tag, html_string, kwargs):
+    """Runs a parser method inside a worker process"""
+    for cls in (parser_class, LxmlParser):
+        if cls is None:
+            continue
+        method = getattr(cls(), ele_tag, None)
+        if method is not None and callable(method):
+            return method(html_string, **kwargs)
+    raise NotImplementedError(f"{ele_tag} parser not implemented")
+
+
+class ParseOffloader:
+    """
+    Runs parser methods in a process pool so lxml work does not block the
+    thread that drives the browser.
+
+    At most ``max_in_flight`` parse jobs are pending at any time; ``submit``
+    blocks once the limit is reached, which keeps memory bounded when the
+    browser produces pages faster than they can be parsed.
+
+    Args:
+        max_workers: int, optional
+            - Number of worker processes. Defaults to the number of CPUs.
+        max_in_flight: int, optional
+            - Maximum number of submitted but unfinished jobs.
+              Defaults to twice the number of workers.
+        parser_class: class, optional
+            - Custom parser class, looked up before LxmlParser. It must be
+              importable from the worker processes (defined at module level).
+
+    Example:
+
+    .. code-block:: python
+
+        with ParseOffloader(max_workers=4, parser_class=MyCustomParser) as offloader:
+            future = offloader.submit("table", html_string)
+            rows = future.result()
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None,
+                 parser_class: Optional[Type] = None,
+                 mp_context=None) -> None:
+        max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                             mp_context=mp_context)
+        if max_in_flight is None:
+            max_in_flight = 2 * max_workers
+        self.max_in_flight = max_in_flight
+        self.parser_class = parser_class
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def submit(self, ele_tag: str, html_string: str, **kwargs) -> Future:
+        """
+        Schedules ``parser.<ele_tag>(html_string, **kwargs)`` on the pool.
+
+        Returns:
+            future: concurrent.futures.Future
+                - Resolves to the parsed result.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(
+                _run_parser, self.parser_class, ele_tag, html_string, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the worker processes."""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        """Returns the offloader"""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        """Stops the worker processes"""
+        self.shutdown()
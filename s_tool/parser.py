@@ -1,7 +1,107 @@
 """
 Parser utilities using lxml
 """
-from lxml.html import fromstring
+from lxml.html import HTMLParser, fromstring, tostring
+
+# relative to the searched element, like selenium's element.find_element
+_XPATH_LOCATORS = {
+    'id': './/*[@id=$value]',
+    'name': './/*[@name=$value]',
+    'class_name': ".//*[contains(concat(' ', normalize-space(@class), ' '), concat(' ', $value, ' '))]",
+    'link_text': './/a[normalize-space(.)=$value]',
+    'partial_link_text': './/a[contains(., $value)]',
+}
+
+
+def locate(tree, locator_text, locator_type='id'):
+    """
+    Find elements of a parsed lxml tree with a selenium style locator.
+
+    Args:
+        tree: lxml.html.HtmlElement
+            - The parsed document or element to search, only its
+              descendants can match (xpath locators are used as given).
+        locator_text: str
+            - The attribute value of the element.
+        locator_type: str, optional
+            - id, name, class_name, tag_name, link_text, partial_link_text,
+              xpath or css_selector. Defaults to id.
+
+    Returns:
+        elements: list
+            - The matching lxml elements in document order.
+
+    Raises:
+        ValueError: If the locator type is invalid.
+    """
+    locator_type = locator_type.lower()
+    if locator_type in _XPATH_LOCATORS:
+        return tree.xpath(_XPATH_LOCATORS[locator_type], value=locator_text)
+    if locator_type == 'tag_name':
+        return list(tree.iterdescendants(locator_text))
+    if locator_type == 'xpath':
+        return tree.xpath(locator_text)
+    if locator_type == 'css_selector':
+        return tree.cssselect(locator_text)
+    raise ValueError(f"Invalid locator type: {locator_type}")
+
+
+def feed_parse(chunks, parser=None):
+    """
+    Parse an HTML document arriving in chunks with an lxml feed parser.
+
+    Each chunk is parsed as soon as it arrives, the whole document is
+    never held as a single string.
+
+    Args:
+        chunks: iterable
+            - The consecutive str or bytes parts of the document.
+        parser: lxml.html.HTMLParser, optional
+            - The parser to feed. Defaults to a new HTMLParser.
+
+    Returns:
+        root: lxml.html.HtmlElement
+            - The root element of the document, None for an empty document.
+    """
+    parser = parser or HTMLParser()
+    fed = False
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            fed = True
+    if not fed:
+        return None
+    return parser.close()
+
+
+def outer_html(element):
+    """Return the outerHTML of an lxml element, like the browser property"""
+    return tostring(element, encoding='unicode', with_tail=False)
+
+
+def parse_options(html_string):
+    """
+    Parse all the options of a select element, in the order of its
+    ``options`` collection (options inside optgroups included).
+
+    Args:
+        html_string: str or lxml.html.HtmlElement
+            - The HTML of the select element, or the parsed element.
+
+    Returns:
+        options: list
+            - ``(value, text, disabled)`` tuples; the text is whitespace
+              normalized like selenium's visible text and the value falls
+              back to the text like the browser does.
+    """
+    tree = fromstring(html_string) if isinstance(html_string, str) else html_string
+    options = []
+    for option in tree.iter('option'):
+        text = ' '.join(option.text_content().split())
+        disabled = option.get('disabled') is not None or any(
+            group.get('disabled') is not None for group in option.iterancestors('optgroup'))
+        options.append((option.get('value', text), text, disabled))
+    return options
 
 
 class LxmlParser:
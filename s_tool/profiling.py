@@ -0,0 +1,294 @@
+"""
+Profiling spans around SeleniumTools and parser calls
+
+A ``Profiler`` wraps the public methods of a SeleniumTools instance and of
+its parser in named spans. Every span measures wall time, CPU time of the
+calling thread and the time spent waiting for WebDriver commands, so the
+local Python work (parsing, locator building, result conversion) can be
+told apart from time spent in the browser:
+
+.. code-block:: python
+
+    profiler = Profiler(cprofile=True)
+    selenium_tools = SeleniumTools(browser="chrome", profiler=profiler)
+    run_crawl(selenium_tools)
+
+    print(profiler.report())
+    profiler.write_collapsed("crawl.folded")  # flamegraph.pl crawl.folded > crawl.svg
+    profiler.print_profile("SeleniumTools.parse")
+"""
+
+import contextlib
+import cProfile
+import functools
+import inspect
+import pstats
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+
+# private methods doing local work worth a span of their own
+PROFILED_PRIVATE = (
+    '_fill_element', '_outer_html', '_pruned_html', '_cached_outer_html',
+    '_select_indexed', '_wait_for_locators',
+)
+
+
+class _Frame:
+    """An open span with its start times and the time of its children"""
+    __slots__ = ('name', 'path', 'start', 'cpu_start', 'webdriver', 'children')
+
+    def __init__(self, name: str, path: str, start: float, cpu_start: float) -> None:
+        self.name = name
+        self.path = path
+        self.start = start
+        self.cpu_start = cpu_start
+        self.webdriver = 0.0
+        self.children = 0.0
+
+
+class ProfilingExecutor:
+    """Command executor proxy that adds the command time to the open spans"""
+
+    def __init__(self, executor, profiler: 'Profiler') -> None:
+        self.executor = executor
+        self.profiler = profiler
+
+    def execute(self, command: str, params: dict = None):
+        """Runs a command and adds its time to the open spans"""
+        start = self.profiler.clock()
+        try:
+            return self.executor.execute(command, params)
+        finally:
+            self.profiler.record_command(command, self.profiler.clock() - start)
+
+    def __getattr__(self, name):
+        """Passes other attributes through to the wrapped executor"""
+        return getattr(self.executor, name)
+
+
+class Profiler:
+    """
+    Aggregates named spans by name and by call stack.
+
+    Args:
+        cprofile: bool, optional
+            - Also run cProfile for every outermost span, with one profile
+              per span name. Defaults to False.
+        clock: callable, optional
+            - Wall clock. Defaults to time.perf_counter.
+        cpu_clock: callable, optional
+            - CPU clock of the current thread. Defaults to time.thread_time.
+    """
+
+    def __init__(self, cprofile: bool = False,
+                 clock: Callable[[], float] = time.perf_counter,
+                 cpu_clock: Callable[[], float] = time.thread_time) -> None:
+        self.cprofile = cprofile
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self.spans = defaultdict(lambda: {'calls': 0, 'wall': 0.0, 'self': 0.0,
+                                          'cpu': 0.0, 'webdriver': 0.0})
+        self.stacks = defaultdict(float)
+        self.profiles = {}
+
+    def _stack(self) -> list:
+        """Returns the open spans of the calling thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        """Measures a block of code as a span called ``name``."""
+        stack = self._stack()
+        path = f"{stack[-1].path};{name}" if stack else name
+        profile = None
+        if self.cprofile and not stack and self._profile_lock.acquire(blocking=False):
+            with self._lock:
+                profile = self.profiles.setdefault(name, cProfile.Profile())
+            profile.enable()
+
+        frame = _Frame(name, path, self.clock(), self.cpu_clock())
+        stack.append(frame)
+        try:
+            yield frame
+        finally:
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+                self._profile_lock.release()
+            self._finish(frame, stack[-1] if stack else None)
+
+    def _finish(self, frame: _Frame, parent: Optional[_Frame]) -> None:
+        """Adds a closed span to the totals and to its parent"""
+        wall = self.clock() - frame.start
+        cpu = self.cpu_clock() - frame.cpu_start
+        exclusive = wall - frame.children
+        if parent is not None:
+            parent.children += wall
+            parent.webdriver += frame.webdriver
+
+        with self._lock:
+            entry = self.spans[frame.name]
+            entry['calls'] += 1
+            entry['wall'] += wall
+            entry['self'] += exclusive
+            entry['cpu'] += cpu
+            entry['webdriver'] += frame.webdriver
+            self.stacks[frame.path] += max(exclusive, 0.0)
+
+    def record_command(self, command: str, seconds: float) -> None:
+        """Adds the time of a WebDriver command to the innermost open span."""
+        stack = self._stack()
+        if not stack:
+            with self._lock:
+                self.stacks[f"webdriver:{command}"] += seconds
+            return
+        frame = stack[-1]
+        frame.webdriver += seconds
+        frame.children += seconds
+        with self._lock:
+            self.stacks[f"{frame.path};webdriver:{command}"] += seconds
+
+    def attach(self, driver):
+        """
+        Measures the WebDriver commands of a driver.
+
+        Drivers without a command executor (the http backend) are left
+        unchanged, their time counts as local time.
+
+        Returns:
+            driver: The same driver.
+        """
+        executor = getattr(driver, 'command_executor', None)
+        if executor is not None and not isinstance(executor, ProfilingExecutor):
+            driver.command_executor = ProfilingExecutor(executor, self)
+        return driver
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Returns ``func`` running in a span; generators are measured per item."""
+        profiler = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            """Runs the wrapped function in a span"""
+            with profiler.span(name):
+                result = func(*args, **kwargs)
+            if inspect.isgenerator(result):
+                return profiler._iterate(name, result)
+            return result
+
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def _iterate(self, name: str, iterator):
+        """Yields the items of a generator, each produced in a span"""
+        while True:
+            with self.span(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _wrap_methods(self, obj, prefix: str, names) -> None:
+        """Replaces the named methods of an object with wrapped ones"""
+        for name in names:
+            method = getattr(obj, name, None)
+            if not callable(method) or getattr(method, '__profiled__', False):
+                continue
+            setattr(obj, name, self.wrap(f"{prefix}.{name}", method))
+
+    def instrument(self, selenium_tools) -> None:
+        """Wraps the public methods of a SeleniumTools instance and of its parser."""
+        cls = type(selenium_tools)
+        names = [name for name, _ in inspect.getmembers(cls, inspect.isfunction)
+                 if not name.startswith('_') or name in PROFILED_PRIVATE]
+        self._wrap_methods(selenium_tools, cls.__name__, names)
+
+        parser = selenium_tools.parser
+        names = [name for name in dir(parser) if not name.startswith('_')]
+        self._wrap_methods(parser, type(parser).__name__, names)
+
+    def stats(self) -> dict:
+        """
+        Returns the totals of every span name in seconds.
+
+        ``local`` is the wall time not spent waiting for WebDriver and
+        ``self`` the wall time not spent in nested spans or commands.
+        """
+        with self._lock:
+            return {name: dict(entry, local=entry['wall'] - entry['webdriver'])
+                    for name, entry in self.spans.items()}
+
+    def report(self, sort: str = 'wall', limit: Optional[int] = None) -> str:
+        """
+        Formats the span totals as a table.
+
+        Args:
+            sort: str, optional
+                - calls, wall, self, cpu, webdriver or local. Defaults to wall.
+            limit: int, optional
+                - Number of rows. Defaults to all.
+        """
+        rows = sorted(self.stats().items(), key=lambda item: item[1][sort], reverse=True)[:limit]
+        width = max([len(name) for name, _ in rows] + [4])
+        lines = [f"{'span':<{width}} {'calls':>7} {'wall':>10} {'self':>10} "
+                 f"{'cpu':>10} {'webdriver':>10} {'local':>10}"]
+        for name, entry in rows:
+            lines.append(f"{name:<{width}} {entry['calls']:>7} {entry['wall']:>10.4f} "
+                         f"{entry['self']:>10.4f} {entry['cpu']:>10.4f} "
+                         f"{entry['webdriver']:>10.4f} {entry['local']:>10.4f}")
+        return '\n'.join(lines)
+
+    def collapsed(self) -> str:
+        """
+        Returns the call stacks in the collapsed format of flamegraph.pl
+        and speedscope, weighted in microseconds. WebDriver commands appear
+        as ``webdriver:<command>`` frames.
+        """
+        with self._lock:
+            stacks = sorted(self.stacks.items())
+        return ''.join(f"{path} {round(seconds * 1e6)}\n"
+                       for path, seconds in stacks if round(seconds * 1e6) > 0)
+
+    def write_collapsed(self, path: str) -> None:
+        """Writes ``collapsed()`` to a file."""
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.collapsed())
+
+    def print_profile(self, name: str, sort: str = 'cumulative', limit: int = 30,
+                      stream=None) -> None:
+        """
+        Prints the cProfile statistics collected for a span name.
+
+        Raises:
+            KeyError: If no profile was collected for the span.
+        """
+        pstats.Stats(self.profiles[name], stream=stream).sort_stats(sort).print_stats(limit)
+
+    def dump_profile(self, name: str, path: str) -> None:
+        """Writes the cProfile statistics of a span for ``pstats`` or snakeviz."""
+        self.profiles[name].dump_stats(path)
+
+    def reset(self) -> None:
+        """Drops all the collected data."""
+        with self._lock:
+            self.spans.clear()
+            self.stacks.clear()
+            self.profiles = {}
+
+
+def make_profiler(option) -> Optional[Profiler]:
+    """Returns the profiler for the ``profiler`` option"""
+    if option is None or option is False:
+        return None
+    if option is True:
+        return Profiler()
+    return option
@@ -0,0 +1,133 @@
+"""
+Pruning of page HTML before it is transferred and parsed
+"""
+
+from typing import Iterable, Optional
+
+from lxml import etree
+from lxml.html import fromstring, tostring
+
+DEFAULT_TAGS = ('script', 'style', 'svg', 'noscript', 'template')
+
+# names ending with "*" are prefixes
+DEFAULT_ATTRIBUTES = ('style', 'srcset', 'on*')
+
+
+class Pruner:
+    """
+    Strips nodes and attributes that are not needed for parsing.
+
+    With JavaScript the page is pruned in the browser: a clone of the page
+    or element is pruned and serialized there, so the removed markup is
+    never sent over the WebDriver connection nor parsed by lxml. Drivers
+    without JavaScript prune the source with lxml. The live page is never
+    changed.
+
+    Args:
+        tags: iterable, optional
+            - Tags removed with their content.
+            - Defaults to script, style, svg, noscript and template.
+        attributes: iterable, optional
+            - Attributes removed, names ending with "*" are prefixes.
+            - Defaults to style, srcset and the on* event handlers.
+        data_uris: bool, optional
+            - Replace ``data:`` attribute values (inline images, fonts)
+              longer than ``data_uri_length`` with "data:". Defaults to True.
+        data_uri_length: int, optional
+            - Defaults to 64.
+        comments: bool, optional
+            - Remove comments. Defaults to True.
+
+    Example:
+
+    .. code-block:: python
+
+        selenium_tools = SeleniumTools(driver, prune=Pruner(tags=("script", "style")))
+        selenium_tools.get("https://example.com")
+        html = selenium_tools.text()
+        print(selenium_tools.pruner.stats()["bytes_saved"])
+    """
+
+    def __init__(self, tags: Iterable[str] = DEFAULT_TAGS,
+                 attributes: Iterable[str] = DEFAULT_ATTRIBUTES,
+                 data_uris: bool = True, data_uri_length: int = 64,
+                 comments: bool = True) -> None:
+        self.tags = tuple(tag.lower() for tag in tags)
+        attributes = [name.lower() for name in attributes]
+        self.attributes = tuple(name for name in attributes if not name.endswith('*'))
+        self.prefixes = tuple(name[:-1] for name in attributes if name.endswith('*'))
+        self.data_uris = data_uris
+        self.data_uri_length = data_uri_length
+        self.comments = comments
+        self.pages = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def config(self) -> dict:
+        """Returns the settings passed to the pruning script"""
+        return {
+            'tags': list(self.tags),
+            'attributes': list(self.attributes),
+            'prefixes': list(self.prefixes),
+            'dataUris': self.data_uris,
+            'dataUriLength': self.data_uri_length,
+            'comments': self.comments,
+        }
+
+    def record(self, bytes_before: int, bytes_after: int) -> None:
+        """Adds the sizes of a pruned page or element to the stats."""
+        self.pages += 1
+        self.bytes_before += bytes_before
+        self.bytes_after += bytes_after
+
+    def stats(self) -> dict:
+        """Returns the number of pruned documents and the bytes saved"""
+        saved = self.bytes_before - self.bytes_after
+        return {
+            'pages': self.pages,
+            'bytes_before': self.bytes_before,
+            'bytes_after': self.bytes_after,
+            'bytes_saved': saved,
+            'saved_ratio': saved / self.bytes_before if self.bytes_before else 0.0,
+        }
+
+    def prune_tree(self, tree) -> None:
+        """Prunes a parsed lxml tree in place, the root itself is kept."""
+        removed = list(tree.iterdescendants(*self.tags)) if self.tags else []
+        if self.comments:
+            removed.extend(tree.iterdescendants(etree.Comment))
+        for element in removed:
+            element.drop_tree()
+
+        for element in tree.iter(etree.Element):
+            for name, value in list(element.attrib.items()):
+                lowered = name.lower()
+                if lowered in self.attributes or lowered.startswith(self.prefixes):
+                    del element.attrib[name]
+                elif self.data_uris and len(value) > self.data_uri_length and value.startswith('data:'):
+                    element.attrib[name] = 'data:'
+
+    def prune_html(self, html: str) -> str:
+        """
+        Prunes an HTML document or fragment with lxml and records the sizes.
+
+        Returns:
+            html: str
+                - The pruned HTML.
+        """
+        tree = fromstring(html)
+        self.prune_tree(tree)
+        docinfo = tree.getroottree().docinfo
+        doctype = docinfo.doctype + '\n' if docinfo.doctype and tree.tag == 'html' else ''
+        pruned = doctype + tostring(tree, encoding='unicode', with_tail=False)
+        self.record(len(html.encode('utf-8')), len(pruned.encode('utf-8')))
+        return pruned
+
+
+def make_pruner(option) -> Optional[Pruner]:
+    """Returns the pruner for the ``prune`` option"""
+    if option is None or option is False:
+        return None
+    if option is True:
+        return Pruner()
+    return option
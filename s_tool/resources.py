@@ -0,0 +1,205 @@
+"""
+Resource budgets for long running browser sessions
+
+A ``ResourceBudget`` samples the memory and CPU usage of the driver process
+and all its children (the browser and its renderers) and tells
+SeleniumTools when the session has to be recycled. Sampling processes needs
+the optional psutil package; page count limits work without it.
+"""
+
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .exceptions import SToolException
+
+
+def driver_pid(driver) -> Optional[int]:
+    """Returns the pid of the local driver service process, if any"""
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return getattr(process, 'pid', None)
+
+
+class ProcessTreeSampler:
+    """
+    Samples the resident memory and CPU usage of a process and its children.
+
+    psutil.Process objects are kept between samples, so the CPU usage of
+    each process is measured over the time since the previous sample.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import psutil
+        except ImportError as exc:
+            raise SToolException(
+                "psutil is required to monitor browser memory and CPU: pip install psutil") from exc
+        self._psutil = psutil
+        self._processes = {}
+
+    def __call__(self, driver) -> Optional[dict]:
+        pid = driver_pid(driver)
+        if pid is None:
+            return None
+
+        psutil = self._psutil
+        try:
+            root = self._processes.get(pid) or psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+
+        processes = {}
+        rss = 0
+        cpu = 0.0
+        for process in tree:
+            process = self._processes.get(process.pid, process)
+            try:
+                rss += process.memory_info().rss
+                cpu += process.cpu_percent(None)
+            except psutil.Error:
+                continue
+            processes[process.pid] = process
+        self._processes = processes
+
+        return {'rss': rss, 'cpu_percent': cpu, 'processes': len(processes)}
+
+
+class HostLoadSampler:
+    """
+    Samples the CPU and memory usage of the whole host, in percent.
+
+    The CPU usage is measured over the time since the previous sample.
+    """
+
+    def __init__(self) -> None:
+        try:
+            import psutil
+        except ImportError as exc:
+            raise SToolException(
+                "psutil is required to monitor the host CPU and memory: pip install psutil") from exc
+        self._psutil = psutil
+        psutil.cpu_percent(None)
+
+    def __call__(self) -> dict:
+        return {
+            'cpu_percent': self._psutil.cpu_percent(None),
+            'memory_percent': self._psutil.virtual_memory().percent,
+        }
+
+
+class ResourceBudget:
+    """
+    Limits for a browser session and the metrics collected to enforce them.
+
+    Args:
+        max_rss_mb: float, optional
+            - Recycle once the process tree uses more memory (in MiB).
+        max_cpu_percent: float, optional
+            - Recycle once the process tree uses more CPU, summed over all
+              processes and measured since the previous sample.
+        max_pages: int, optional
+            - Recycle after this many navigations.
+        sample_every: int, optional
+            - Sample the processes every n navigations. Defaults to 10.
+        history: int, optional
+            - Number of samples kept for ``metrics()``. Defaults to 100.
+        sampler: callable, optional
+            - Called with the driver, returns a dict with ``rss``,
+              ``cpu_percent`` and ``processes`` or None. Defaults to a
+              psutil based ``ProcessTreeSampler``.
+
+    Example:
+
+    .. code-block:: python
+
+        budget = ResourceBudget(max_rss_mb=1500, max_pages=500)
+        with SeleniumTools(browser="chrome", budget=budget) as selenium_tools:
+            for url in urls:
+                selenium_tools.get(url)
+        print(budget.metrics())
+    """
+
+    def __init__(self,
+                 max_rss_mb: Optional[float] = None,
+                 max_cpu_percent: Optional[float] = None,
+                 max_pages: Optional[int] = None,
+                 sample_every: int = 10,
+                 history: int = 100,
+                 sampler: Optional[Callable] = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+
+        self.max_rss_mb = max_rss_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.max_pages = max_pages
+        self.sample_every = sample_every
+        self.samples = deque(maxlen=history)
+        self.pages = 0
+        self.recycles = 0
+        self.peak_rss = 0
+        self._clock = clock
+
+        if sampler is None and (max_rss_mb is not None or max_cpu_percent is not None):
+            sampler = ProcessTreeSampler()
+        self._sampler = sampler
+
+    def start(self, driver) -> None:
+        """Resets the page count for a new session and takes a first sample."""
+        self.pages = 0
+        self.sample(driver)
+
+    def record_page(self) -> None:
+        """Counts a navigation."""
+        self.pages += 1
+
+    def sample(self, driver) -> Optional[dict]:
+        """Samples the session processes and stores the sample."""
+        if self._sampler is None:
+            return None
+
+        sample = self._sampler(driver)
+        if sample is None:
+            return None
+
+        sample = dict(sample, timestamp=self._clock(), pages=self.pages)
+        self.peak_rss = max(self.peak_rss, sample['rss'])
+        self.samples.append(sample)
+        return sample
+
+    def exceeded(self, driver) -> Optional[str]:
+        """
+        Checks the limits, sampling the processes every ``sample_every``
+        navigations.
+
+        Returns:
+            reason: str or None
+                - Why the session has to be recycled, None if it can go on.
+        """
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            return f"page limit reached ({self.pages} pages)"
+
+        if self.pages == 0 or self.pages % self.sample_every:
+            return None
+
+        sample = self.sample(driver)
+        if sample is None:
+            return None
+
+        rss_mb = sample['rss'] / (1024 * 1024)
+        if self.max_rss_mb is not None and rss_mb > self.max_rss_mb:
+            return f"memory limit exceeded ({rss_mb:.0f} MiB)"
+        if self.max_cpu_percent is not None and sample['cpu_percent'] > self.max_cpu_percent:
+            return f"cpu limit exceeded ({sample['cpu_percent']:.0f}%)"
+        return None
+
+    def metrics(self) -> dict:
+        """Returns the collected samples and counters"""
+        return {
+            'pages': self.pages,
+            'recycles': self.recycles,
+            'peak_rss': self.peak_rss,
+            'last_sample': self.samples[-1] if self.samples else None,
+            'samples': list(self.samples),
+        }
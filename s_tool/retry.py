@@ -0,0 +1,242 @@
+"""
+Retry and circuit breaker policies for SeleniumTools actions
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    SessionNotCreatedException,
+    StaleElementReferenceException,
+)
+from urllib3.exceptions import HTTPError
+
+from .exceptions import CircuitOpenError
+from .logger import logger
+
+# Lost connections to the driver or grid, and dead sessions. Page level
+# errors (TimeoutException, NoSuchElementException, InvalidSelectorException)
+# are left out on purpose: a missing element is neither worth another 10s
+# wait nor a sign that the host is failing.
+TRANSPORT_ERRORS = (ConnectionError, HTTPError)
+SESSION_ERRORS = (InvalidSessionIdException, SessionNotCreatedException)
+
+DEFAULT_RETRYABLE = (StaleElementReferenceException,) + TRANSPORT_ERRORS + SESSION_ERRORS
+DEFAULT_FAILURES = TRANSPORT_ERRORS + SESSION_ERRORS
+
+
+class RetryPolicy:
+    """
+    Retry a callable with exponential backoff and full jitter.
+
+    Args:
+        max_attempts: int, optional
+            - Total number of attempts, including the first one. Defaults to 3.
+        base_delay: float, optional
+            - Delay in seconds before the first retry. Defaults to 0.5.
+        max_delay: float, optional
+            - Upper bound for a single delay in seconds. Defaults to 10.
+        multiplier: float, optional
+            - Growth factor of the delay between attempts. Defaults to 2.
+        jitter: bool, optional
+            - Pick each delay uniformly from ``[0, delay]`` so that many
+              sessions retrying the same site do not synchronise.
+              Defaults to True.
+        deadline: float, optional
+            - Overall time budget in seconds. No retry is started if it
+              would end after the deadline. Defaults to None (no deadline).
+        retry_on: tuple, optional
+            - Exception classes that trigger a retry, every other exception
+              is raised immediately. Defaults to stale elements, transport
+              and session errors (``DEFAULT_RETRYABLE``).
+
+    Example:
+
+    .. code-block:: python
+
+        policy = RetryPolicy(max_attempts=5, base_delay=0.2, deadline=15)
+        selenium_tools = SeleniumTools(driver, retry_policy=policy)
+    """
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 10.0,
+                 multiplier: float = 2.0,
+                 jitter: bool = True,
+                 deadline: Optional[float] = None,
+                 retry_on: Tuple[Type[BaseException], ...] = DEFAULT_RETRYABLE,
+                 sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = tuple(retry_on)
+        self._sleep = sleep
+        self._clock = clock
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the delay in seconds to wait after the given failed attempt.
+        """
+        delay = min(self.max_delay,
+                    self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Calls ``func`` until it succeeds, a non retryable exception is raised,
+        the attempts are exhausted or the deadline would be exceeded.
+
+        Returns:
+            The return value of ``func``.
+
+        Raises:
+            The last exception raised by ``func``.
+        """
+        start = self._clock()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return func(*args, **kwargs)
+            except self.retry_on as exc:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.backoff(attempt)
+                if self.deadline is not None and \
+                        self._clock() - start + delay > self.deadline:
+                    raise
+                logger.info("retrying %s in %.2fs after %s (attempt %s/%s)",
+                            getattr(func, '__name__', func), delay,
+                            type(exc).__name__, attempt, self.max_attempts)
+                self._sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit of a host
+    opens and calls for that host fail fast with ``CircuitOpenError``.
+    Only exceptions listed in ``failure_on`` count as failures, by default
+    transport and session errors (``DEFAULT_FAILURES``).
+    Once ``recovery_timeout`` seconds have passed the circuit becomes half
+    open and lets ``half_open_max_calls`` trial calls through; a success
+    closes it again, a failure re-opens it.
+
+    Example:
+
+    .. code-block:: python
+
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        selenium_tools = SeleniumTools(driver, circuit_breaker=breaker)
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 failure_on: Tuple[Type[BaseException], ...] = DEFAULT_FAILURES,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_on = tuple(failure_on)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, dict] = {}
+
+    def _host_state(self, host: str) -> dict:
+        """Returns the failure count and open time of a host, creating it"""
+        return self._hosts.setdefault(
+            host, {'failures': 0, 'opened_at': None, 'trial_calls': 0})
+
+    def state(self, host: str) -> str:
+        """
+        Returns the circuit state of a host: closed, open or half_open.
+        """
+        with self._lock:
+            return self._state(self._host_state(host))
+
+    def _state(self, entry: dict) -> str:
+        """Returns the state of a host entry, the lock must be held"""
+        if entry['opened_at'] is None:
+            return self.CLOSED
+        if self._clock() - entry['opened_at'] >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self, host: str) -> None:
+        """
+        Checks whether a call to ``host`` may proceed.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host is open.
+        """
+        with self._lock:
+            entry = self._host_state(host)
+            state = self._state(entry)
+            if state == self.OPEN:
+                raise CircuitOpenError(f"circuit open for host: {host}")
+            if state == self.HALF_OPEN:
+                if entry['trial_calls'] >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"circuit open for host: {host}")
+                entry['trial_calls'] += 1
+
+    def record_success(self, host: str) -> None:
+        """Closes the circuit of the host and resets its failure count."""
+        with self._lock:
+            entry = self._host_state(host)
+            entry.update(failures=0, opened_at=None, trial_calls=0)
+
+    def record_failure(self, host: str) -> None:
+        """Counts a failure and opens the circuit once the threshold is hit."""
+        with self._lock:
+            entry = self._host_state(host)
+            entry['failures'] += 1
+            if entry['opened_at'] is not None or \
+                    entry['failures'] >= self.failure_threshold:
+                entry['opened_at'] = self._clock()
+                entry['trial_calls'] = 0
+                logger.info("circuit opened for host:%s", host)
+
+    def _release_trial(self, host: str) -> None:
+        """Frees the trial call slot of a half open circuit"""
+        with self._lock:
+            entry = self._host_state(host)
+            entry['trial_calls'] = max(0, entry['trial_calls'] - 1)
+
+    def call(self, host: str, func: Callable, *args, **kwargs):
+        """
+        Calls ``func`` through the circuit of ``host``.
+
+        Raises:
+            CircuitOpenError: If the circuit of the host is open.
+        """
+        self.before_call(host)
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_on:
+            self.record_failure(host)
+            raise
+        except Exception:
+            self._release_trial(host)
+            raise
+        self.record_success(host)
+        return result
@@ -0,0 +1,168 @@
+"""
+Declarative extraction schemas compiled into a single in-page script
+
+A schema describes the records to extract with CSS selectors:
+
+.. code-block:: python
+
+    schema = {
+        "selector": ".result",
+        "fields": {
+            "title": "h3",
+            "href": {"selector": "a", "prop": "href"},
+            "price": {"selector": ".price", "type": "float"},
+            "tags": {"selector": ".tag", "many": True},
+            "seller": {"selector": ".seller", "fields": {
+                "name": ".name",
+                "rating": {"selector": ".rating", "attr": "data-value", "type": "int"},
+            }},
+        },
+    }
+
+Every field is either a selector string (the trimmed text of the first
+match) or a dict with the keys:
+
+* ``selector``: CSS selector relative to the parent, the parent itself if omitted.
+* ``many``: return a list with a value for every match.
+* ``attr``: read an attribute instead of the text.
+* ``prop``: read a DOM property instead of the text, e.g. ``href`` for absolute URLs.
+* ``value``: ``text`` (default), ``html`` or ``outer_html``.
+* ``type``: ``str`` (default), ``int``, ``float`` or ``bool``, applied in Python.
+* ``fields``: nested fields, the value becomes a dict.
+
+A schema with a top level ``selector`` returns a list of records,
+one without returns a single record.
+"""
+
+import json
+import re
+from functools import lru_cache
+from typing import Any
+
+_SPEC_KEYS = {'selector', 'many', 'attr', 'prop', 'value', 'type', 'fields'}
+_VALUES = {
+    'text': "(({n}.textContent || '').trim())",
+    'html': "{n}.innerHTML",
+    'outer_html': "{n}.outerHTML",
+}
+_NUMBER = re.compile(r'-?\d[\d,]*(?:\.\d+)?|-?\.\d+')
+
+
+def normalize(spec, top_level: bool = False) -> dict:
+    """
+    Returns the canonical dict form of a field spec or schema.
+
+    Raises:
+        ValueError: If the spec is invalid.
+    """
+    if isinstance(spec, str):
+        spec = {'selector': spec}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid schema field: {spec!r}")
+
+    unknown = set(spec) - _SPEC_KEYS
+    if unknown:
+        raise ValueError(f"Invalid schema keys: {sorted(unknown)}")
+
+    spec = dict(spec)
+    spec.setdefault('many', bool(top_level and spec.get('selector')))
+    spec.setdefault('value', 'text')
+    spec.setdefault('type', 'str')
+    if spec['value'] not in _VALUES:
+        raise ValueError(f"Invalid schema value: {spec['value']}")
+    if spec['type'] not in _TYPES:
+        raise ValueError(f"Invalid schema type: {spec['type']}")
+    if 'fields' in spec:
+        spec['fields'] = {name: normalize(field)
+                          for name, field in spec['fields'].items()}
+    return spec
+
+
+def _value_js(spec: dict, node: str, depth: int) -> str:
+    """Returns the JavaScript expression reading the value of a field from a node"""
+    if 'fields' in spec:
+        items = ', '.join(
+            f"{json.dumps(name)}: {_field_js(field, node, depth + 1)}"
+            for name, field in spec['fields'].items())
+        return f"({{{items}}})"
+    if spec.get('attr'):
+        return f"{node}.getAttribute({json.dumps(spec['attr'])})"
+    if spec.get('prop'):
+        return f"{node}[{json.dumps(spec['prop'])}]"
+    return _VALUES[spec['value']].format(n=node)
+
+
+def _field_js(spec: dict, parent: str, depth: int) -> str:
+    """Returns the JavaScript expression locating a field below a parent node"""
+    node = f"n{depth}"
+    value = _value_js(spec, node, depth)
+    selector = spec.get('selector')
+    if spec['many']:
+        target = (f"Array.from({parent}.querySelectorAll({json.dumps(selector)}))"
+                  if selector else f"[{parent}]")
+        return f"{target}.map(({node}) => {value})"
+    target = (f"{parent}.querySelector({json.dumps(selector)})"
+              if selector else parent)
+    return f"(({node}) => {node} ? {value} : null)({target})"
+
+
+@lru_cache(maxsize=256)
+def _compile(key: str):
+    """Compiles a JSON encoded schema, cached by its encoding"""
+    spec = normalize(json.loads(key), top_level=True)
+    source = ("const root = arguments[0] || document;\n"
+              f"return {_field_js(spec, 'root', 0)};")
+    return spec, source
+
+
+def compile_schema(schema: dict):
+    """
+    Compiles a schema into the body of an extraction script.
+
+    Compiled schemas are cached, compiling the same schema again is a
+    dictionary lookup.
+
+    Returns:
+        spec, source: tuple
+            - The normalized schema and the JavaScript function body, which
+              takes an optional root element as its first argument.
+    """
+    return _compile(json.dumps(schema))
+
+
+def _to_number(value, cast):
+    """Extracts the first number of a text, None if there is none"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return cast(value)
+    match = _NUMBER.search(str(value))
+    if match is None:
+        return None
+    number = float(match.group().replace(',', ''))
+    return cast(number)
+
+
+def _to_bool(value):
+    """Converts a text to a bool, empty and false-like words are False"""
+    if isinstance(value, str):
+        return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+    return bool(value)
+
+
+_TYPES = {
+    'str': str,
+    'int': lambda value: _to_number(value, int),
+    'float': lambda value: _to_number(value, float),
+    'bool': _to_bool,
+}
+
+
+def coerce(spec: dict, value: Any) -> Any:
+    """Applies the field types of a normalized spec to an extracted value"""
+    if value is None:
+        return None
+    if spec['many']:
+        return [coerce(dict(spec, many=False), item) for item in value]
+    if 'fields' in spec:
+        return {name: coerce(field, value.get(name))
+                for name, field in spec['fields'].items()}
+    return _TYPES[spec['type']](value)
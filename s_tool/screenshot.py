@@ -0,0 +1,185 @@
+"""
+Screenshot capture and background encoding
+
+Captures are taken as base64 strings, decoding, optional re-encoding and
+disk writes happen in ``encode()`` or on a ``ScreenshotWriter`` thread.
+Downscaling and JPEG/WebP output need the optional Pillow package.
+"""
+
+import base64
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from .exceptions import SToolException
+
+FORMATS = {'png': 'PNG', 'jpeg': 'JPEG', 'jpg': 'JPEG', 'webp': 'WEBP'}
+
+
+def format_from_path(path: Optional[str], default: str = 'png') -> str:
+    """Returns the image format matching the extension of a file path"""
+    if path:
+        extension = os.path.splitext(path)[1].lstrip('.').lower()
+        if extension in FORMATS:
+            return extension
+    return default
+
+
+def normalize_format(fmt: str) -> str:
+    """
+    Returns a supported image format in lower case.
+
+    Raises:
+        SToolException: If the format is not png, jpeg, jpg or webp.
+    """
+    normalized = str(fmt).lower()
+    if normalized not in FORMATS:
+        raise SToolException(f"unsupported screenshot format: {fmt}")
+    return normalized
+
+
+def capture(driver, element=None, full_page: bool = False,
+            fmt: str = 'png', quality: Optional[int] = None) -> tuple:
+    """
+    Captures a screenshot without decoding it.
+
+    Chromium drivers capture full pages through CDP and encode JPEG/WebP in
+    the browser, Firefox uses its full page endpoint, other drivers fall
+    back to the visible viewport.
+
+    Args:
+        driver: webdriver
+            - The selenium webdriver.
+        element: WebElement, optional
+            - Capture only this element.
+        full_page: bool, optional
+            - Capture the whole page instead of the viewport.
+        fmt: str, optional
+            - Requested format, only used for CDP captures.
+        quality: int, optional
+            - JPEG/WebP quality, only used for CDP captures.
+
+    Returns:
+        data, fmt: tuple
+            - The base64 encoded image and its actual format.
+    """
+    if element is not None:
+        return element.screenshot_as_base64, 'png'
+
+    if hasattr(driver, 'execute_cdp_cmd'):
+        fmt = normalize_format(fmt)
+        cdp_format = 'jpeg' if fmt == 'jpg' else fmt
+        params = {'format': cdp_format, 'captureBeyondViewport': full_page}
+        if full_page:
+            # without a clip of the whole content chromium captures the viewport
+            metrics = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})
+            size = metrics.get('cssContentSize') or metrics['contentSize']
+            params['clip'] = {'x': 0, 'y': 0, 'width': size['width'],
+                              'height': size['height'], 'scale': 1}
+        if quality is not None and cdp_format != 'png':
+            params['quality'] = quality
+        result = driver.execute_cdp_cmd('Page.captureScreenshot', params)
+        return result['data'], cdp_format
+
+    if full_page and hasattr(driver, 'get_full_page_screenshot_as_base64'):
+        return driver.get_full_page_screenshot_as_base64(), 'png'
+
+    return driver.get_screenshot_as_base64(), 'png'
+
+
+def encode(data: str, source_fmt: str = 'png', fmt: str = 'png',
+           quality: Optional[int] = None, scale: Optional[float] = None) -> bytes:
+    """
+    Decodes a base64 capture and re-encodes it if the format or size differ.
+
+    Raises:
+        SToolException: If a format is not supported, or re-encoding is
+            needed and Pillow is not installed.
+    """
+    source_fmt, fmt = normalize_format(source_fmt), normalize_format(fmt)
+    raw = base64.b64decode(data)
+    if FORMATS[source_fmt] == FORMATS[fmt] and scale in (None, 1):
+        return raw
+
+    try:
+        from PIL import Image
+    except ImportError as exc:
+        raise SToolException(
+            "Pillow is required to resize or convert screenshots: pip install pillow") from exc
+
+    image = Image.open(io.BytesIO(raw))
+    if scale not in (None, 1):
+        size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+    if FORMATS[fmt] == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    options = {'quality': quality} if quality is not None else {}
+    output = io.BytesIO()
+    image.save(output, FORMATS[fmt], **options)
+    return output.getvalue()
+
+
+def write(path: str, data: str, source_fmt: str = 'png', fmt: Optional[str] = None,
+          quality: Optional[int] = None, scale: Optional[float] = None) -> str:
+    """Encodes a capture and writes it to ``path``, returns the path"""
+    fmt = fmt or format_from_path(path)
+    payload = encode(data, source_fmt, fmt, quality, scale)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, 'wb') as file:
+        file.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ScreenshotWriter:
+    """
+    Encodes and writes screenshots on background threads.
+
+    ``submit`` blocks once ``max_pending`` screenshots are waiting, which
+    bounds the memory held by queued captures.
+
+    Example:
+
+    .. code-block:: python
+
+        with ScreenshotWriter(max_workers=2) as writer:
+            for url in urls:
+                selenium_tools.get(url)
+                selenium_tools.screenshot(f"audit/{n}.jpg", full_page=True,
+                                          quality=70, writer=writer)
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 16) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='s-tool-screenshot')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(self, path: str, data: str, source_fmt: str = 'png', **options) -> Future:
+        """
+        Schedules ``write(path, data, source_fmt, **options)``.
+
+        Returns:
+            future: concurrent.futures.Future
+                - Resolves to the written path.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write, path, data, source_fmt, **options)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self, wait: bool = True) -> None:
+        """Waits for pending writes and stops the threads."""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
@@ -0,0 +1,387 @@
+"""
+JavaScript execution helpers: script handles and chunked transfers
+"""
+
+import hashlib
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .exceptions import SToolException
+
+_MISSING = '__stool_missing__'
+_NO_EVAL = '__stool_no_eval__'
+
+CALL_SCRIPT = f"""
+if (window.__stool_no_eval) {{ return '{_NO_EVAL}'; }}
+const fns = window.__stool_fn;
+if (!fns || !fns[arguments[0]]) {{ return '{_MISSING}'; }}
+return fns[arguments[0]].apply(null, arguments[1]);
+"""
+
+# a content security policy without 'unsafe-eval' makes new Function throw
+INSTALL_SCRIPT = f"""
+window.__stool_fn = window.__stool_fn || {{}};
+try {{
+    window.__stool_fn[arguments[0]] = new Function(arguments[2]);
+}} catch (error) {{
+    window.__stool_no_eval = true;
+    return '{_NO_EVAL}';
+}}
+return window.__stool_fn[arguments[0]].apply(null, arguments[1]);
+"""
+
+CHUNK_INIT_SCRIPT = """
+const value = (function () { %s }).apply(null, arguments[1]);
+if (value === null || value === undefined) { return -1; }
+if (value.length === 0) { return 0; }
+window.__stool_chunks = window.__stool_chunks || {};
+window.__stool_chunks[arguments[0]] = value;
+return value.length;
+"""
+
+# Returns [chunk, end]. String indices count UTF-16 code units, so a slice
+# never ends between the two halves of a surrogate pair.
+CHUNK_SLICE_SCRIPT = """
+const value = window.__stool_chunks[arguments[0]];
+let end = Math.min(arguments[2], value.length);
+if (typeof value === 'string' && end < value.length) {
+    const code = value.charCodeAt(end - 1);
+    if (code >= 0xD800 && code <= 0xDBFF) { end += end - 1 > arguments[1] ? -1 : 1; }
+}
+const chunk = value.slice(arguments[1], end);
+if (end >= value.length) { delete window.__stool_chunks[arguments[0]]; }
+return [chunk, end];
+"""
+
+
+class ScriptRegistry:
+    """
+    Registry of script snippets addressed by a short handle.
+
+    The source of a registered script is sent to the page once and kept in
+    ``window.__stool_fn``; later calls only send the handle and arguments.
+    After a navigation the page loses the functions, the next call notices
+    that and installs the script again in the same round trip.
+
+    Pages whose content security policy forbids ``eval`` can not install
+    functions; there the source is sent with every call like a plain
+    ``execute_script``.
+
+    Example:
+
+    .. code-block:: python
+
+        registry = ScriptRegistry()
+        handle = registry.register("return document.querySelectorAll(arguments[0]).length")
+        count = registry.call(driver, handle, "a")
+    """
+
+    def __init__(self) -> None:
+        self._sources: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, source: str) -> str:
+        """
+        Registers a script body and returns its handle.
+
+        Args:
+            source: str
+                - The body of a JavaScript function; arguments are available
+                  through ``arguments`` like in ``execute_script``.
+
+        Returns:
+            handle: str
+                - A stable handle derived from the source.
+        """
+        if not isinstance(source, str) or not source.strip():
+            raise ValueError("Invalid script. It must be a non-empty string.")
+
+        handle = hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+        with self._lock:
+            self._sources[handle] = source
+        return handle
+
+    def call(self, driver, handle: str, *args) -> Any:
+        """
+        Calls a registered script in the current page and returns its result.
+
+        Raises:
+            SToolException: If the handle is not registered.
+        """
+        source = self._sources.get(handle)
+        if source is None:
+            raise SToolException(f"UNKNOWN_SCRIPT_HANDLE: {handle}")
+
+        result = driver.execute_script(CALL_SCRIPT, handle, list(args))
+        if result == _MISSING:
+            result = driver.execute_script(
+                INSTALL_SCRIPT, handle, list(args), source)
+        if result == _NO_EVAL:
+            result = driver.execute_script(source, *args)
+        return result
+
+
+def iter_chunks(driver, script: str, *args, chunk_size: int = 1000) -> Iterator:
+    """
+    Evaluates a script once in the page and transfers its array or string
+    result in slices of ``chunk_size`` items (or characters).
+
+    Args:
+        driver: webdriver
+            - The selenium webdriver.
+        script: str
+            - Function body returning an array or string.
+        args:
+            - Arguments passed to the script.
+        chunk_size: int, optional
+            - Number of items or characters per WebDriver call.
+
+    Yields:
+        chunk: list or str
+            - Consecutive slices of the result. String slices are counted in
+              UTF-16 code units and keep surrogate pairs together, so one may
+              be a unit shorter or longer than ``chunk_size``.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    token = uuid.uuid4().hex
+    length = driver.execute_script(CHUNK_INIT_SCRIPT % script, token, list(args))
+    if length is None or length < 0:
+        return
+
+    start = 0
+    while start < length:
+        chunk, start = driver.execute_script(
+            CHUNK_SLICE_SCRIPT, token, start, start + chunk_size)
+        yield chunk
+
+
+PAGE_SOURCE_SCRIPT = """
+const doctype = document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+return doctype + document.documentElement.outerHTML;
+"""
+
+
+# Serializes a pruned clone of `root`, the live page is left untouched.
+# `config` comes from Pruner.config().
+PRUNE_JS = """
+function stoolPrune(root, config) {
+    const clone = root.cloneNode(true);
+    if (config.tags.length) {
+        clone.querySelectorAll(config.tags.join(',')).forEach(node => node.remove());
+    }
+    const show = NodeFilter.SHOW_ELEMENT | (config.comments ? NodeFilter.SHOW_COMMENT : 0);
+    const walker = document.createTreeWalker(clone, show);
+    const comments = [];
+    for (let node = clone; node; node = walker.nextNode()) {
+        if (node.nodeType === Node.COMMENT_NODE) { comments.push(node); continue; }
+        for (const attribute of Array.from(node.attributes)) {
+            const name = attribute.name.toLowerCase();
+            if (config.attributes.includes(name) || config.prefixes.some(prefix => name.startsWith(prefix))) {
+                node.removeAttribute(attribute.name);
+            } else if (config.dataUris && attribute.value.length > config.dataUriLength &&
+                       attribute.value.startsWith('data:')) {
+                node.setAttribute(attribute.name, 'data:');
+            }
+        }
+    }
+    comments.forEach(node => node.remove());
+    return clone.outerHTML;
+}
+function stoolDoctype() {
+    return document.doctype ? new XMLSerializer().serializeToString(document.doctype) : '';
+}
+function stoolBytes(text) { return new TextEncoder().encode(text).length; }
+"""
+
+# Returns [html, bytes before, bytes after] of an element, or of the page
+# when no element is given.
+PRUNE_SCRIPT = PRUNE_JS + """
+const [element, config] = arguments;
+if (element) {
+    const html = stoolPrune(element, config);
+    return [html, stoolBytes(element.outerHTML), stoolBytes(html)];
+}
+const html = stoolDoctype() + stoolPrune(document.documentElement, config);
+return [html, stoolBytes(stoolDoctype() + document.documentElement.outerHTML), stoolBytes(html)];
+"""
+
+# Pruned page source for iter_chunks(); the sizes are left in the page for
+# PRUNE_SIZES_SCRIPT.
+PRUNED_SOURCE_SCRIPT = PRUNE_JS + """
+const html = stoolDoctype() + stoolPrune(document.documentElement, arguments[0]);
+window.__stool_prune_sizes = [
+    stoolBytes(stoolDoctype() + document.documentElement.outerHTML), stoolBytes(html)];
+return html;
+"""
+
+PRUNE_SIZES_SCRIPT = """
+const sizes = window.__stool_prune_sizes || null;
+delete window.__stool_prune_sizes;
+return sizes;
+"""
+
+# Selects options of a select by index after checking their values, then
+# fires the events a user selection fires. Returns false when the options
+# changed since they were indexed.
+SELECT_SCRIPT = """
+const [select, indices, values] = arguments;
+for (let i = 0; i < indices.length; i++) {
+    const option = select.options[indices[i]];
+    if (!option || option.value !== values[i]) { return false; }
+}
+if (select.multiple) {
+    indices.forEach(index => { select.options[index].selected = true; });
+} else {
+    select.selectedIndex = indices[indices.length - 1];
+}
+select.dispatchEvent(new Event('input', {bubbles: true}));
+select.dispatchEvent(new Event('change', {bubbles: true}));
+return true;
+"""
+
+# Finds the nodes of a locator made by js_locator(); expects `isXpath` and
+# `expression` to be defined before it.
+FIND_NODES_JS = """
+function stoolFind(isXpath, expression, scope) {
+    scope = scope || document;
+    if (!isXpath) { return Array.from(scope.querySelectorAll(expression)); }
+    const snapshot = document.evaluate(
+        expression, scope, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < snapshot.snapshotLength; i++) { nodes.push(snapshot.snapshotItem(i)); }
+    return nodes.filter(node => node.nodeType === 1);
+}
+"""
+
+HARVEST_SCRIPT = FIND_NODES_JS + """
+const [isXpath, expression, marker, asHtml, scroll] = arguments;
+const fresh = stoolFind(isXpath, expression).filter(node => !node.hasAttribute(marker));
+fresh.forEach(node => node.setAttribute(marker, ''));
+const items = asHtml ? fresh.map(node => node.outerHTML) : fresh;
+if (scroll) { window.scrollTo(0, document.documentElement.scrollHeight); }
+return items;
+"""
+
+# Checks many locators in one call and returns the first visible node of
+# each, or null. With `any` set it stops at the first locator that matches.
+WAIT_SCRIPT = FIND_NODES_JS + """
+const [locators, any] = arguments;
+function stoolVisible(node) {
+    const style = window.getComputedStyle(node);
+    if (style.display === 'none' || style.visibility === 'hidden') { return false; }
+    return node.getClientRects().length > 0;
+}
+const found = locators.map(() => null);
+for (let i = 0; i < locators.length; i++) {
+    found[i] = stoolFind(locators[i][0], locators[i][1]).find(stoolVisible) || null;
+    if (any && found[i]) { break; }
+}
+return found;
+"""
+
+# Hides or shows the given elements and the nodes of the given locators.
+# The inline display of hidden nodes is kept in an attribute and restored.
+VISIBILITY_SCRIPT = FIND_NODES_JS + """
+const [elements, locators, hide] = arguments;
+const nodes = elements.slice();
+locators.forEach(([isXpath, expression]) => nodes.push(...stoolFind(isXpath, expression)));
+const saved = 'data-stool-display';
+nodes.forEach(node => {
+    if (hide) {
+        if (!node.hasAttribute(saved)) { node.setAttribute(saved, node.style.display); }
+        node.style.display = 'none';
+        return;
+    }
+    const previous = node.getAttribute(saved);
+    node.style.display = previous === null || previous === 'none' ? 'block' : previous;
+    node.removeAttribute(saved);
+});
+return nodes.length;
+"""
+
+
+def _css_string(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _xpath_string(value: str) -> str:
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    parts = value.split('"')
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in parts) + ")"
+
+
+def js_locator(locator_text: str, locator_type: str = 'id') -> tuple:
+    """
+    Converts a selenium style locator for use in page scripts.
+
+    Returns:
+        is_xpath, expression: tuple
+            - Whether the expression is an XPath, and the CSS selector or
+              XPath expression itself.
+
+    Raises:
+        ValueError: If the locator type is invalid.
+    """
+    locator_type = locator_type.lower()
+    if locator_type == 'css_selector':
+        return False, locator_text
+    if locator_type == 'xpath':
+        return True, locator_text
+    if locator_type == 'id':
+        return False, f"[id={_css_string(locator_text)}]"
+    if locator_type == 'name':
+        return False, f"[name={_css_string(locator_text)}]"
+    if locator_type == 'class_name':
+        return False, f"[class~={_css_string(locator_text)}]"
+    if locator_type == 'tag_name':
+        return False, locator_text
+    if locator_type == 'link_text':
+        return True, f"//a[normalize-space(.)={_xpath_string(locator_text)}]"
+    if locator_type == 'partial_link_text':
+        return True, f"//a[contains(., {_xpath_string(locator_text)})]"
+    raise ValueError(f"Invalid locator type: {locator_type}")
+
+
+class WaitResult(NamedTuple):
+    """
+    Result of ``wait_for_all`` and ``wait_for_any``.
+
+    Attributes:
+        elements: list
+            - The visible element of each locator, in locator order; None
+              for the locators that did not match.
+        first: int
+            - Index of the locator that was visible first.
+    """
+
+    elements: list
+    first: Optional[int]
+
+
+def normalize_locators(locators, locator_type: str = 'id') -> List[Tuple[str, str]]:
+    """
+    Returns ``(locator_text, locator_type)`` pairs of a list of locators.
+
+    Args:
+        locators: list
+            - Locator strings of ``locator_type`` or
+              ``(locator_text, locator_type)`` pairs.
+        locator_type: str, optional
+            - The type of plain string locators. Defaults to 'id'.
+
+    Raises:
+        ValueError: If the list is empty.
+    """
+    if isinstance(locators, str):
+        locators = [locators]
+    pairs = [(locator, locator_type) if isinstance(locator, str) else tuple(locator)
+             for locator in locators]
+    if not pairs:
+        raise ValueError("At least one locator is required.")
+    return pairs
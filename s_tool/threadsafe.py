@@ -0,0 +1,235 @@
+"""
+Thread safety for WebDriver sessions shared between threads
+"""
+
+import contextlib
+import threading
+import time
+from typing import Callable, Optional
+
+from .exceptions import ConcurrentSessionError, SToolException
+
+MODES = ('lock', 'detect')
+
+
+class GuardedExecutor:
+    """Command executor proxy that runs every command under a session guard"""
+
+    def __init__(self, executor, guard: 'SessionGuard') -> None:
+        self.executor = executor
+        self.guard = guard
+
+    def execute(self, command: str, params: dict = None):
+        """Runs a command while holding the session guard"""
+        self.guard.acquire(command)
+        try:
+            return self.executor.execute(command, params)
+        finally:
+            self.guard.release()
+
+    def __getattr__(self, name):
+        """Passes other attributes through to the wrapped executor"""
+        return getattr(self.executor, name)
+
+
+class SessionGuard:
+    """
+    Serializes the WebDriver commands of a session used by several threads.
+
+    In ``lock`` mode a command waits until the command of another thread
+    finished; the waits are counted as contention. In ``detect`` mode a
+    command that overlaps with one of another thread raises
+    ``ConcurrentSessionError`` instead, which finds accidental sharing of
+    a session between the threads of a pool.
+
+    Single commands can not interleave with either mode. Use
+    ``exclusive()`` to run several commands (find and click, fill and
+    submit) without commands of other threads in between.
+
+    Args:
+        mode: str, optional
+            - "lock" or "detect". Defaults to "lock".
+
+    Example:
+
+    .. code-block:: python
+
+        selenium_tools = SeleniumTools(browser="chrome", thread_safe="detect")
+
+        # in tests: fails loudly when two threads share the session
+        with ThreadPoolExecutor(4) as pool:
+            pool.map(scrape, urls)
+    """
+
+    def __init__(self, mode: str = 'lock', clock: Callable[[], float] = time.perf_counter) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode}. It must be one of: {MODES}")
+        self.mode = mode
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._owner = None
+        self._depth = 0
+        self.commands = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.violations = 0
+
+    def attach(self, driver):
+        """
+        Guards the commands of a driver.
+
+        Returns:
+            driver: The same driver.
+
+        Raises:
+            SToolException: If the driver has no command executor.
+        """
+        executor = getattr(driver, 'command_executor', None)
+        if executor is None:
+            raise SToolException("THREAD_SAFE_UNSUPPORTED: the driver has no command executor")
+        if not isinstance(executor, GuardedExecutor) or executor.guard is not self:
+            driver.command_executor = GuardedExecutor(executor, self)
+        return driver
+
+    def acquire(self, command: str = 'exclusive') -> None:
+        """
+        Takes the session for the current thread.
+
+        Raises:
+            ConcurrentSessionError: In detect mode, if another thread holds
+                the session.
+        """
+        if not self._lock.acquire(blocking=False):
+            if self.mode == 'detect':
+                owner = self._owner
+                with self._stats_lock:
+                    self.violations += 1
+                raise ConcurrentSessionError(
+                    f"CONCURRENT_SESSION_USE: {command} from thread "
+                    f"{threading.current_thread().name} while thread {owner} uses the session")
+            start = self.clock()
+            self._lock.acquire()
+            waited = self.clock() - start
+            with self._stats_lock:
+                self.contended += 1
+                self.wait_seconds += waited
+                self.max_wait = max(self.max_wait, waited)
+
+        if self._depth == 0:
+            self._owner = threading.current_thread().name
+        self._depth += 1
+        with self._stats_lock:
+            self.commands += 1
+
+    def release(self) -> None:
+        """Gives the session back."""
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+        self._lock.release()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        """Holds the session for a block of commands of the current thread."""
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """Returns the command and contention counters"""
+        with self._stats_lock:
+            return {
+                'mode': self.mode,
+                'commands': self.commands,
+                'contended': self.contended,
+                'contention_ratio': self.contended / self.commands if self.commands else 0.0,
+                'wait_seconds': self.wait_seconds,
+                'max_wait': self.max_wait,
+                'violations': self.violations,
+            }
+
+
+def make_session_guard(option) -> Optional[SessionGuard]:
+    """Returns the session guard for the ``thread_safe`` option"""
+    if option is None or option is False:
+        return None
+    if option is True:
+        return SessionGuard()
+    if isinstance(option, str):
+        return SessionGuard(option)
+    return option
+
+
+class ThreadLocalSessions:
+    """
+    Gives every thread its own SeleniumTools session.
+
+    Sessions are created on first use in a thread and reused by that
+    thread afterwards. Attributes of the proxy are looked up on the
+    session of the calling thread, so code written for one shared
+    SeleniumTools object gets a session per thread without changes.
+
+    Args:
+        tools_factory: callable, optional
+            - Returns a new SeleniumTools session.
+            - Defaults to ``SeleniumTools(**tools_options)``.
+
+    Example:
+
+    .. code-block:: python
+
+        with ThreadLocalSessions(browser="chrome", headless=True) as sessions:
+            def scrape(url):
+                sessions.get(url)
+                return sessions.text()
+
+            with ThreadPoolExecutor(4) as pool:
+                pages = list(pool.map(scrape, urls))
+    """
+
+    def __init__(self, tools_factory: Optional[Callable] = None, **tools_options) -> None:
+        if tools_factory is None:
+            def tools_factory():
+                from .core import SeleniumTools
+
+                return SeleniumTools(**tools_options)
+        self._tools_factory = tools_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.sessions = []
+
+    def session(self):
+        """Returns the session of the current thread, creating it on first use"""
+        selenium_tools = getattr(self._local, 'tools', None)
+        if selenium_tools is None:
+            selenium_tools = self._tools_factory()
+            self._local.tools = selenium_tools
+            with self._lock:
+                self.sessions.append(selenium_tools)
+        return selenium_tools
+
+    def __getattr__(self, name):
+        """Looks public attributes up on the session of the calling thread"""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.session(), name)
+
+    def close(self) -> None:
+        """Closes the sessions of all threads."""
+        with self._lock:
+            sessions, self.sessions = self.sessions, []
+        for selenium_tools in sessions:
+            selenium_tools.__exit__(None, None, None)
+        self._local = threading.local()
+
+    def __enter__(self):
+        """Returns the proxy"""
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        """Closes the sessions of all threads"""
+        self.close()
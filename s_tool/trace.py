@@ -0,0 +1,306 @@
+"""
+Record and replay WebDriver command traces
+
+``TraceRecorder`` wraps the command executor of a driver and writes every
+command with its parameters, response, response size and latency to a JSON
+lines trace (gzip compressed when the path ends with ``.gz``).
+``replay_driver`` builds a driver that answers from a trace instead of a
+browser, so a SeleniumTools workflow can be re-run deterministically and
+profiled for the time spent in the library itself:
+
+.. code-block:: python
+
+    with TraceRecorder("checkout.jsonl.gz") as recorder:
+        selenium_tools = SeleniumTools(browser="chrome", recorder=recorder)
+        run_checkout(selenium_tools)
+
+    selenium_tools = SeleniumTools(driver=replay_driver("checkout.jsonl.gz"))
+    cProfile.run("run_checkout(selenium_tools)")
+"""
+
+import copy
+import gzip
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from .exceptions import SToolException
+
+TRACE_VERSION = 1
+
+
+def _open(path: str, mode: str):
+    """Opens a trace file, gzip compressed if it ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _dump(value) -> str:
+    """Serializes a value as compact JSON"""
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def _clean_params(params) -> dict:
+    """Copies the command parameters without the session id"""
+    params = dict(params or {})
+    params.pop('sessionId', None)
+    return json.loads(_dump(params))
+
+
+class RecordingExecutor:
+    """Command executor proxy that reports every command to a recorder"""
+
+    def __init__(self, executor, recorder: 'TraceRecorder') -> None:
+        self.executor = executor
+        self.recorder = recorder
+
+    def execute(self, command: str, params: dict = None):
+        """Runs a command and records it with its response or error"""
+        recorded_params = _clean_params(params)
+        start = self.recorder.clock()
+        try:
+            response = self.executor.execute(command, params)
+        except Exception as exc:
+            self.recorder.record(command, recorded_params, None,
+                                 self.recorder.clock() - start, error=exc)
+            raise
+        # the driver unwraps the response in place, serialize it first
+        self.recorder.record(command, recorded_params, response, self.recorder.clock() - start)
+        return response
+
+    def __getattr__(self, name):
+        """Passes other attributes through to the wrapped executor"""
+        return getattr(self.executor, name)
+
+
+class TraceRecorder:
+    """
+    Writes the WebDriver commands of attached drivers to a trace file.
+
+    Args:
+        path: str
+            - The trace file, gzip compressed if it ends with ``.gz``.
+        record_responses: bool, optional
+            - Store full responses. Traces without responses can only be
+              summarized, not replayed. Defaults to True.
+    """
+
+    def __init__(self, path: str, record_responses: bool = True,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        self.path = path
+        self.record_responses = record_responses
+        self.clock = clock
+        self.commands = 0
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+
+    def _write(self, entry: dict) -> None:
+        """Writes a trace entry as a JSON line, unless the recorder is closed"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(_dump(entry) + '\n')
+
+    def attach(self, driver):
+        """
+        Starts recording the commands of a driver.
+
+        Returns:
+            driver: The same driver.
+
+        Raises:
+            SToolException: If the driver has no command executor.
+        """
+        executor = getattr(driver, 'command_executor', None)
+        if executor is None:
+            raise SToolException("TRACE_UNSUPPORTED: the driver has no command executor")
+        if isinstance(executor, RecordingExecutor):
+            return driver
+
+        self._write({
+            'type': 'session',
+            'version': TRACE_VERSION,
+            'session_id': driver.session_id,
+            'capabilities': getattr(driver, 'caps', None) or {},
+            'cdp': hasattr(driver, 'execute_cdp_cmd'),
+        })
+        driver.command_executor = RecordingExecutor(executor, self)
+        return driver
+
+    @staticmethod
+    def detach(driver) -> None:
+        """Stops recording the commands of a driver."""
+        executor = getattr(driver, 'command_executor', None)
+        if isinstance(executor, RecordingExecutor):
+            driver.command_executor = executor.executor
+
+    def record(self, command: str, params: dict, response, elapsed: float,
+               error: Optional[Exception] = None) -> None:
+        """Writes one command to the trace."""
+        entry = {'cmd': command, 'params': params, 'ms': round(elapsed * 1000, 3)}
+        if error is not None:
+            entry['error'] = f"{type(error).__name__}: {error}"
+            entry['size'] = 0
+        else:
+            body = _dump(response)
+            entry['size'] = len(body)
+            if self.record_responses:
+                entry['response'] = json.loads(body)
+        self._write(entry)
+        self.commands += 1
+
+    def close(self) -> None:
+        """Flushes and closes the trace file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        """Returns the recorder"""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        """Closes the trace file"""
+        self.close()
+
+
+def load_trace(path: str) -> tuple:
+    """
+    Reads a trace file.
+
+    Returns:
+        header, commands: tuple
+            - The session header of the first recorded driver and the list
+              of recorded commands.
+    """
+    header = None
+    commands = []
+    with _open(path, 'r') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry.get('type') == 'session':
+                header = header or entry
+            else:
+                commands.append(entry)
+    if header is None:
+        raise SToolException(f"INVALID_TRACE: {path} has no session header")
+    return header, commands
+
+
+def summarize(path: str) -> dict:
+    """
+    Aggregates a trace per command.
+
+    Returns:
+        summary: dict
+            - ``{command: {'count', 'ms', 'size'}}`` sorted by total latency.
+    """
+    _, commands = load_trace(path)
+    summary = {}
+    for entry in commands:
+        stats = summary.setdefault(entry['cmd'], {'count': 0, 'ms': 0.0, 'size': 0})
+        stats['count'] += 1
+        stats['ms'] += entry['ms']
+        stats['size'] += entry['size']
+    return dict(sorted(summary.items(), key=lambda item: item[1]['ms'], reverse=True))
+
+
+class ReplayExecutor:
+    """
+    Command executor answering from a recorded trace.
+
+    Args:
+        path: str
+            - The trace file.
+        strict: bool, optional
+            - Raise when a command or its parameters differ from the trace.
+              Defaults to True.
+    """
+
+    def __init__(self, path: str, strict: bool = True) -> None:
+        self.header, commands = load_trace(path)
+        if any('response' not in entry and 'error' not in entry for entry in commands):
+            raise SToolException(f"INVALID_TRACE: {path} was recorded without responses")
+        self.strict = strict
+        self._commands = deque(commands)
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        """Number of recorded commands not replayed yet"""
+        return len(self._commands)
+
+    def execute(self, command: str, params: dict = None):
+        """Answers a command with the next recorded response"""
+        if command == Command.NEW_SESSION:
+            return {'value': {'sessionId': self.header['session_id'],
+                              'capabilities': self.header['capabilities']}}
+
+        with self._lock:
+            if not self._commands:
+                if command in (Command.QUIT, Command.CLOSE):
+                    return {'value': None}
+                raise SToolException(f"TRACE_EXHAUSTED: no recorded response for {command}")
+            entry = self._commands.popleft()
+
+        if self.strict:
+            params = _clean_params(params)
+            if entry['cmd'] != command or entry['params'] != params:
+                raise SToolException(
+                    f"TRACE_MISMATCH: expected {entry['cmd']} {entry['params']}, "
+                    f"got {command} {params}")
+
+        if 'error' in entry:
+            raise WebDriverException(entry['error'])
+        return copy.deepcopy(entry['response'])
+
+    def close(self) -> None:
+        """Nothing to close"""
+        pass
+
+
+class ReplayDriver(WebDriver):
+    """Remote WebDriver whose commands are answered by a ReplayExecutor"""
+
+    @property
+    def name(self) -> str:
+        """Browser name of the recorded session"""
+        return self.caps.get('browserName') or 'chrome'
+
+
+class CdpReplayDriver(ReplayDriver):
+    """Replay driver for traces recorded with a Chromium driver"""
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict):
+        """Answers a CDP command from the trace"""
+        return self.execute('executeCdpCommand', {'cmd': cmd, 'params': cmd_args})['value']
+
+
+def replay_driver(path: str, strict: bool = True) -> ReplayDriver:
+    """
+    Creates a driver that replays a trace without a browser.
+
+    Args:
+        path: str
+            - The trace file.
+        strict: bool, optional
+            - Raise when the workflow diverges from the trace.
+              Defaults to True.
+
+    Returns:
+        driver: ReplayDriver
+            - A driver to pass to ``SeleniumTools(driver=...)``.
+    """
+    executor = ReplayExecutor(path, strict=strict)
+    driver_class = CdpReplayDriver if executor.header.get('cdp') else ReplayDriver
+    return driver_class(command_executor=executor)
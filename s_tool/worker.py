@@ -0,0 +1,359 @@
+"""
+Queue worker running jobs on a pool of SeleniumTools sessions
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from .jobs import run_job
+from .logger import logger
+
+
+class WorkerMetrics:
+    """Thread-safe counters of a worker"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def record(self, outcome: str, seconds: float) -> None:
+        """Counts a completed, retried or failed job and its duration"""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.busy_seconds += seconds
+
+    def snapshot(self) -> dict:
+        """Returns the counters, uptime, throughput and mean job duration"""
+        with self._lock:
+            elapsed = max(self._clock() - self.started, 1e-9)
+            finished = self.completed + self.failed
+            return {
+                'completed': self.completed,
+                'retried': self.retried,
+                'failed': self.failed,
+                'uptime': elapsed,
+                'throughput': self.completed / elapsed,
+                'mean_job_seconds': self.busy_seconds / (finished + self.retried)
+                if finished + self.retried else 0.0,
+            }
+
+
+class Worker:
+    """
+    Pulls jobs from a queue and runs them on a pool of browser sessions.
+
+    Each session runs on its own thread and is reused for all the jobs that
+    thread takes. A job is acknowledged once its result is in the sink.
+    Failed jobs are requeued after ``retry_delay`` seconds and given up
+    after ``max_attempts``.
+
+    Args:
+        queue: SQLiteQueue, FileQueue or RedisQueue
+            - The job queue.
+        sink: callable
+            - Called with the result dict of every finished job.
+        sessions: int, optional
+            - Number of browser sessions. Defaults to 1.
+        tools_factory: callable, optional
+            - Returns a new SeleniumTools session.
+            - Defaults to ``SeleniumTools(**tools_options)``.
+        visibility_timeout: float, optional
+            - Seconds a reserved job stays hidden from other workers.
+            - Defaults to 300.
+        max_attempts: int, optional
+            - Attempts before a job is marked failed. Defaults to 3.
+        retry_delay: float, optional
+            - Seconds before a failed job is visible again. Defaults to 5.
+        poll_interval: float, optional
+            - Seconds to wait when the queue is empty. Defaults to 1.
+        metrics_interval: float, optional
+            - Log the metrics every n seconds, 0 to disable. Defaults to 60.
+        report_failures: bool, optional
+            - Also send ``{"id", "url", "error", "attempts"}`` records of
+              failed jobs to the sink. Defaults to False.
+        controller: AdaptiveConcurrency, optional
+            - Decides how many of the sessions work at the same time and
+              applies its per domain rate limits. ``sessions`` is then the
+              upper bound. Defaults to None.
+
+    Example:
+
+    .. code-block:: python
+
+        worker = Worker(SQLiteQueue("jobs.db"), JsonlSink("results.jsonl"),
+                        sessions=4, browser="chrome", headless=True)
+        worker.run()
+    """
+
+    def __init__(self, queue, sink: Callable[[dict], None], sessions: int = 1,
+                 tools_factory: Optional[Callable] = None,
+                 visibility_timeout: float = 300, max_attempts: int = 3,
+                 retry_delay: float = 5, poll_interval: float = 1,
+                 metrics_interval: float = 60, report_failures: bool = False,
+                 controller=None, **tools_options) -> None:
+        if sessions < 1:
+            raise ValueError("sessions must be at least 1")
+
+        self.queue = queue
+        self.sink = sink
+        self.sessions = sessions
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.metrics_interval = metrics_interval
+        self.report_failures = report_failures
+        self.controller = controller
+        self._tools_factory = tools_factory or self._default_factory(tools_options)
+        self._stop = threading.Event()
+        self._taken = 0
+        self._taken_lock = threading.Lock()
+        self.counters = WorkerMetrics()
+
+    @staticmethod
+    def _default_factory(tools_options: dict) -> Callable:
+        """Returns a factory of SeleniumTools sessions with the given options"""
+        def create():
+            """Launches a session"""
+            from .core import SeleniumTools
+
+            return SeleniumTools(**tools_options)
+        return create
+
+    def metrics(self) -> dict:
+        """Returns the worker counters and the queue size and lag"""
+        metrics = dict(self.counters.snapshot(), queue=self.queue.stats())
+        if self.controller is not None:
+            metrics['concurrency'] = self.controller.stats()
+        return metrics
+
+    def stop(self) -> None:
+        """Lets the sessions finish their current job and stop."""
+        self._stop.set()
+
+    def _take_slot(self, max_jobs: Optional[int]) -> bool:
+        """Claims one of the ``max_jobs`` jobs, False once all are taken"""
+        with self._taken_lock:
+            if max_jobs is not None and self._taken >= max_jobs:
+                return False
+            self._taken += 1
+            return True
+
+    def _release_slot(self) -> None:
+        """Gives back a claimed job that was not run"""
+        with self._taken_lock:
+            self._taken -= 1
+
+    def _failed(self, reservation, error: str, seconds: float) -> None:
+        """Requeues a failed job, or gives it up after ``max_attempts``"""
+        if reservation.attempts >= self.max_attempts:
+            self.queue.fail(reservation, error)
+            if self.report_failures:
+                self.sink({'id': reservation.job_id, 'url': reservation.job.get('url'),
+                           'error': error, 'attempts': reservation.attempts})
+            self.counters.record('failed', seconds)
+            logger.warning('job %s failed: %s', reservation.job_id, error)
+        else:
+            self.queue.nack(reservation, self.retry_delay)
+            self.counters.record('retried', seconds)
+            logger.info('job %s requeued after attempt %s: %s',
+                        reservation.job_id, reservation.attempts, error)
+
+    def _process(self, selenium_tools, reservation) -> bool:
+        """Runs a reserved job, returns True if it succeeded"""
+        start = time.monotonic()
+        try:
+            result = run_job(selenium_tools, reservation.job)
+            result['attempts'] = reservation.attempts
+            self.sink(result)
+        except Exception as exc:
+            self._failed(reservation, f"{type(exc).__name__}: {exc}", time.monotonic() - start)
+            return False
+
+        self.queue.ack(reservation)
+        self.counters.record('completed', time.monotonic() - start)
+        return True
+
+    def _start_session(self, reservation, start: float):
+        """Launches a session, a launch error fails the reserved job instead of the thread"""
+        try:
+            return self._tools_factory()
+        except Exception as exc:
+            self._failed(reservation, f"session start failed: {type(exc).__name__}: {exc}",
+                         time.monotonic() - start)
+            return None
+
+    def _session(self, index: int, max_jobs: Optional[int], idle_timeout: Optional[float]) -> None:
+        """Runs jobs in one session until the worker stops"""
+        # sessions are launched on the first job, so sessions the controller
+        # never lets work do not start a browser
+        selenium_tools = None
+        controller = self.controller
+        idle_since = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if controller is not None and not controller.acquire(self.poll_interval):
+                    if selenium_tools is not None and index >= controller.limit:
+                        selenium_tools.__exit__(None, None, None)
+                        selenium_tools = None
+                    continue
+                if not self._take_slot(max_jobs):
+                    if controller is not None:
+                        controller.release()
+                    break
+                reservation = self.queue.reserve(self.visibility_timeout)
+                if reservation is None:
+                    self._release_slot()
+                    if controller is not None:
+                        controller.release()
+                    if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                start = time.monotonic()
+                latency = None
+                succeeded = False
+                try:
+                    if controller is not None:
+                        controller.throttle(reservation.job.get('url'))
+                    if selenium_tools is None:
+                        selenium_tools = self._start_session(reservation, start)
+                    if selenium_tools is not None:
+                        # rate limit waits and browser launches are not page latency
+                        job_start = time.monotonic()
+                        succeeded = self._process(selenium_tools, reservation)
+                        latency = time.monotonic() - job_start
+                finally:
+                    if controller is not None:
+                        controller.release(latency, not succeeded)
+                idle_since = time.monotonic()
+        finally:
+            if selenium_tools is not None:
+                selenium_tools.__exit__(None, None, None)
+
+    def run(self, max_jobs: Optional[int] = None, idle_timeout: Optional[float] = None) -> dict:
+        """
+        Runs the sessions until ``stop()`` is called, ``max_jobs`` jobs
+        were taken or the queue stayed empty for ``idle_timeout`` seconds.
+
+        Returns:
+            metrics: dict
+                - The final worker metrics.
+        """
+        self._stop.clear()
+        threads = [threading.Thread(target=self._session, args=(index, max_jobs, idle_timeout),
+                                    name=f's-tool-worker-{index}', daemon=True)
+                   for index in range(self.sessions)]
+        for thread in threads:
+            thread.start()
+
+        last_report = time.monotonic()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.2)
+                    if self.metrics_interval and \
+                            time.monotonic() - last_report >= self.metrics_interval:
+                        logger.info('worker metrics: %s', self.metrics())
+                        last_report = time.monotonic()
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+        return self.metrics()
+
+
+def _percentile(values: list, percent: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def run_batch(jobs, sink: Callable[[dict], None], concurrency: int = 1,
+              retries: int = 0, controller=None, **tools_options) -> dict:
+    """
+    Runs a batch of jobs on ``concurrency`` sessions and returns a summary.
+
+    Results and the errors of failed jobs are streamed to ``sink`` as soon
+    as each job finishes.
+
+    Args:
+        jobs: iterable
+            - Job dicts, see ``s_tool.jobs``.
+        sink: callable
+            - Called with the result dict of every job.
+        concurrency: int, optional
+            - Number of browser sessions. Defaults to 1.
+        retries: int, optional
+            - Extra attempts for failed jobs. Defaults to 0.
+        controller: AdaptiveConcurrency, optional
+            - Adapts the number of working sessions up to ``concurrency``.
+        tools_options:
+            - SeleniumTools options of the sessions, or ``tools_factory``.
+
+    Returns:
+        summary: dict
+            - Job counts, wall time, throughput and latency percentiles in
+              seconds. ``unfinished`` jobs were neither completed nor
+              given up.
+
+    Example:
+
+    .. code-block:: python
+
+        summary = run_batch([{"url": url, "text": True} for url in urls],
+                            JsonlSink("pages.jsonl"), concurrency=4,
+                            browser="chrome", headless=True)
+    """
+    from .jobs import MemoryQueue
+
+    latencies = []
+    lock = threading.Lock()
+
+    def collect(result: dict) -> None:
+        """Notes the latency of a result and passes it to the sink"""
+        if 'elapsed' in result:
+            with lock:
+                latencies.append(result['elapsed'])
+        sink(result)
+
+    queue = MemoryQueue(jobs)
+    total = queue.stats()['visible']
+    start = time.monotonic()
+    metrics = {'completed': 0, 'failed': 0, 'retried': 0}
+    if total:
+        metrics = Worker(queue, collect, sessions=min(concurrency, total),
+                         max_attempts=retries + 1, retry_delay=0, poll_interval=0.05,
+                         metrics_interval=0, report_failures=True, controller=controller,
+                         **tools_options).run(idle_timeout=0)
+    wall = time.monotonic() - start
+
+    latencies.sort()
+    summary = {
+        'jobs': total,
+        'succeeded': metrics['completed'],
+        'failed': metrics['failed'],
+        'unfinished': total - metrics['completed'] - metrics['failed'],
+        'retried': metrics['retried'],
+        'seconds': wall,
+        'throughput': metrics['completed'] / wall if wall else 0.0,
+        'latency': {
+            'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+            'p50': _percentile(latencies, 50),
+            'p90': _percentile(latencies, 90),
+            'p99': _percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.0,
+        },
+    }
+    if 'concurrency' in metrics:
+        summary['concurrency'] = metrics['concurrency']
+    return summary
@@ -0,0 +1,107 @@
+"""
+Fakes shared by the test modules
+"""
+
+# W3C key of element references in WebDriver responses
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+
+class FakeClock:
+    """Clock and sleep function that only move when told to"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeDriver:
+    """
+    Plain object standing in for a WebDriver.
+
+    Has what SeleniumTools needs to accept a driver, test modules add
+    the methods they exercise.
+    """
+
+    name = "chrome"
+    title = ""
+    current_url = "about:blank"
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeExecutor:
+    """
+    Command executor of a fake WebDriver session.
+
+    Starts the session, keeps the url of ``get`` and records the
+    commands; subclasses answer more commands in ``respond()``.
+    """
+
+    def __init__(self):
+        self.url = "about:blank"
+        self.commands = []
+
+    def execute(self, command, params):
+        self.commands.append(command)
+        if command == "newSession":
+            return {"value": {"sessionId": "s-1", "capabilities": {"browserName": "chrome"}}}
+        if command == "get":
+            self.url = params["url"]
+        return {"value": self.respond(command, params)}
+
+    def respond(self, command, params):
+        if command == "getCurrentUrl":
+            return self.url
+        if command == "getTitle":
+            return ""
+        return None
+
+    def close(self):
+        pass
+
+
+class ChunkStore:
+    """
+    Page side of the chunk transfer scripts.
+
+    Strings are kept as UTF-16 code units like in JavaScript and slices
+    are moved off the middle of surrogate pairs like CHUNK_SLICE_SCRIPT does.
+    """
+
+    def __init__(self):
+        self.values = {}
+
+    def init(self, token, value):
+        if value is None:
+            return -1
+        if isinstance(value, str):
+            encoded = value.encode("utf-16-le", "surrogatepass")
+            value = [encoded[index:index + 2] for index in range(0, len(encoded), 2)]
+            self.values[token] = ("string", value)
+        else:
+            self.values[token] = ("array", value)
+        return len(value)
+
+    def slice(self, token, start, end):
+        kind, value = self.values[token]
+        end = min(end, len(value))
+        if kind == "string" and end < len(value) and 0xD800 <= int.from_bytes(value[end - 1], "little") <= 0xDBFF:
+            end += -1 if end - 1 > start else 1
+        chunk = value[start:end]
+        if kind == "string":
+            chunk = b"".join(chunk).decode("utf-16-le", "surrogatepass")
+        if end >= len(value):
+            del self.values[token]
+        return [chunk, end]
@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+
+from s_tool.cache import PageCache
+from s_tool.core import SeleniumTools
+from tests.fakes import FakeClock, FakeDriver
+
+
+class PageCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(1000.0)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def test_memory_hit_and_miss(self):
+        cache = PageCache(clock=self.clock)
+        self.assertIsNone(cache.get("https://a.com"))
+        cache.set("https://a.com", "<html>a</html>", "https://a.com/final")
+
+        entry = cache.get("https://a.com")
+        self.assertEqual(entry["page_source"], "<html>a</html>")
+        self.assertEqual(entry["final_url"], "https://a.com/final")
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_lru_eviction(self):
+        cache = PageCache(max_entries=2, clock=self.clock)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.get("a")
+        cache.set("c", "C")
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_ttl_expiry(self):
+        cache = PageCache(ttl=10, directory=self.tmpdir.name, clock=self.clock)
+        cache.set("a", "A")
+        self.clock.now += 11
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_survives_eviction_and_restart(self):
+        cache = PageCache(max_entries=1, directory=self.tmpdir.name,
+                          clock=self.clock)
+        cache.set("a", "A" * 1000)
+        cache.set("b", "B")
+
+        self.assertEqual(cache.get("a")["page_source"], "A" * 1000)
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+
+        restarted = PageCache(directory=self.tmpdir.name, clock=self.clock)
+        self.assertEqual(restarted.get("b")["page_source"], "B")
+
+    def test_invalidate_and_clear(self):
+        cache = PageCache(directory=self.tmpdir.name, clock=self.clock)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertIsNone(cache.get("b"))
+
+
+class PageDriver(FakeDriver):
+    """Serves one page and counts page source transfers"""
+    supports_javascript = False
+
+    def __init__(self):
+        self.transfers = 0
+
+    @property
+    def page_source(self):
+        self.transfers += 1
+        return "<html><body><select id='lang'><option value='en'>English</option></select></body></html>"
+
+
+class CachedParseTestCase(unittest.TestCase):
+
+    def test_page_source_is_transferred_once(self):
+        driver = PageDriver()
+        tools = SeleniumTools(driver, page_cache=PageCache())
+        for _ in range(2):
+            self.assertEqual(tools.parse("dropdown", "lang", cached_url="https://example.com/"),
+                             [("English", "en")])
+        self.assertEqual(driver.transfers, 1)
+
+    def test_only_opted_in_urls_are_cached(self):
+        cache = PageCache()
+        tools = SeleniumTools(PageDriver(), page_cache=cache)
+        tools.get("https://example.com/plain")
+        self.assertIsNone(cache.get("https://example.com/plain"))
+        tools.text(cached_url="https://example.com/asked")
+        self.assertIsNotNone(cache.get("https://example.com/asked"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+
+from s_tool.cli import main
+from tests.test_jobs import PageHandler
+
+
+class CliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_enqueue_and_worker(self):
+        with open(self.path("jobs.txt"), "w") as file:
+            file.write(f"{self.base}/a\n# comment\n")
+            file.write(json.dumps({"url": f"{self.base}/b", "text": True}) + "\n")
+
+        queue = f"file://{self.path('queue')}"
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["enqueue", "--queue", queue, self.path("jobs.txt")]), 0)
+            self.assertEqual(main(["worker", "--queue", queue, "--browser", "http",
+                                   "--sink", self.path("results.jsonl"),
+                                   "--idle-timeout", "0.1", "--poll-interval", "0.01",
+                                   "--metrics-interval", "0"]), 0)
+
+        with open(self.path("results.jsonl")) as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual([result["url"] for result in results], [f"{self.base}/a", f"{self.base}/b"])
+        self.assertIn("/b", results[1]["text"])
+        self.assertEqual(json.loads(stderr.getvalue().splitlines()[-1])["completed"], 2)
+
+    def test_run_batch(self):
+        jobs = [json.dumps({"url": f"{self.base}/{page}",
+                            "parse": {"ele_tag": "dropdown", "locator_text": "lang",
+                                      "locator_type": "name"}}) for page in range(4)]
+        jobs.append(json.dumps({"url": f"{self.base}/custom",
+                                "parse": [{"ele_tag": "paragraphs", "locator_text": "body",
+                                           "locator_type": "tag_name"}]}))
+        jobs.append("http://127.0.0.1:9/unreachable")
+        with open(self.path("jobs.jsonl"), "w") as file:
+            file.write("\n".join(jobs))
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(stdout):
+            status = main(["run", self.path("jobs.jsonl"), "--browser", "http",
+                           "--concurrency", "3", "--retries", "1",
+                           "--parser", "tests.test_cli:ParagraphParser"])
+
+        self.assertEqual(status, 1)
+        results = {result["url"]: result for result in map(json.loads, stdout.getvalue().splitlines())}
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[f"{self.base}/0"]["parsed"], [["English", "en"]])
+        self.assertEqual(results[f"{self.base}/custom"]["parsed"], [["/custom"]])
+        self.assertIn("error", results["http://127.0.0.1:9/unreachable"])
+        self.assertRegex(stderr.getvalue(), r"6 jobs: 5 succeeded, 1 failed, 0 unfinished, 1 retried")
+        self.assertIn("p90", stderr.getvalue())
+
+    def test_run_fails_when_sessions_do_not_start(self):
+        with open(self.path("jobs.txt"), "w") as file:
+            file.write(f"{self.base}/a\n{self.base}/b\n")
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), contextlib.redirect_stdout(io.StringIO()):
+            status = main(["run", self.path("jobs.txt"), "--browser", "missing",
+                           "--summary-json"])
+
+        self.assertEqual(status, 1)
+        summary = json.loads(stderr.getvalue().splitlines()[-1])
+        self.assertEqual((summary["succeeded"], summary["failed"], summary["unfinished"]), (0, 2, 0))
+
+
+class ParagraphParser:
+    """Custom parser used by the batch runner test"""
+
+    def paragraphs(self, html_string):
+        from lxml.html import fromstring
+
+        return [paragraph.text for paragraph in fromstring(html_string).iter("p")]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import threading
+import time
+import unittest
+
+from s_tool.concurrency import AdaptiveConcurrency, DomainRateLimiter
+from s_tool.jobs import MemoryQueue
+from s_tool.worker import Worker
+from tests.fakes import FakeClock
+
+
+class DomainRateLimiterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def limiter(self, *args, **kwargs):
+        return DomainRateLimiter(*args, clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_spaces_requests_per_domain(self):
+        limiter = self.limiter(2)
+        delays = [limiter.reserve("https://example.com/page") for _ in range(3)]
+        self.assertEqual(delays, [0.0, 0.5, 1.0])
+        self.assertEqual(limiter.reserve("https://other.org/"), 0.0)
+
+    def test_burst_and_recovery(self):
+        limiter = self.limiter(1, burst=3)
+        self.assertEqual([limiter.reserve("example.com") for _ in range(4)], [0.0, 0.0, 0.0, 1.0])
+        self.clock.now = 10
+        self.assertEqual(limiter.reserve("example.com"), 0.0)
+
+    def test_domain_rates_cover_subdomains(self):
+        limiter = self.limiter(10, rates={"slow.com": 0.5})
+        self.assertEqual(limiter.rate_for("www.slow.com"), 0.5)
+        self.assertEqual(limiter.rate_for("notslow.com"), 10)
+        limiter.wait("https://www.slow.com/a")
+        self.assertEqual(limiter.wait("https://slow.com/b"), 2.0)
+        self.assertEqual(self.clock.now, 2.0)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            DomainRateLimiter(0)
+
+
+class AdaptiveConcurrencyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.load = {"cpu_percent": 10, "memory_percent": 10}
+
+    def controller(self, **kwargs):
+        options = dict(max_sessions=4, interval=1, clock=self.clock, sampler=lambda: self.load)
+        options.update(kwargs)
+        return AdaptiveConcurrency(**options)
+
+    def run_window(self, controller, latency=1.0, error=False, contended=True):
+        slots = controller.limit
+        for _ in range(slots):
+            self.assertTrue(controller.acquire())
+        if contended:
+            self.assertFalse(controller.acquire(timeout=0))
+        for _ in range(slots):
+            controller.release(latency, error)
+        self.clock.now += 1
+        self.assertTrue(controller.acquire())
+        controller.release()
+
+    def test_additive_increase_when_saturated(self):
+        controller = self.controller()
+        for expected in (2, 3, 4, 4):
+            self.run_window(controller)
+            self.assertEqual(controller.limit, expected)
+
+    def test_no_increase_without_demand(self):
+        controller = self.controller()
+        self.run_window(controller, contended=False)
+        self.assertEqual(controller.limit, 1)
+
+    def test_multiplicative_decrease_on_errors(self):
+        controller = self.controller(initial=4)
+        self.run_window(controller, error=True)
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.history[-1][2], "error rate 4/4")
+        self.run_window(controller, error=True)
+        self.run_window(controller, error=True)
+        self.assertEqual(controller.limit, 1)
+
+    def test_decrease_on_latency_and_host_load(self):
+        controller = self.controller(initial=4)
+        self.run_window(controller, latency=1.0)
+        self.assertEqual(controller.limit, 4)
+        self.run_window(controller, latency=3.0)
+        self.assertEqual(controller.limit, 2)
+        self.assertEqual(controller.baseline, 1.0)
+
+        self.load["memory_percent"] = 95
+        self.run_window(controller, latency=1.0)
+        self.assertEqual(controller.limit, 1)
+        self.assertIn("host memory", controller.history[-1][2])
+
+    def test_target_latency(self):
+        controller = self.controller(initial=2, target_latency=0.5)
+        self.run_window(controller, latency=1.2)
+        self.assertEqual(controller.limit, 1)
+
+    def test_slot_records_failures(self):
+        controller = self.controller()
+        with self.assertRaises(RuntimeError):
+            with controller.slot("https://example.com"):
+                raise RuntimeError("boom")
+        stats = controller.stats()
+        self.assertEqual((stats["active"], stats["completed"], stats["errors"]), (0, 1, 1))
+
+    def test_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrency(min_sessions=3, max_sessions=2, sampler=False)
+
+
+class Tools:
+    """Stands in for a SeleniumTools session"""
+
+    def __init__(self, log):
+        self.log = log
+        log.append("open")
+
+    def get(self, url):
+        self.current_url = url
+        time.sleep(0.01)
+
+    def url(self):
+        return self.current_url
+
+    def __exit__(self, *exc):
+        self.log.append("close")
+
+
+class WorkerControllerTestCase(unittest.TestCase):
+
+    def test_controller_bounds_active_sessions(self):
+        log = []
+        active = []
+        lock = threading.Lock()
+        queue = MemoryQueue({"url": f"https://example.com/{page}"} for page in range(6))
+        controller = AdaptiveConcurrency(max_sessions=3, interval=3600, sampler=False,
+                                         rate_limiter=DomainRateLimiter(1000))
+
+        def sink(result):
+            with lock:
+                active.append(controller.active)
+
+        worker = Worker(queue, sink, sessions=3, tools_factory=lambda: Tools(log),
+                        poll_interval=0.01, metrics_interval=0, controller=controller)
+        metrics = worker.run(idle_timeout=0)
+
+        self.assertEqual(metrics["completed"], 6)
+        self.assertEqual(max(active), 1)
+        self.assertEqual(log.count("open"), log.count("close"))
+        self.assertEqual(metrics["concurrency"]["completed"], 6)
+
+    def test_latency_excludes_throttling_and_launch(self):
+        queue = MemoryQueue({"url": f"https://example.com/{page}"} for page in range(3))
+        controller = AdaptiveConcurrency(max_sessions=1, interval=3600, sampler=False,
+                                         rate_limiter=DomainRateLimiter(20))
+
+        def slow_launch():
+            time.sleep(0.2)
+            return Tools([])
+
+        Worker(queue, lambda result: None, tools_factory=slow_launch, poll_interval=0.01,
+               metrics_interval=0, controller=controller).run(idle_timeout=0)
+
+        self.assertEqual(controller.completed, 3)
+        # every job waited 0.05s for the rate limit, the first one 0.2s for its browser
+        self.assertLess(max(controller._latencies), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from s_tool.cookies import domain_matches, to_cdp, to_document_cookie
+from s_tool.core import SeleniumTools
+from tests.fakes import FakeDriver
+
+
+class CookieDriver(FakeDriver):
+    """Minimal driver recording the WebDriver calls made by SeleniumTools"""
+
+    current_url = "https://www.example.com/"
+
+    def __init__(self, cookies=None, cdp=True):
+        self._cookies = cookies or []
+        self.calls = []
+        if cdp:
+            self.execute_cdp_cmd = self._execute_cdp_cmd
+
+    def get(self, url):
+        pass  # stays on the page of the cookies
+
+    def get_cookies(self):
+        self.calls.append(("get_cookies",))
+        return [dict(cookie) for cookie in self._cookies]
+
+    def delete_all_cookies(self):
+        self.calls.append(("delete_all_cookies",))
+
+    def add_cookie(self, cookie):
+        self.calls.append(("add_cookie", cookie))
+
+    def delete_cookie(self, name):
+        self.calls.append(("delete_cookie", name))
+
+    def execute_script(self, script, *args):
+        self.calls.append(("execute_script", args))
+
+    def _execute_cdp_cmd(self, cmd, params):
+        self.calls.append((cmd, params))
+
+
+SESSION = [
+    {"name": "sid", "value": "1", "domain": ".example.com", "path": "/",
+     "secure": True, "httpOnly": True, "expiry": 2000000000, "sameSite": "Lax"},
+    {"name": "theme", "value": "dark", "domain": "www.example.com", "path": "/"},
+    {"name": "ads", "value": "x", "domain": ".tracker.net", "path": "/"},
+]
+
+
+class CookieHelpersTestCase(unittest.TestCase):
+
+    def test_domain_matches(self):
+        self.assertTrue(domain_matches(".example.com", "www.example.com"))
+        self.assertTrue(domain_matches("example.com", "example.com"))
+        self.assertFalse(domain_matches("example.com", "badexample.com"))
+        self.assertFalse(domain_matches(None, "example.com"))
+        self.assertTrue(domain_matches("example.com", "example.com", host_only=True))
+        self.assertFalse(domain_matches("example.com", "www.example.com", host_only=True))
+
+    def test_to_cdp(self):
+        param = to_cdp(SESSION[0])
+        self.assertEqual(param["expires"], 2000000000)
+        self.assertTrue(param["httpOnly"])
+        self.assertEqual(to_cdp({"name": "a", "value": "b"}, "https://x.com/"),
+                         {"name": "a", "value": "b", "url": "https://x.com/"})
+
+    def test_to_document_cookie(self):
+        self.assertEqual(
+            to_document_cookie(SESSION[1]),
+            "theme=dark; path=/; domain=www.example.com")
+        self.assertIn("expires=Wed, 18 May 2033 03:33:20 GMT",
+                      to_document_cookie(SESSION[0]))
+
+
+class BulkCookiesTestCase(unittest.TestCase):
+
+    def test_cookies_full_and_domain_filter(self):
+        tools = SeleniumTools(driver=CookieDriver(SESSION))
+        self.assertEqual(tools.cookies(domain="www.example.com"),
+                         {"sid": "1", "theme": "dark"})
+        full = tools.cookies(full=True, domain="tracker.net")
+        self.assertEqual(full, [SESSION[2]])
+
+    def test_set_cookies_bulk_uses_single_cdp_call(self):
+        driver = CookieDriver(SESSION)
+        tools = SeleniumTools(driver=driver)
+        tools.set_cookies_bulk(SESSION, drop_keys=["ads"])
+
+        self.assertEqual([call[0] for call in driver.calls],
+                         ["get_cookies", "Network.setCookies"])
+        sent = driver.calls[1][1]["cookies"]
+        self.assertEqual(len(sent), 4)
+        self.assertEqual(sent[0]["expires"], 1)
+
+    def test_set_cookies_without_cdp(self):
+        driver = CookieDriver(cdp=False)
+        tools = SeleniumTools(driver=driver)
+        tools.set_cookies_bulk(SESSION, domain="www.example.com")
+
+        self.assertEqual([call[0] for call in driver.calls],
+                         ["execute_script", "add_cookie"])
+        self.assertEqual(driver.calls[0][1][0],
+                         ["theme=dark; path=/; domain=www.example.com"])
+        self.assertEqual(driver.calls[1][1]["name"], "sid")
+
+    def test_set_cookies_keyword_arguments(self):
+        driver = CookieDriver()
+        tools = SeleniumTools(driver=driver)
+        tools.set_cookies(drop_all=True, foo="bar", count=1)
+
+        self.assertEqual(driver.calls[0], ("delete_all_cookies",))
+        self.assertEqual(
+            driver.calls[1][1]["cookies"],
+            [{"name": "foo", "value": "bar", "url": CookieDriver.current_url},
+             {"name": "count", "value": "1", "url": CookieDriver.current_url}])
+
+
+if __name__ == "__main__":
+    unittest.main()
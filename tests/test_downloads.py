@@ -0,0 +1,245 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool.core import SeleniumTools
+from s_tool.downloads import DirectoryWatcher, DownloadManager, make_download_manager
+from s_tool.driver import SeleniumDriver
+from s_tool.exceptions import SToolException
+from tests.fakes import ELEMENT_KEY, FakeExecutor
+
+ROWS = [["id", "name"]] + [[str(n), f"item {n}"] for n in range(1000)]
+CSV = "".join(",".join(row) + "\r\n" for row in ROWS).encode()
+
+
+def chrome_download(directory, name, content=CSV, delay=0.05):
+    """Writes a file the way chrome does: a .crdownload renamed at the end"""
+    partial = os.path.join(directory, name + ".crdownload")
+    with open(partial, "wb") as file:
+        for start in range(0, len(content), 4096):
+            file.write(content[start:start + 4096])
+            file.flush()
+            time.sleep(delay / 4)
+    time.sleep(delay)
+    os.rename(partial, os.path.join(directory, name))
+
+
+def firefox_download(directory, name, content=CSV, delay=0.05):
+    """Writes a file the way firefox does: an empty placeholder and a .part file"""
+    open(os.path.join(directory, name), "wb").close()
+    partial = os.path.join(directory, name + ".part")
+    with open(partial, "wb") as file:
+        file.write(content[:100])
+        file.flush()
+        time.sleep(delay)
+        file.write(content[100:])
+    os.replace(partial, os.path.join(directory, name))
+
+
+def in_background(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+class DownloadManagerTestCase(unittest.TestCase):
+
+    def manager(self, **kwargs):
+        manager = DownloadManager(**kwargs)
+        self.addCleanup(manager.close)
+        return manager
+
+    def test_inotify_detects_renamed_download(self):
+        manager = self.manager(settle=60)
+        if not manager.watcher.inotify:
+            self.skipTest("inotify is not available")
+        with manager.expect(timeout=10) as expectation:
+            thread = in_background(chrome_download, manager.directory, "report.csv")
+        thread.join()
+
+        download = expectation.download
+        self.assertEqual(download.name, "report.csv")
+        self.assertEqual(download.size, len(CSV))
+        self.assertEqual(list(download.rows()), ROWS)
+        self.assertEqual(manager.stats()["watcher"], "inotify")
+
+    def test_polling_waits_for_partial_files(self):
+        manager = self.manager(inotify=False, settle=0.2, poll_interval=0.02)
+        self.assertEqual(manager.stats()["watcher"], "polling")
+        thread = in_background(firefox_download, manager.directory, "report.csv", CSV, 0.5)
+        downloads = manager.wait(timeout=10)
+        thread.join()
+        self.assertEqual(downloads[0].size, len(CSV))
+        self.assertEqual(b"".join(downloads[0].stream(1000)), CSV)
+
+    def test_concurrent_downloads_are_claimed_once(self):
+        manager = self.manager(settle=0.2, poll_interval=0.05)
+        results = []
+
+        def waiter():
+            results.extend(manager.wait(timeout=10))
+
+        waiters = [in_background(waiter) for _ in range(3)]
+        writers = [in_background(chrome_download, manager.directory, f"export-{n}.csv")
+                   for n in range(3)]
+        for thread in waiters + writers:
+            thread.join()
+
+        self.assertEqual(sorted(download.name for download in results),
+                         ["export-0.csv", "export-1.csv", "export-2.csv"])
+        self.assertEqual(manager.stats()["completed"], 3)
+        self.assertEqual(manager.stats()["bytes"], 3 * len(CSV))
+
+    def test_expect_ignores_existing_files(self):
+        manager = self.manager(settle=0.1, poll_interval=0.02)
+        with open(os.path.join(manager.directory, "old.csv"), "wb") as file:
+            file.write(b"old")
+        with manager.expect(pattern="*.csv", timeout=10) as expectation:
+            with open(os.path.join(manager.directory, "notes.txt"), "wb") as file:
+                file.write(b"other")
+            chrome_download(manager.directory, "new.csv")
+        self.assertEqual([download.name for download in expectation.downloads], ["new.csv"])
+
+    def test_same_name_after_move(self):
+        manager = self.manager(settle=0.1, poll_interval=0.02)
+        with tempfile.TemporaryDirectory() as target:
+            for export in range(2):
+                with manager.expect(timeout=10) as expectation:
+                    chrome_download(manager.directory, "report.csv", b"export %d" % export)
+                expectation.download.move(os.path.join(target, f"report-{export}.csv"))
+            with open(os.path.join(target, "report-1.csv"), "rb") as file:
+                self.assertEqual(file.read(), b"export 1")
+
+    def test_timeout_reports_pending_downloads(self):
+        manager = self.manager(poll_interval=0.02)
+        open(os.path.join(manager.directory, "big.zip.crdownload"), "wb").close()
+        self.assertEqual(manager.pending(), [("big.zip.crdownload", 0)])
+        with self.assertRaisesRegex(SToolException, "DOWNLOAD_TIMEOUT: 0 of 1.*big.zip.crdownload"):
+            manager.wait(timeout=0.1)
+
+    def test_hand_off_and_move(self):
+        manager = self.manager(settle=0)
+        with open(os.path.join(manager.directory, "data.csv"), "wb") as file:
+            file.write(CSV)
+        download = manager.wait(timeout=5)[0]
+
+        sink = io.BytesIO()
+        self.assertIsNone(download.hand_off(sink, chunk_size=1024))
+        self.assertEqual(sink.getvalue(), CSV)
+        self.assertEqual(download.hand_off(lambda file: sum(1 for _ in file)), len(ROWS))
+
+        with tempfile.TemporaryDirectory() as target:
+            download.move(target)
+            self.assertEqual(download.path, os.path.join(target, "data.csv"))
+            self.assertTrue(os.path.exists(download.path))
+
+    def test_temporary_directory_is_removed(self):
+        manager = make_download_manager(True)
+        self.assertTrue(manager.temporary)
+        manager.close()
+        self.assertFalse(os.path.exists(manager.directory))
+
+        with tempfile.TemporaryDirectory() as directory:
+            manager = make_download_manager(directory)
+            manager.close()
+            self.assertTrue(os.path.isdir(directory))
+        self.assertIsNone(make_download_manager(None))
+
+
+class DirectoryWatcherTestCase(unittest.TestCase):
+
+    def test_events(self):
+        with tempfile.TemporaryDirectory() as directory:
+            watcher = DirectoryWatcher(directory)
+            self.addCleanup(watcher.close)
+            if not watcher.inotify:
+                self.skipTest("inotify is not available")
+            self.assertEqual(watcher.wait(0), set())
+            with open(os.path.join(directory, "a.part"), "wb") as file:
+                file.write(b"a")
+            os.rename(os.path.join(directory, "a.part"), os.path.join(directory, "a"))
+            self.assertEqual(watcher.wait(1), {"a.part", "a"})
+
+    def test_polling_fallback(self):
+        with tempfile.TemporaryDirectory() as directory:
+            watcher = DirectoryWatcher(directory, inotify=False)
+            self.assertFalse(watcher.inotify)
+            self.assertIsNone(watcher.wait(0))
+
+
+class DriverPreferencesTestCase(unittest.TestCase):
+
+    def test_download_directory(self):
+        driver = SeleniumDriver(browser="chrome", download_dir="/tmp/exports")
+        prefs = driver._get_chrome_options().experimental_options["prefs"]
+        self.assertEqual(prefs["download.default_directory"], "/tmp/exports")
+        self.assertFalse(prefs["download.prompt_for_download"])
+
+        options = SeleniumDriver(browser="firefox", download_dir="/tmp/exports")._get_firefox_options()
+        self.assertEqual(options.preferences["browser.download.dir"], "/tmp/exports")
+        self.assertEqual(options.preferences["browser.download.folderList"], 2)
+
+        self.assertNotIn("prefs", SeleniumDriver(browser="chrome")._get_chrome_options().experimental_options)
+
+
+class ExportExecutor(FakeExecutor):
+    """Starts a chrome style download when the export button is clicked"""
+
+    def __init__(self):
+        super().__init__()
+        self.directory = None
+        self.threads = []
+
+    def respond(self, command, params):
+        if command == "findElement":
+            return {ELEMENT_KEY: "export"}
+        if command in ("w3cExecuteScript", "isElementEnabled"):
+            return True
+        if command == "clickElement":
+            self.threads.append(in_background(chrome_download, self.directory, "export.csv"))
+        return super().respond(command, params)
+
+
+class SeleniumToolsDownloadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ExportExecutor()
+        self.tools = SeleniumTools(driver=WebDriver(command_executor=self.executor), downloads=True)
+        self.executor.directory = self.tools.downloads.directory
+
+    def tearDown(self):
+        for thread in self.executor.threads:
+            thread.join()
+        self.tools._close()
+        self.assertFalse(os.path.exists(self.executor.directory))
+
+    def test_click_and_wait(self):
+        download = self.tools.download("export", timeout=10)
+        self.assertEqual(download.name, "export.csv")
+        self.assertEqual(download.size, len(CSV))
+
+    def test_streaming_sink(self):
+        sink = io.BytesIO()
+        self.tools.download("export", timeout=10, sink=sink)
+        self.assertEqual(sink.getvalue(), CSV)
+
+    def test_remote_sessions_are_rejected(self):
+        with self.assertRaisesRegex(SToolException, "DOWNLOADS_NOT_SUPPORTED"):
+            SeleniumTools(browser="remote", command_executor="http://127.0.0.1:9", downloads=True)
+        with self.assertRaisesRegex(ValueError, "download_dir"):
+            SeleniumDriver(browser="remote", command_executor="http://127.0.0.1:9",
+                           download_dir="/tmp/exports").load_driver()
+
+    def test_downloads_not_configured(self):
+        tools = SeleniumTools(driver=WebDriver(command_executor=ExportExecutor()))
+        with self.assertRaisesRegex(SToolException, "DOWNLOADS_NOT_CONFIGURED"):
+            tools.download("export")
+
+
+if __name__ == "__main__":
+    unittest.main()
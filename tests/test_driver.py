@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib3.exceptions import MaxRetryError
+
+from s_tool.driver import PooledRemoteConnection, SeleniumDriver
+
+
+class FakeGridHandler(BaseHTTPRequestHandler):
+    """Answers the WebDriver commands used in the tests like a grid node"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, value):
+        self.server.clients.add(self.client_address)
+        self.server.commands.append((self.command, self.path))
+        body = json.dumps({"value": value}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up waiting
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path == "/session":
+            self._reply({"sessionId": "grid-1",
+                         "capabilities": {"browserName": "chrome"}})
+        elif self.path.endswith("/url"):
+            self.server.url = body["url"]
+            self._reply(None)
+        else:
+            self._reply(None)
+
+    def do_GET(self):
+        if self.path.endswith("/url"):
+            self._reply(self.server.url)
+        elif self.path.endswith("/title"):
+            time.sleep(self.server.title_delay)
+            self._reply("")
+        else:
+            self._reply(None)
+
+    def do_DELETE(self):
+        self._reply(None)
+
+
+class RemoteDriverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGridHandler)
+        self.server.clients = set()
+        self.server.commands = []
+        self.server.url = "about:blank"
+        self.server.title_delay = 0
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.executor_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def test_remote_session_reuses_connection(self):
+        driver = SeleniumDriver(browser="remote", headless=True,
+                                command_executor=self.executor_url,
+                                pool_size=2).load_driver()
+        for page in range(5):
+            driver.get(f"https://example.com/{page}")
+        self.assertEqual(driver.current_url, "https://example.com/4")
+        driver.quit()
+
+        self.assertEqual(self.server.commands[0], ("POST", "/session"))
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_sessions_share_pool(self):
+        first = PooledRemoteConnection(self.executor_url, pool_size=3)
+        second = PooledRemoteConnection(self.executor_url, pool_size=3)
+        other = PooledRemoteConnection(self.executor_url, pool_size=4)
+        self.assertIs(first._conn, second._conn)
+        self.assertIsNot(first._conn, other._conn)
+        self.assertEqual(first._conn.connection_pool_kw["maxsize"], 3)
+
+    def test_command_timeout(self):
+        self.server.title_delay = 1
+        driver = SeleniumDriver(browser="remote",
+                                command_executor=self.executor_url,
+                                command_timeout=0.2).load_driver()
+        with self.assertRaises(MaxRetryError):
+            driver.title
+
+    def test_remote_requires_executor(self):
+        with self.assertRaises(ValueError):
+            SeleniumDriver(browser="remote").load_driver()
+
+
+if __name__ == "__main__":
+    unittest.main()
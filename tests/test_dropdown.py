@@ -0,0 +1,171 @@
+import unittest
+from urllib.parse import quote
+
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool import scripts
+from s_tool.core import SeleniumTools
+from s_tool.dropdown import BY_INDEX, BY_TEXT, OptionIndex
+from s_tool.exceptions import SToolException
+from s_tool.http_backend import HttpDriver
+from s_tool.parser import fromstring, parse_options
+from tests.fakes import ELEMENT_KEY, FakeExecutor
+
+COUNTRIES = "".join(f"<option value='c{n}'>Country {n}</option>" for n in range(10000))
+
+SELECT = f"""<select name="country">{COUNTRIES}<option value="x" disabled>Closed</option></select>"""
+
+MULTI = """<select name="lang" multiple>
+    <optgroup label="Europe"><option value="en">English</option><option value="fr"> French </option></optgroup>
+    <option>Other</option><option value="en">English (US)</option>
+</select>"""
+
+
+class OptionIndexTestCase(unittest.TestCase):
+
+    def test_parse_options(self):
+        options = parse_options(MULTI)
+        self.assertEqual(options, [("en", "English", False), ("fr", "French", False),
+                                   ("Other", "Other", False), ("en", "English (US)", False)])
+
+    def test_lookup(self):
+        index = OptionIndex.from_html(SELECT)
+        self.assertEqual(len(index), 10001)
+        self.assertFalse(index.multiple)
+        self.assertEqual(index.lookup("c9999"), [9999])
+        self.assertEqual(index.lookup("Country  42", BY_TEXT), [42])
+        self.assertEqual(index.lookup(3, BY_INDEX), [3])
+        with self.assertRaisesRegex(NoSuchElementException, "value: c10000"):
+            index.lookup("c10000")
+        with self.assertRaises(NotImplementedError):
+            index.lookup("x")
+
+    def test_multi_select_matches_every_option(self):
+        index = OptionIndex.from_html(MULTI)
+        self.assertTrue(index.multiple)
+        self.assertEqual(index.resolve(["en", "fr", "en"]), [0, 3, 1])
+
+
+class SelectExecutor(FakeExecutor):
+    """Serves one select element and applies the select script"""
+
+    def __init__(self, html):
+        super().__init__()
+        self.html = html
+        self.options = parse_options(html)
+        self.selected = []
+
+    def respond(self, command, params):
+        if command == "findElement":
+            return {ELEMENT_KEY: "select-1"}
+        if command == "getElementTagName":
+            return "select"
+        if command == "getElementProperty":
+            return self.html
+        if command == "w3cExecuteScript":
+            self.commands[-1] = "select"
+            assert params["script"] == scripts.SELECT_SCRIPT
+            element, indices, values = params["args"]
+            assert element == {ELEMENT_KEY: "select-1"}
+            current = [self.options[index][0] if index < len(self.options) else None for index in indices]
+            if current != values:
+                return False
+            self.selected.append(indices)
+            return True
+        return super().respond(command, params)
+
+
+class IndexedSelectTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = SelectExecutor(SELECT)
+        self.tools = SeleniumTools(driver=WebDriver(command_executor=self.executor))
+        self.element = self.tools.get_element("country", "name")
+
+    def test_repeated_selects_reuse_the_index(self):
+        self.executor.commands.clear()
+        self.tools.select_option(self.element, "c9000")
+        self.tools.select_option(self.element, "Country 17", _by=1)
+        self.tools.select_option(self.element, 5, _by=2)
+
+        self.assertEqual(self.executor.selected, [[9000], [17], [5]])
+        self.assertEqual(self.executor.commands.count("getElementProperty"), 1)
+        self.assertEqual(self.executor.commands.count("select"), 3)
+
+    def test_changed_options_are_indexed_again(self):
+        self.tools.select_option(self.element, "c1")
+        self.executor.options = [("new", "New", False)] + self.executor.options
+        self.executor.html = SELECT.replace("<option", "<option value='new'>New</option><option", 1)
+        self.tools.select_option(self.element, "c1")
+        self.assertEqual(self.executor.selected, [[1], [2]])
+        self.assertEqual(self.executor.commands.count("getElementProperty"), 2)
+
+    def test_options_added_after_indexing(self):
+        # a dependent dropdown gets its options after the first selection
+        self.tools.select_option(self.element, "c1")
+        self.executor.options = self.executor.options + [("late", "Late", False)]
+        self.executor.html = SELECT.replace("</select>", "<option value='late'>Late</option></select>")
+        self.tools.select_option(self.element, "late")
+        self.assertEqual(self.executor.selected, [[1], [10001]])
+        self.assertEqual(self.executor.commands.count("getElementProperty"), 2)
+
+    def test_options_changing_under_the_select(self):
+        self.executor.options = []
+        with self.assertRaisesRegex(SToolException, "OPTIONS_CHANGED"):
+            self.tools.select_option(self.element, "c1")
+
+    def test_navigation_drops_the_index(self):
+        self.tools.option_index(self.element)
+        self.tools.get("https://example.com")
+        self.assertEqual(self.tools._option_indexes, {})
+
+    def test_invalid_values(self):
+        with self.assertRaises(SToolException):
+            self.tools.select_option(self.element, ["1"], _by=2)
+        with self.assertRaises(NoSuchElementException):
+            self.tools.select_option(self.element, "missing")
+
+
+class MultiSelectTestCase(unittest.TestCase):
+
+    def test_batch_selection(self):
+        executor = SelectExecutor(MULTI)
+        tools = SeleniumTools(driver=WebDriver(command_executor=executor))
+        tools.fill({"lang": ["en", "fr"]})
+        self.assertEqual(executor.selected, [[0, 3, 1]])
+
+
+class HttpSelectTestCase(unittest.TestCase):
+
+    def test_driver_without_javascript(self):
+        tools = SeleniumTools(driver=HttpDriver())
+        try:
+            tools.get("data:text/html," + quote(f"<form>{MULTI}</form>"))
+            tools.fill({"lang": ["fr", "Other"]})
+            selected = [option.get_attribute("value") for option in
+                        tools.get_element("option", "tag_name", many=True) if option.is_selected()]
+            self.assertEqual(selected, ["fr", "Other"])
+        finally:
+            tools._close()
+
+    def test_changed_options_without_javascript(self):
+        tools = SeleniumTools(driver=HttpDriver())
+        try:
+            tools.get("data:text/html," + quote(f"<form>{MULTI}</form>"))
+            select = tools.get_element("lang", "name")
+            tools.select_option(select, "fr")
+
+            tree = select.element
+            tree.remove(tree.find("optgroup"))
+            tree.append(fromstring("<option value='de'>German</option>"))
+            tools.select_option(select, ["Other", "de"])
+            selected = [option.get_attribute("value") for option in
+                        tools.get_element("option", "tag_name", many=True) if option.is_selected()]
+            self.assertEqual(selected, ["Other", "de"])
+        finally:
+            tools._close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool.core import SeleniumTools
+from s_tool.elements import CachedElement, ElementCache
+from tests.fakes import ELEMENT_KEY, FakeExecutor
+
+
+class DocumentExecutor(FakeExecutor):
+    """Browser whose element references go stale when the document is replaced"""
+
+    def __init__(self):
+        super().__init__()
+        self.document = 0
+        self.finds = 0
+        self.rows = 2
+        self.removed = set()
+        self.clicks = []
+
+    def check(self, element_id):
+        """Raises like a browser for a reference to a replaced document"""
+        if not element_id.startswith(f"doc{self.document}-"):
+            raise StaleElementReferenceException("stale element reference")
+
+    def respond(self, command, params):
+        if command == "get":
+            self.document += 1
+        if command in ("findElement", "findElements"):
+            self.finds += 1
+            if params["value"] in self.removed:
+                if command == "findElements":
+                    return []
+                raise NoSuchElementException(params["value"])
+            element = {ELEMENT_KEY: f"doc{self.document}-{params['value']}"}
+            return element if command == "findElement" else [element] * self.rows
+        if command == "getElementText":
+            self.check(params["id"])
+            document, _, name = params["id"].partition("-")
+            return f"{name} on {document}"
+        if command == "w3cExecuteScript":
+            for arg in params["args"]:
+                if isinstance(arg, dict) and ELEMENT_KEY in arg:
+                    self.check(arg[ELEMENT_KEY])
+            return True
+        if command == "isElementEnabled":
+            self.check(params["id"])
+            return True
+        if command == "clickElement":
+            self.check(params["id"])
+            self.clicks.append(params["id"])
+        return super().respond(command, params)
+
+
+class ElementCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = DocumentExecutor()
+        self.tools = SeleniumTools(driver=WebDriver(command_executor=self.executor),
+                                   element_cache=True)
+        self.tools.get("https://example.com/")
+        self.executor.finds = 0
+
+    def test_repeated_lookups_are_cached(self):
+        first = self.tools.get_element("input", "tag_name")
+        second = self.tools.get_element("input", "tag_name")
+        self.assertIs(first, second)
+        self.assertIsInstance(first, CachedElement)
+        self.assertEqual(self.executor.finds, 1)
+        self.assertEqual(self.tools.element_cache.stats()["hits"], 1)
+
+    def test_navigation_clears_cache(self):
+        self.tools.get_element("input", "tag_name")
+        self.tools.get("https://example.com/next")
+        self.assertEqual(self.tools.get_element("input", "tag_name").text, "input on doc3")
+        self.assertEqual(self.executor.finds, 2)
+
+    def test_stale_element_is_refetched(self):
+        element = self.tools.get_element("input", "tag_name")
+        self.executor.document += 1  # the page replaced its document
+        self.assertEqual(element.text, "input on doc3")
+        self.assertEqual(self.executor.finds, 2)
+
+    def test_click_refetches_a_replaced_element(self):
+        self.tools.get_element("button", "tag_name")
+        self.executor.document += 1
+        self.assertTrue(self.tools.click("button", "tag_name"))
+        self.assertEqual(self.executor.clicks, [f"doc{self.executor.document}-button"])
+
+    def test_click_on_a_removed_element_returns_false(self):
+        self.tools.get_element("button", "tag_name")
+        self.executor.document += 1
+        self.executor.removed.add("button")
+        self.assertFalse(self.tools.click("button", "tag_name", click_time=0.2))
+        self.assertIsNone(self.tools.element_cache.get(("TAG_NAME", "button", False)))
+
+    def test_lists_are_not_cached(self):
+        self.assertEqual(len(self.tools.get_element("tr", "tag_name", many=True)), 2)
+        self.executor.rows = 3  # a script appended a row
+        rows = self.tools.get_element("tr", "tag_name", many=True)
+        self.assertEqual(len(rows), 3)
+        self.executor.document += 1  # a click loaded a new document
+        self.assertEqual(self.tools.get_element("tr", "tag_name", many=True)[2].text, "tr on doc3")
+        self.assertEqual(self.executor.finds, 3)
+
+    def test_lru_bound(self):
+        cache = ElementCache(max_entries=2)
+        for key in "abc":
+            cache.set(key, [key], lambda: [])
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), ["c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
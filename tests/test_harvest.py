@@ -0,0 +1,52 @@
+import unittest
+
+from s_tool.core import SeleniumTools
+from tests.fakes import FakeDriver
+
+
+class FakeListing:
+    """Returns the new items of each step like the harvest script"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = []
+
+    def __call__(self, handle, is_xpath, expression, marker, as_html, scroll):
+        self.calls.append((expression, scroll))
+        return self.batches.pop(0) if self.batches else []
+
+
+class HarvestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tools = SeleniumTools(driver=FakeDriver())
+
+    def test_scroll_until_idle(self):
+        self.tools.call_script = FakeListing([[1, 2], [3], [], [4], [], []])
+        batches = list(self.tools.harvest(".item", pause=0, idle_steps=2))
+        self.assertEqual(batches, [[1, 2], [3], [4]])
+        self.assertTrue(all(scroll for _, scroll in self.tools.call_script.calls))
+
+    def test_max_items(self):
+        self.tools.call_script = FakeListing([[1, 2], [3, 4], [5]])
+        batches = list(self.tools.harvest(".item", pause=0, max_items=3))
+        self.assertEqual(batches, [[1, 2], [3]])
+
+    def test_next_button_pagination(self):
+        clicks = []
+
+        def click(locator_text, locator_type):
+            clicks.append(locator_text)
+            return len(clicks) < 3
+
+        self.tools.click = click
+        self.tools.call_script = FakeListing([["a"], ["b"], ["c"], ["d"]])
+        batches = list(self.tools.harvest("row", "class_name", next_locator="next", pause=0))
+
+        self.assertEqual(batches, [["a"], ["b"], ["c"]])
+        self.assertEqual(clicks, ["next", "next", "next"])
+        self.assertEqual(self.tools.call_script.calls[0], ('[class~="row"]', False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+from s_tool.backends import backend_names, get_backend, register_backend
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import SToolException
+from s_tool.http_backend import HttpDriver
+
+PAGES = {
+    "/": """<html><head><title>Home</title></head><body>
+        <a id="next" href="/next">Next page</a>
+        <form id="search" action="/search">
+            <input name="q" value="">
+            <select name="lang"><option value="en">English</option>
+            <option value="fr">French</option></select>
+            <input type="submit" name="go" value="Search">
+        </form>
+        <form id="login" method="post" action="/login">
+            <input name="user"><input type="checkbox" name="remember" value="1">
+            <button type="submit">Log in</button>
+        </form>
+        </body></html>""",
+    "/next": "<html><head><title>Next</title></head><body><p class='msg'>second</p></body></html>",
+}
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body="", headers=()):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        parts = urlparse(self.path)
+        if parts.path == "/search":
+            query = dict(parse_qsl(parts.query))
+            self._reply(200, f"<html><body><p id='result'>{sorted(query.items())}</p></body></html>")
+        elif parts.path == "/redirect":
+            self._reply(302, headers=[("Location", "/next"),
+                                      ("Set-Cookie", "session=abc; Path=/; HttpOnly")])
+        elif parts.path == "/echo-cookies":
+            cookies = self.headers.get("Cookie", "")
+            self._reply(200, f"<html><body><p id='cookies'>{cookies}</p></body></html>")
+        elif parts.path in PAGES:
+            self._reply(200, PAGES[parts.path])
+        else:
+            self._reply(404, "<html><body>missing</body></html>")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = dict(parse_qsl(self.rfile.read(length).decode("utf-8")))
+        self._reply(303, headers=[("Location", "/echo-cookies"),
+                                  ("Set-Cookie", f"user={form.get('user')}; Path=/"),
+                                  ("Set-Cookie", f"remember={form.get('remember', 'no')}; Path=/")])
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HttpBackendTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tools = SeleniumTools(browser="http")
+        self.tools.__enter__()
+
+    def tearDown(self):
+        self.tools.driver.quit()
+
+    def test_get_text_and_elements(self):
+        self.tools.get(self.base + "/")
+        self.assertEqual(self.tools.url(), self.base + "/")
+        self.assertEqual(self.tools.driver.title, "Home")
+        self.assertIn("Next page", self.tools.text())
+        self.assertEqual(self.tools.get_element("next").text, "Next page")
+        self.assertEqual(len(self.tools.get_element("input", "tag_name", many=True)), 4)
+        self.assertEqual(self.tools.get_element("#login input[type=checkbox]", "css_selector")
+                         .get_attribute("name"), "remember")
+        self.assertEqual(self.tools.parse("dropdown", "lang", "name"),
+                         [("English", "en"), ("French", "fr")])
+
+    def test_click_link_and_stale_elements(self):
+        self.tools.get(self.base + "/")
+        link = self.tools.get_element("next")
+        self.assertTrue(self.tools.click("next"))
+        self.assertEqual(self.tools.url(), self.base + "/next")
+        self.assertEqual(self.tools.get_element("msg", "class_name").text, "second")
+        with self.assertRaises(StaleElementReferenceException):
+            link.text
+
+    def test_fill_and_submit_get_form(self):
+        self.tools.get(self.base + "/")
+        self.tools.fill({"q": "lxml"})
+        self.tools.driver.find_element("xpath", "//option[@value='fr']").click()
+        self.tools.click("go", "name")
+        self.assertEqual(self.tools.get_element("result").text,
+                         "[('go', 'Search'), ('lang', 'fr'), ('q', 'lxml')]")
+
+    def test_post_form_redirect_and_cookies(self):
+        self.tools.get(self.base + "/")
+        self.tools.fill({"user": "ada"})
+        self.tools.driver.find_element("name", "remember").click()
+        self.tools.driver.find_element("xpath", "//form[@id='login']//button").click()
+
+        self.assertEqual(self.tools.url(), self.base + "/echo-cookies")
+        self.assertEqual(self.tools.get_element("cookies").text, "user=ada; remember=1")
+        self.assertEqual(self.tools.cookies(), {"user": "ada", "remember": "1"})
+
+    def test_redirect_stores_cookies_and_set_cookies(self):
+        self.tools.get(self.base + "/redirect")
+        self.assertEqual(self.tools.url(), self.base + "/next")
+        self.assertEqual(self.tools.cookies(full=True)[0]["httpOnly"], True)
+
+        self.tools.set_cookies(drop_keys=["session"], theme="dark")
+        self.tools.get(self.base + "/echo-cookies")
+        self.assertEqual(self.tools.get_element("cookies").text, "theme=dark")
+
+    def test_host_only_cookies(self):
+        driver = HttpDriver()
+        driver._store_cookies("http://example.com/", ["host=1; Path=/", "wide=1; Domain=example.com"])
+        driver.add_cookie({"name": "added", "value": "1", "domain": "example.com"})
+        self.assertEqual(driver._cookie_header("http://example.com/"), "host=1; wide=1; added=1")
+        self.assertEqual(driver._cookie_header("http://www.example.com/"), "wide=1")
+        driver.quit()
+
+    def test_html_content_and_no_javascript(self):
+        self.tools.get("<html><body><p id='x'>inline</p></body></html>")
+        self.assertEqual(self.tools.get_element("x").text, "inline")
+        with self.assertRaises(SToolException):
+            self.tools.driver.execute_script("return 1")
+
+    def test_inline_styles_hide_elements(self):
+        self.tools.get("<html><body>"
+                       "<p id='shown'>shown</p>"
+                       "<p id='none' style='color: red; DISPLAY : None'>none</p>"
+                       "<div style='visibility:hidden'><p id='inherited'>x</p>"
+                       "<p id='visible' style='visibility: visible'>y</p></div>"
+                       "<div style='display:none !important'><p id='nested' style='display:block'>z</p></div>"
+                       "</body></html>")
+        shown = {name: self.tools.get_element(name).is_displayed()
+                 for name in ("shown", "none", "inherited", "visible", "nested")}
+        self.assertEqual(shown, {"shown": True, "none": False, "inherited": False,
+                                 "visible": True, "nested": False})
+
+
+class BackendRegistryTestCase(unittest.TestCase):
+
+    def test_register_backend(self):
+        created = []
+
+        def factory(config):
+            created.append(config.browser)
+            return HttpDriver()
+
+        register_backend("Custom", factory)
+        self.assertIs(get_backend("custom"), factory)
+        self.assertIn("custom", backend_names())
+        self.assertIn("http", backend_names())
+        self.assertIsNone(get_backend("unknown"))
+
+        with SeleniumTools(browser="custom") as tools:
+            self.assertEqual(created, ["custom"])
+            tools.driver.quit()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ("selenium", "webdriver_manager", "importlib.metadata")
+
+# modules of features that SeleniumTools only loads when they are enabled
+OPT_IN_MODULES = ("downloads", "elements", "profiling", "prune", "schema", "screenshot", "threadsafe")
+
+# Generous budget for the package itself (excluding interpreter start-up),
+# meant to catch an eager import of selenium sneaking back in.
+PACKAGE_IMPORT_BUDGET_US = 50_000
+
+
+def _run(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def _loaded_modules(statement):
+    code = (f"import sys, json\n{statement}\n"
+            "print(json.dumps(sorted(sys.modules)))")
+    stdout, _ = _run(code)
+    return json.loads(stdout)
+
+
+def _cumulative_import_time(module):
+    _, stderr = _run(f"import {module}")
+    for line in stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def assertNotLoaded(self, modules, prefixes):
+        loaded = [name for name in modules if name.startswith(prefixes)]
+        self.assertEqual(loaded, [])
+
+    def test_package_import_is_lightweight(self):
+        modules = _loaded_modules("import s_tool")
+        self.assertNotLoaded(modules, HEAVY_MODULES + ("lxml",))
+
+    def test_parser_import_skips_selenium(self):
+        modules = _loaded_modules("import s_tool.parser")
+        self.assertNotLoaded(modules, HEAVY_MODULES)
+
+    def test_core_import_skips_driver_managers(self):
+        modules = _loaded_modules("import s_tool.core")
+        self.assertNotLoaded(modules, ("webdriver_manager", "s_tool.driver"))
+
+    def test_core_import_skips_opt_in_features(self):
+        modules = _loaded_modules("import s_tool.core")
+        self.assertNotLoaded(modules, tuple(f"s_tool.{name}" for name in OPT_IN_MODULES))
+        self.assertNotLoaded(modules, ("ctypes", "cProfile", "pstats"))
+
+    def test_opt_in_features_load_when_enabled(self):
+        modules = _loaded_modules("from s_tool.core import SeleniumTools\n"
+                                  "SeleniumTools(browser='http', profiler=True, prune=True)")
+        self.assertIn("s_tool.profiling", modules)
+        self.assertIn("s_tool.prune", modules)
+        self.assertNotIn("s_tool.downloads", modules)
+
+    def test_lazy_attributes(self):
+        import s_tool
+        from s_tool.parser import LxmlParser
+
+        self.assertIs(s_tool.LxmlParser, LxmlParser)
+        self.assertTrue(s_tool.__version__.startswith("0"))
+        with self.assertRaises(AttributeError):
+            getattr(s_tool, "missing")
+
+    def test_package_import_time_budget(self):
+        elapsed = _cumulative_import_time("s_tool")
+        self.assertLess(elapsed, PACKAGE_IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
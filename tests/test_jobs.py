@@ -0,0 +1,229 @@
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium.common.exceptions import NoSuchElementException
+
+from s_tool.exceptions import SToolException
+from s_tool.jobs import FileQueue, MemoryQueue, SQLiteQueue, open_queue, run_job
+from s_tool.worker import Worker
+from tests.fakes import FakeClock
+
+
+class QueueContract:
+    """Behaviour shared by all queue backends"""
+
+    def make_queue(self, directory, clock):
+        raise NotImplementedError
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.clock = FakeClock(1000.0)
+        self.queue = self.make_queue(directory.name, self.clock)
+        self.addCleanup(self.queue.close)
+
+    def test_fifo_and_ack(self):
+        first = self.queue.put({"url": "https://example.com/1"})
+        self.clock.now += 1
+        self.queue.put({"url": "https://example.com/2"})
+
+        reservation = self.queue.reserve(visibility_timeout=30)
+        self.assertEqual(reservation.job_id, first)
+        self.assertEqual(reservation.job["url"], "https://example.com/1")
+        self.assertEqual(reservation.attempts, 1)
+        self.assertEqual(self.queue.stats()["visible"], 1)
+        self.assertEqual(self.queue.stats()["lag"], 0)
+
+        self.assertTrue(self.queue.ack(reservation))
+        self.assertEqual(self.queue.reserve().job["url"], "https://example.com/2")
+        self.assertIsNone(self.queue.reserve())
+
+    def test_visibility_timeout_and_receipts(self):
+        self.queue.put({"url": "https://example.com/"})
+        first = self.queue.reserve(visibility_timeout=30)
+        self.assertIsNone(self.queue.reserve())
+
+        self.clock.now += 31
+        second = self.queue.reserve(visibility_timeout=30)
+        self.assertEqual(second.job_id, first.job_id)
+        self.assertEqual(second.attempts, 2)
+        self.assertFalse(self.queue.ack(first))
+        self.assertTrue(self.queue.ack(second))
+
+    def test_nack_delay_fail_and_lag(self):
+        self.queue.put({"url": "https://example.com/"})
+        self.clock.now += 5
+        self.assertEqual(self.queue.stats()["lag"], 5)
+
+        reservation = self.queue.reserve()
+        self.assertTrue(self.queue.nack(reservation, delay=10))
+        self.assertIsNone(self.queue.reserve())
+        self.assertEqual(self.queue.stats()["in_flight"], 1)
+
+        self.clock.now += 10
+        reservation = self.queue.reserve()
+        self.assertTrue(self.queue.fail(reservation, "boom"))
+        self.assertIsNone(self.queue.reserve())
+        self.assertEqual(self.queue.stats(), {"visible": 0, "in_flight": 0, "failed": 1, "lag": 0.0})
+
+    def test_job_needs_url(self):
+        with self.assertRaises(ValueError):
+            self.queue.put({"text": True})
+
+
+class SQLiteQueueTestCase(QueueContract, unittest.TestCase):
+
+    def make_queue(self, directory, clock):
+        return SQLiteQueue(os.path.join(directory, "jobs.db"), clock=clock)
+
+
+class FileQueueTestCase(QueueContract, unittest.TestCase):
+
+    def make_queue(self, directory, clock):
+        return FileQueue(os.path.join(directory, "queue"), clock=clock)
+
+    def test_job_ids_stay_in_the_directory(self):
+        for job_id in ("../../escaped", "a/b", "a\\b", ".."):
+            with self.assertRaises(ValueError):
+                self.queue.put({"url": "https://example.com/", "id": job_id})
+        self.assertEqual(self.queue.stats()["visible"], 0)
+
+
+class MemoryQueueTestCase(QueueContract, unittest.TestCase):
+
+    def make_queue(self, directory, clock):
+        return MemoryQueue(clock=clock)
+
+
+class OpenQueueTestCase(unittest.TestCase):
+
+    def test_specs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            queue = open_queue(f"sqlite://{directory}/jobs.db", "crawl")
+            self.assertIsInstance(queue, SQLiteQueue)
+            self.assertEqual(queue.name, "crawl")
+            queue.close()
+            self.assertIsInstance(open_queue(f"file://{directory}/q"), FileQueue)
+            self.assertIsInstance(open_queue(directory), FileQueue)
+        with self.assertRaises(ValueError):
+            open_queue("ftp://example.com/jobs")
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = (f"<html><body><select name='lang'><option value='en'>English</option></select>"
+                f"<p>{self.path}</p></body></html>").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WorkerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.queue = SQLiteQueue(os.path.join(directory.name, "jobs.db"))
+        self.addCleanup(self.queue.close)
+
+    def test_worker_runs_jobs_with_session_pool(self):
+        for page in range(6):
+            self.queue.put({"url": f"{self.base}/{page}",
+                            "parse": {"ele_tag": "dropdown", "locator_text": "lang",
+                                      "locator_type": "name"}})
+        self.queue.put({"url": "http://127.0.0.1:9/unreachable"})
+
+        results = []
+        worker = Worker(self.queue, results.append, sessions=2, browser="http",
+                        max_attempts=2, retry_delay=0, poll_interval=0.01,
+                        metrics_interval=0)
+        metrics = worker.run(idle_timeout=0.2)
+
+        self.assertEqual(sorted(result["url"] for result in results),
+                         [f"{self.base}/{page}" for page in range(6)])
+        self.assertEqual(results[0]["parsed"], [("English", "en")])
+        self.assertEqual(metrics["completed"], 6)
+        self.assertEqual(metrics["retried"], 1)
+        self.assertEqual(metrics["failed"], 1)
+        self.assertEqual(metrics["queue"]["failed"], 1)
+        self.assertGreater(metrics["throughput"], 0)
+
+    def test_max_jobs(self):
+        for page in range(3):
+            self.queue.put({"url": f"{self.base}/{page}", "text": True})
+        results = []
+        Worker(self.queue, results.append, browser="http", metrics_interval=0).run(max_jobs=2)
+        self.assertEqual(len(results), 2)
+        self.assertIn("/0", results[0]["text"])
+        self.assertEqual(self.queue.stats()["visible"], 1)
+
+    def test_session_start_failure_fails_the_job(self):
+        self.queue.put({"url": f"{self.base}/0"})
+
+        def broken_browser():
+            raise RuntimeError("chrome not found")
+
+        results = []
+        worker = Worker(self.queue, results.append, tools_factory=broken_browser,
+                        max_attempts=2, retry_delay=0, poll_interval=0.01,
+                        metrics_interval=0, report_failures=True)
+        metrics = worker.run(idle_timeout=0.1)
+
+        self.assertEqual((metrics["failed"], metrics["retried"]), (1, 1))
+        self.assertEqual(metrics["queue"]["failed"], 1)
+        self.assertIn("session start failed: RuntimeError: chrome not found", results[0]["error"])
+
+
+class SchemaTools:
+    """Records the schema extraction of a job"""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.roots = []
+
+    def get(self, url):
+        pass
+
+    def url(self):
+        return "https://example.com/"
+
+    def get_element(self, locator_text, locator_type="id"):
+        if (locator_text, locator_type) not in self.elements:
+            raise NoSuchElementException(locator_text)
+        return self.elements[(locator_text, locator_type)]
+
+    def extract_schema(self, schema, root=None):
+        self.roots.append(root)
+        return {}
+
+
+class RunJobTestCase(unittest.TestCase):
+
+    def test_root_is_resolved_to_an_element(self):
+        tools = SchemaTools({("#main", "css_selector"): "main element"})
+        run_job(tools, {"url": "https://example.com/", "schema": {"title": "h1"}, "root": "#main"})
+        run_job(tools, {"url": "https://example.com/", "schema": {"title": "h1"}})
+        self.assertEqual(tools.roots, ["main element", None])
+
+        with self.assertRaisesRegex(SToolException, "ROOT_NOT_FOUND"):
+            run_job(tools, {"url": "https://example.com/", "schema": {"title": "h1"}, "root": "#missing"})
+
+
+if __name__ == "__main__":
+    unittest.main()
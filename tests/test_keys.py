@@ -0,0 +1,77 @@
+import unittest
+
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.command import Command
+
+from s_tool.core import SeleniumTools
+from s_tool.keys import InputSequence, parse_combo, resolve_key
+from tests.fakes import FakeDriver
+
+
+class ActionsDriver(FakeDriver):
+
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, command, params=None):
+        self.commands.append((command, params))
+        return {"value": None}
+
+
+def key_actions(params):
+    """Returns the key actions of a W3C actions request"""
+    source = next(action for action in params["actions"] if action["type"] == "key")
+    return [(action["type"], action.get("value", action.get("duration")))
+            for action in source["actions"]]
+
+
+class KeysTestCase(unittest.TestCase):
+
+    def test_resolve_key(self):
+        self.assertEqual(resolve_key("ctrl"), Keys.CONTROL)
+        self.assertEqual(resolve_key("Enter"), Keys.ENTER)
+        self.assertEqual(resolve_key("a"), "a")
+        self.assertEqual(resolve_key(Keys.SHIFT), Keys.SHIFT)
+        self.assertEqual(parse_combo("ctrl+shift+a"), [Keys.CONTROL, Keys.SHIFT, "a"])
+        for invalid in ("NOPE", 5, ""):
+            with self.assertRaises(ValueError):
+                resolve_key(invalid)
+
+    def test_sequence_single_request(self):
+        driver = ActionsDriver()
+        sequence = InputSequence().combo("ctrl", "a").text("hi").pause(0.5).key("enter")
+        sequence.perform(driver)
+
+        self.assertEqual(len(driver.commands), 1)
+        command, params = driver.commands[0]
+        self.assertEqual(command, Command.W3C_ACTIONS)
+        actions = [action for action in key_actions(params) if action[0] != "pause" or action[1]]
+        self.assertEqual(actions, [
+            ("keyDown", Keys.CONTROL), ("keyDown", "a"), ("keyUp", "a"), ("keyUp", Keys.CONTROL),
+            ("keyDown", "h"), ("keyUp", "h"), ("keyDown", "i"), ("keyUp", "i"),
+            ("pause", 500),
+            ("keyDown", Keys.ENTER), ("keyUp", Keys.ENTER),
+        ])
+
+    def test_press_multiple_keys(self):
+        driver = ActionsDriver()
+        tools = SeleniumTools(driver=driver)
+        tools.press_multiple_keys(["CTRL", "a"], ["CTRL", "c"])
+
+        self.assertEqual(len(driver.commands), 1)
+        self.assertEqual(key_actions(driver.commands[0][1]), [
+            ("keyDown", Keys.CONTROL), ("keyDown", "A"), ("keyUp", "A"), ("keyUp", Keys.CONTROL),
+            ("keyDown", Keys.CONTROL), ("keyDown", "C"), ("keyUp", "C"), ("keyUp", Keys.CONTROL),
+        ])
+
+    def test_press_multiple_keys_upper_cases_letters(self):
+        driver = ActionsDriver()
+        SeleniumTools(driver=driver).press_multiple_keys("shift+x", ["alt", "1"])
+        self.assertEqual(key_actions(driver.commands[0][1]), [
+            ("keyDown", Keys.SHIFT), ("keyDown", "X"), ("keyUp", "X"), ("keyUp", Keys.SHIFT),
+            ("keyDown", Keys.ALT), ("keyDown", "1"), ("keyUp", "1"), ("keyUp", Keys.ALT),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
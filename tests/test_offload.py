@@ -0,0 +1,46 @@
+import unittest
+
+from s_tool.offload import ParseOffloader
+
+SELECT_HTML = """
+    <select>
+        <option value="1">Option 1</option>
+        <option value="2">Option 2</option>
+    </select>"""
+
+
+class OptionCountParser:
+    def option_count(self, html_string, **kwargs):
+        from lxml.html import fromstring
+        return len(fromstring(html_string).findall(".//option")) + kwargs.get("extra", 0)
+
+
+class ParseOffloaderTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.offloader = ParseOffloader(max_workers=2, max_in_flight=2,
+                                       parser_class=OptionCountParser)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.offloader.shutdown()
+
+    def test_builtin_parser(self):
+        future = self.offloader.submit("dropdown", SELECT_HTML)
+        self.assertEqual(future.result(timeout=30),
+                         [("Option 1", "1"), ("Option 2", "2")])
+
+    def test_custom_parser_and_kwargs(self):
+        futures = [self.offloader.submit("option_count", SELECT_HTML, extra=i)
+                   for i in range(5)]
+        self.assertEqual([f.result(timeout=30) for f in futures], [2, 3, 4, 5, 6])
+
+    def test_missing_parser(self):
+        future = self.offloader.submit("missing", SELECT_HTML)
+        with self.assertRaises(NotImplementedError):
+            future.result(timeout=30)
+
+
+if __name__ == "__main__":
+    unittest.main()
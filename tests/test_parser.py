@@ -1,7 +1,7 @@
 
 import unittest
 
-from s_tool.parser import LxmlParser
+from s_tool.parser import LxmlParser, feed_parse, fromstring, locate, outer_html
 
 
 class LxmlParserTestCase(unittest.TestCase):
@@ -27,3 +27,28 @@ class LxmlParserTestCase(unittest.TestCase):
         self.assertEqual(expected_result,dropdown_options)
         self.assertTrue(len(dropdown_options)==3)
         
+
+    def test_locate(self):
+        tree = fromstring("""
+            <html>
+                <body>
+                    <p id="intro" class="lead text">Hello</p>tail
+                    <a href="/next" name="next"> Next </a>
+                </body>
+            </html>""")
+
+        self.assertEqual(outer_html(locate(tree, "intro")[0]),
+                         '<p id="intro" class="lead text">Hello</p>')
+        self.assertEqual(len(locate(tree, "text", "class_name")), 1)
+        self.assertEqual(len(locate(tree, "Next", "link_text")), 1)
+        self.assertEqual(len(locate(tree, "next", "name")), 1)
+        self.assertEqual(len(locate(tree, "//p", "xpath")), 1)
+        self.assertEqual(len(locate(tree, "a", "tag_name")), 1)
+        with self.assertRaises(ValueError):
+            locate(tree, "x", "invalid")
+
+    def test_feed_parse(self):
+        chunks = ["<html><bo", "dy><p id='a'>one</p><p>tw", "o</p></body></html>"]
+        root = feed_parse(chunks)
+        self.assertEqual([p.text for p in root.iter("p")], ["one", "two"])
+        self.assertIsNone(feed_parse([]))
@@ -0,0 +1,137 @@
+import io
+import os
+import tempfile
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool.core import SeleniumTools
+from s_tool.parser import LxmlParser
+from s_tool.profiling import Profiler, make_profiler
+from tests.fakes import ELEMENT_KEY, FakeClock, FakeExecutor
+
+SELECT = "<select id='lang'>" + "".join(
+    f"<option value='v{n}'>Option {n}</option>" for n in range(50)) + "</select>"
+
+
+class TimedExecutor(FakeExecutor):
+    """Answers commands and advances the fake clock like a browser would"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def execute(self, command, params):
+        self.clock.now += 0.5
+        return super().execute(command, params)
+
+    def respond(self, command, params):
+        if command == "findElement":
+            return {ELEMENT_KEY: "el-1"}
+        if command == "getElementProperty":
+            return SELECT
+        return super().respond(command, params)
+
+
+class ProfilerTestCase(unittest.TestCase):
+
+    def test_nested_spans(self):
+        clock = FakeClock()
+        profiler = Profiler(clock=clock, cpu_clock=clock)
+        with profiler.span("outer"):
+            clock.now += 1
+            with profiler.span("inner"):
+                clock.now += 2
+                profiler.record_command("get", 3)
+                clock.now += 3
+
+        stats = profiler.stats()
+        self.assertEqual(stats["outer"]["wall"], 6)
+        self.assertEqual(stats["outer"]["self"], 1)
+        self.assertEqual(stats["outer"]["webdriver"], 3)
+        self.assertEqual(stats["outer"]["local"], 3)
+        self.assertEqual(stats["inner"]["self"], 2)
+        self.assertEqual(profiler.collapsed(),
+                         "outer 1000000\nouter;inner 2000000\nouter;inner;webdriver:get 3000000\n")
+
+    def test_generators_are_measured_per_item(self):
+        clock = FakeClock()
+        profiler = Profiler(clock=clock, cpu_clock=clock)
+
+        def numbers():
+            for number in range(3):
+                clock.now += 1
+                yield number
+
+        wrapped = profiler.wrap("numbers", numbers)
+        self.assertEqual(list(wrapped()), [0, 1, 2])
+        self.assertEqual(profiler.stats()["numbers"]["wall"], 3)
+
+    def test_cprofile_per_span(self):
+        profiler = Profiler(cprofile=True)
+        with profiler.span("parse"):
+            sorted(range(1000), key=str)
+        stream = io.StringIO()
+        profiler.print_profile("parse", stream=stream)
+        self.assertIn("function calls", stream.getvalue())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "parse.prof")
+            profiler.dump_profile("parse", path)
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_make_profiler(self):
+        self.assertIsNone(make_profiler(None))
+        self.assertIsInstance(make_profiler(True), Profiler)
+
+
+class UpperParser:
+
+    def shout(self, html_string):
+        return html_string.upper()
+
+
+class InstrumentedToolsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = Profiler(clock=self.clock, cpu_clock=self.clock)
+        self.tools = SeleniumTools(driver=WebDriver(command_executor=TimedExecutor(self.clock)),
+                                   profiler=self.profiler, parser=UpperParser)
+
+    def test_spans_separate_webdriver_time(self):
+        self.profiler.reset()
+        self.assertEqual(len(self.tools.parse("dropdown", "lang")), 50)
+
+        stats = self.profiler.stats()
+        # find the element and read its outerHTML
+        self.assertEqual(stats["SeleniumTools.parse"]["webdriver"], 1.0)
+        self.assertEqual(stats["SeleniumTools.get_element"]["webdriver"], 0.5)
+        self.assertEqual(stats["LxmlParser.dropdown"]["calls"], 1)
+        self.assertIn("SeleniumTools.parse;SeleniumTools.get_element;webdriver:findElement",
+                      self.profiler.collapsed())
+        self.assertIn("SeleniumTools.parse;SeleniumTools._outer_html;webdriver:getElementProperty",
+                      self.profiler.collapsed())
+
+        report = self.profiler.report(limit=2)
+        self.assertEqual(len(report.splitlines()), 3)
+        self.assertTrue(report.splitlines()[1].startswith("SeleniumTools.parse"))
+
+    def test_custom_parsers_and_setup_are_profiled(self):
+        self.assertEqual(self.tools.parser.shout("<p>"), "<P>")
+        stats = self.profiler.stats()
+        self.assertEqual(stats["LxmlParser.shout"]["calls"], 1)
+        self.assertEqual(stats["SeleniumTools._attach_custom_parsers"]["calls"], 1)
+        self.assertFalse(hasattr(LxmlParser.dropdown, "__profiled__"))
+
+    def test_write_collapsed(self):
+        self.tools.get("https://example.com")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.folded")
+            self.profiler.write_collapsed(path)
+            with open(path) as file:
+                self.assertIn("SeleniumTools.get;webdriver:get 500000\n", file.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
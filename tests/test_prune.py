@@ -0,0 +1,124 @@
+import unittest
+from urllib.parse import quote
+
+from s_tool import scripts
+from s_tool.core import SeleniumTools
+from s_tool.http_backend import HttpDriver
+from s_tool.prune import Pruner, make_pruner
+from tests.fakes import ChunkStore, FakeDriver
+
+IMAGE = "data:image/png;base64," + "A" * 500
+
+PAGE = f"""<!DOCTYPE html><html><head><title>Shop</title>
+<style>.price {{ color: red }}</style><script>track()</script></head>
+<body onload="init()"><!-- banner -->
+<svg width="10"><path d="M0 0L10 10"/></svg>
+<table id="prices" style="width:100%"><tr><td class="price" onclick="buy()">9.99</td>
+<td><img src="{IMAGE}" alt="logo"><img src="/small.png" srcset="a.png 2x"></td></tr></table>
+<p>tail</p></body></html>"""
+
+
+class PrunerTestCase(unittest.TestCase):
+
+    def test_prune_html(self):
+        pruner = Pruner()
+        html = pruner.prune_html(PAGE)
+
+        self.assertTrue(html.startswith("<!DOCTYPE html>"))
+        for removed in ("<script", "<style", "<svg", "banner", "onload", "onclick", "srcset", "AAAA", "width:100%"):
+            self.assertNotIn(removed, html)
+        for kept in ("<title>Shop</title>", 'class="price"', "9.99", 'src="data:"', 'src="/small.png"', "tail"):
+            self.assertIn(kept, html)
+
+        stats = pruner.stats()
+        self.assertEqual(stats["pages"], 1)
+        self.assertEqual(stats["bytes_before"], len(PAGE.encode()))
+        self.assertEqual(stats["bytes_after"], len(html.encode()))
+        self.assertGreater(stats["saved_ratio"], 0.5)
+
+    def test_configured_pruning(self):
+        pruner = Pruner(tags=("svg",), attributes=("data-*",), data_uris=False, comments=False)
+        html = pruner.prune_html('<div data-id="1" style="x"><!-- c --><svg></svg>'
+                                 f'<img src="{IMAGE}"></div>')
+        self.assertEqual(html, f'<div style="x"><!-- c --><img src="{IMAGE}"></div>')
+
+    def test_config_for_script(self):
+        config = Pruner(tags=("SCRIPT",), attributes=("style", "on*")).config()
+        self.assertEqual(config["tags"], ["script"])
+        self.assertEqual(config["attributes"], ["style"])
+        self.assertEqual(config["prefixes"], ["on"])
+
+    def test_make_pruner(self):
+        self.assertIsNone(make_pruner(None))
+        self.assertIsNone(make_pruner(False))
+        self.assertIsInstance(make_pruner(True), Pruner)
+        pruner = Pruner()
+        self.assertIs(make_pruner(pruner), pruner)
+
+
+class PruneDriver(FakeDriver):
+    """Answers the pruning scripts like a browser would"""
+
+    def __init__(self):
+        self.calls = []
+        self.chunks = ChunkStore()
+
+    def execute_script(self, script, *args):
+        self.calls.append(script)
+        if script == scripts.PRUNE_SCRIPT:
+            element, config = args
+            return ["<table>pruned</table>", 1000, 21] if element else ["<html>pruned</html>", 5000, 19]
+        if script == scripts.CHUNK_INIT_SCRIPT % scripts.PRUNED_SOURCE_SCRIPT:
+            token, (config,) = args
+            return self.chunks.init(token, "<html><p>pruned</p></html>")
+        if script == scripts.CHUNK_SLICE_SCRIPT:
+            return self.chunks.slice(*args)
+        if script == scripts.PRUNE_SIZES_SCRIPT:
+            return [4000, 26]
+        raise AssertionError(f"unexpected script {script}")
+
+
+class FakeElement:
+
+    def __init__(self, driver):
+        self.parent = driver
+
+
+class BrowserPruneTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = PruneDriver()
+        self.tools = SeleniumTools(driver=self.driver, prune=True)
+
+    def test_text_is_pruned_in_one_call(self):
+        self.assertEqual(self.tools.text(), "<html>pruned</html>")
+        self.assertEqual(self.driver.calls, [scripts.PRUNE_SCRIPT])
+        self.assertEqual(self.tools.pruner.stats()["bytes_saved"], 4981)
+
+    def test_parse_prunes_the_element(self):
+        self.tools.get_element = lambda locator_text, locator_type: FakeElement(self.driver)
+        self.tools.parser.captured = lambda html_string: html_string
+        self.assertEqual(self.tools.parse("captured", "prices"), "<table>pruned</table>")
+        self.assertEqual(self.tools.pruner.stats()["bytes_saved"], 979)
+
+    def test_streamed_source_records_sizes(self):
+        self.assertEqual("".join(self.tools.iter_text(chunk_size=5)), "<html><p>pruned</p></html>")
+        self.assertEqual(self.driver.calls[-1], scripts.PRUNE_SIZES_SCRIPT)
+        self.assertEqual(self.tools.pruner.stats()["bytes_before"], 4000)
+
+
+class HttpPruneTestCase(unittest.TestCase):
+
+    def test_driver_without_javascript(self):
+        tools = SeleniumTools(driver=HttpDriver(), prune=True)
+        try:
+            tools.get("data:text/html," + quote(PAGE))
+            self.assertNotIn("<script", tools.text())
+            self.assertEqual(tools.document().findtext(".//td"), "9.99")
+            self.assertEqual(tools.pruner.stats()["pages"], 2)
+        finally:
+            tools._close()
+
+
+if __name__ == "__main__":
+    unittest.main()
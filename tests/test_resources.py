@@ -0,0 +1,150 @@
+import unittest
+
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import SToolException
+from s_tool.resources import ResourceBudget, driver_pid
+from tests.fakes import FakeDriver
+
+MIB = 1024 * 1024
+
+
+class BrowserDriver(FakeDriver):
+    supports_javascript = False
+
+    def __init__(self):
+        self.cookie_jar = []
+        self.quit_called = False
+
+    def get_cookies(self):
+        return list(self.cookie_jar)
+
+    def add_cookie(self, cookie):
+        self.cookie_jar.append(cookie)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class ChromeDriver(BrowserDriver):
+    supports_javascript = True
+
+    def __init__(self):
+        super().__init__()
+        self.cdp_cookies = []
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Network.getAllCookies":
+            return {"cookies": list(self.cdp_cookies)}
+        if command == "Network.setCookies":
+            self.cdp_cookies.extend(params["cookies"])
+        return {}
+
+
+class FakeSampler:
+    def __init__(self, *rss_values):
+        self.rss_values = list(rss_values)
+
+    def __call__(self, driver):
+        return {"rss": self.rss_values.pop(0) * MIB, "cpu_percent": 10.0, "processes": 3}
+
+
+class ResourceBudgetTestCase(unittest.TestCase):
+
+    def test_page_limit(self):
+        budget = ResourceBudget(max_pages=2)
+        budget.start(BrowserDriver())
+        self.assertIsNone(budget.exceeded(None))
+        budget.record_page()
+        budget.record_page()
+        self.assertIn("page limit", budget.exceeded(None))
+
+    def test_samples_every_n_pages(self):
+        budget = ResourceBudget(max_rss_mb=500, sample_every=2,
+                                sampler=FakeSampler(100, 200, 600), clock=lambda: 7)
+        driver = BrowserDriver()
+        budget.start(driver)
+        budget.record_page()
+        self.assertIsNone(budget.exceeded(driver))
+        budget.record_page()
+        self.assertIsNone(budget.exceeded(driver))
+        budget.record_page()
+        budget.record_page()
+        self.assertIn("memory limit", budget.exceeded(driver))
+
+        metrics = budget.metrics()
+        self.assertEqual(len(metrics["samples"]), 3)
+        self.assertEqual(metrics["peak_rss"], 600 * MIB)
+        self.assertEqual(metrics["last_sample"]["pages"], 4)
+        self.assertEqual(metrics["last_sample"]["timestamp"], 7)
+
+    def test_driver_pid(self):
+        self.assertIsNone(driver_pid(BrowserDriver()))
+
+    def test_psutil_required_for_process_limits(self):
+        try:
+            import psutil  # noqa: F401
+        except ImportError:
+            with self.assertRaises(SToolException):
+                ResourceBudget(max_rss_mb=100)
+        else:
+            self.assertIsNotNone(ResourceBudget(max_rss_mb=100)._sampler)
+
+
+class RecycleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.budget = ResourceBudget(max_pages=2)
+        self.tools = SeleniumTools(driver=BrowserDriver(), budget=self.budget)
+        self.launched = []
+
+        def load_driver():
+            driver = type(self.tools.driver)()
+            self.launched.append(driver)
+            self.tools.driver = driver
+            self.tools._owns_driver = True
+            self.budget.start(driver)
+            return driver
+
+        self.tools._load_driver = load_driver
+
+    def test_external_driver_is_not_recycled(self):
+        for _ in range(3):
+            self.tools.get("https://example.com/")
+        self.assertEqual(self.launched, [])
+
+    def test_recycle_restores_cookies(self):
+        self.tools._owns_driver = True
+        old_driver = self.tools.driver
+        old_driver.cookie_jar.append({"name": "sid", "value": "1", "domain": "example.com"})
+
+        for _ in range(3):
+            self.tools.get("https://example.com/")
+
+        self.assertTrue(old_driver.quit_called)
+        self.assertEqual(len(self.launched), 1)
+        new_driver = self.launched[0]
+        self.assertEqual(new_driver.cookie_jar, [{"name": "sid", "value": "1", "domain": "example.com"}])
+        self.assertEqual(self.budget.pages, 1)
+        self.assertEqual(self.budget.recycles, 1)
+
+    def test_recycle_restores_cookies_of_all_domains(self):
+        old_driver = self.tools.driver = ChromeDriver()
+        self.tools._owns_driver = True
+        old_driver.cdp_cookies = [
+            {"name": "sid", "value": "1", "domain": "example.com", "path": "/", "expires": -1,
+             "size": 4, "httpOnly": True, "secure": False, "session": True},
+            {"name": "sso", "value": "2", "domain": ".auth.example.org", "path": "/", "expires": 2000000000.5,
+             "size": 4, "httpOnly": False, "secure": True, "session": False, "sameSite": "Lax"},
+        ]
+        self.assertTrue(self.tools.recycle())
+
+        self.assertEqual(self.launched[0].cdp_cookies, [
+            {"name": "sid", "value": "1", "domain": "example.com", "path": "/", "httpOnly": True,
+             "secure": False},
+            {"name": "sso", "value": "2", "domain": ".auth.example.org", "path": "/", "httpOnly": False,
+             "secure": True, "sameSite": "Lax", "expires": 2000000000},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
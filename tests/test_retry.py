@@ -0,0 +1,150 @@
+import unittest
+
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    InvalidSessionIdException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from urllib3.exceptions import MaxRetryError
+
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import CircuitOpenError
+from s_tool.retry import CircuitBreaker, RetryPolicy
+from tests.fakes import FakeClock, FakeDriver
+
+
+class Flaky:
+    def __init__(self, failures, exc=StaleElementReferenceException):
+        self.failures = failures
+        self.exc = exc
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc("flaky")
+        return "ok"
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def policy(self, **kwargs):
+        kwargs.setdefault("jitter", False)
+        return RetryPolicy(sleep=self.clock.sleep, clock=self.clock, **kwargs)
+
+    def test_retries_until_success(self):
+        func = Flaky(2)
+        self.assertEqual(self.policy(max_attempts=3).call(func), "ok")
+        self.assertEqual(func.calls, 3)
+        self.assertEqual(self.clock.now, 0.5 + 1.0)
+
+    def test_gives_up_after_max_attempts(self):
+        func = Flaky(5)
+        with self.assertRaises(StaleElementReferenceException):
+            self.policy(max_attempts=2).call(func)
+        self.assertEqual(func.calls, 2)
+
+    def test_non_retryable_is_raised_immediately(self):
+        func = Flaky(1, exc=KeyError)
+        with self.assertRaises(KeyError):
+            self.policy().call(func)
+        self.assertEqual(func.calls, 1)
+
+    def test_page_errors_are_not_retried(self):
+        for exc in (TimeoutException, NoSuchElementException, InvalidSelectorException):
+            func = Flaky(1, exc=exc)
+            with self.assertRaises(exc):
+                self.policy().call(func)
+            self.assertEqual(func.calls, 1)
+
+    def test_transport_and_session_errors_are_retried(self):
+        for exc in (ConnectionResetError, InvalidSessionIdException,
+                    lambda message: MaxRetryError(None, "/session", message)):
+            self.assertEqual(self.policy().call(Flaky(1, exc=exc)), "ok")
+
+    def test_deadline_stops_retries(self):
+        func = Flaky(5)
+        with self.assertRaises(StaleElementReferenceException):
+            self.policy(max_attempts=10, base_delay=1, deadline=2.5).call(func)
+        self.assertEqual(func.calls, 2)
+
+    def test_backoff_is_capped_and_jittered(self):
+        policy = RetryPolicy(base_delay=1, max_delay=4)
+        for attempt in range(1, 8):
+            self.assertLessEqual(policy.backoff(attempt), 4)
+            self.assertGreaterEqual(policy.backoff(attempt), 0)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2,
+                                      recovery_timeout=10,
+                                      clock=self.clock)
+
+    def fail(self, host="example.com"):
+        with self.assertRaises(MaxRetryError):
+            self.breaker.call(host, Flaky(1, exc=lambda message: MaxRetryError(None, host, message)))
+
+    def test_opens_after_threshold(self):
+        self.fail()
+        self.assertEqual(self.breaker.state("example.com"), "closed")
+        self.fail()
+        self.assertEqual(self.breaker.state("example.com"), "open")
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call("example.com", Flaky(0))
+        # other hosts are not affected
+        self.assertEqual(self.breaker.call("other.com", Flaky(0)), "ok")
+
+    def test_half_open_trial_closes_circuit(self):
+        self.fail()
+        self.fail()
+        self.clock.now += 10
+        self.assertEqual(self.breaker.state("example.com"), "half_open")
+        self.assertEqual(self.breaker.call("example.com", Flaky(0)), "ok")
+        self.assertEqual(self.breaker.state("example.com"), "closed")
+
+    def test_half_open_failure_reopens_circuit(self):
+        self.fail()
+        self.fail()
+        self.clock.now += 10
+        self.fail()
+        self.assertEqual(self.breaker.state("example.com"), "open")
+
+    def test_other_exceptions_do_not_count(self):
+        for exc in (KeyError, TimeoutException, NoSuchElementException, InvalidSelectorException):
+            with self.assertRaises(exc):
+                self.breaker.call("example.com", Flaky(1, exc=exc))
+        self.assertEqual(self.breaker.state("example.com"), "closed")
+
+
+class StaleDriver(FakeDriver):
+    """Driver whose elements always go stale while being looked up"""
+
+    def __init__(self):
+        self.lookups = 0
+
+    def find_element(self, by, value):
+        self.lookups += 1
+        raise StaleElementReferenceException("gone")
+
+
+class FillRetryTestCase(unittest.TestCase):
+    def test_a_field_is_looked_up_once_per_attempt(self):
+        clock = FakeClock()
+        driver = StaleDriver()
+        policy = RetryPolicy(max_attempts=3, jitter=False, sleep=clock.sleep, clock=clock)
+        tools = SeleniumTools(driver=driver, retry_policy=policy)
+        with self.assertRaises(StaleElementReferenceException):
+            tools.fill({"q": "text"})
+        self.assertEqual(driver.lookups, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from s_tool.schema import coerce, compile_schema
+
+SCHEMA = {
+    "selector": ".result",
+    "fields": {
+        "title": "h3",
+        "href": {"selector": "a", "prop": "href"},
+        "price": {"selector": ".price", "type": "float"},
+        "stock": {"selector": ".stock", "attr": "data-count", "type": "int"},
+        "tags": {"selector": ".tag", "many": True},
+        "seller": {"selector": ".seller", "fields": {"name": ".name"}},
+    },
+}
+
+
+class SchemaTestCase(unittest.TestCase):
+
+    def test_compile_is_cached(self):
+        first = compile_schema(SCHEMA)
+        self.assertIs(compile_schema(dict(SCHEMA)), first)
+
+    def test_compiled_source(self):
+        spec, source = compile_schema(SCHEMA)
+        self.assertTrue(spec["many"])
+        self.assertIn('root.querySelectorAll(".result")', source)
+        self.assertIn('.getAttribute("data-count")', source)
+        self.assertIn('["href"]', source)
+
+    def test_invalid_schema(self):
+        with self.assertRaises(ValueError):
+            compile_schema({"selector": ".a", "feilds": {}})
+        with self.assertRaises(ValueError):
+            compile_schema({"fields": {"a": {"selector": "b", "type": "date"}}})
+
+    def test_coerce(self):
+        spec, _ = compile_schema(SCHEMA)
+        raw = [
+            {"title": "A", "href": "https://x.com/a", "price": "$1,200.50",
+             "stock": "7", "tags": ["x", "y"], "seller": {"name": "S"}},
+            {"title": "B", "href": None, "price": "n/a", "stock": None,
+             "tags": [], "seller": None},
+        ]
+        self.assertEqual(coerce(spec, raw), [
+            {"title": "A", "href": "https://x.com/a", "price": 1200.5,
+             "stock": 7, "tags": ["x", "y"], "seller": {"name": "S"}},
+            {"title": "B", "href": None, "price": None, "stock": None,
+             "tags": [], "seller": None},
+        ])
+
+    def test_single_record(self):
+        spec, source = compile_schema({"fields": {"heading": "h1"}})
+        self.assertFalse(spec["many"])
+        self.assertEqual(coerce(spec, {"heading": "Hi"}), {"heading": "Hi"})
+
+
+if __name__ == "__main__":
+    unittest.main()
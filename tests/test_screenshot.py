@@ -0,0 +1,109 @@
+import base64
+import os
+import tempfile
+import unittest
+
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import SToolException
+from s_tool.screenshot import ScreenshotWriter, capture, encode, format_from_path, normalize_format
+from tests.fakes import FakeDriver
+
+# 1x1 transparent png
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII=")
+
+try:
+    import PIL  # noqa: F401
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+
+class ScreenshotDriver(FakeDriver):
+    name = "firefox"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_screenshot_as_base64(self):
+        self.calls.append("viewport")
+        return base64.b64encode(PNG).decode()
+
+    def get_full_page_screenshot_as_base64(self):
+        self.calls.append("full_page")
+        return base64.b64encode(PNG).decode()
+
+
+class ChromeScreenshotDriver(ScreenshotDriver):
+    name = "chrome"
+
+    def execute_cdp_cmd(self, command, params):
+        self.calls.append((command, params))
+        if command == "Page.getLayoutMetrics":
+            return {"cssContentSize": {"x": 0, "y": 0, "width": 1280, "height": 5400}}
+        return {"data": base64.b64encode(PNG).decode()}
+
+
+class ScreenshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.driver = ScreenshotDriver()
+        self.tools = SeleniumTools(driver=self.driver)
+
+    def test_format_from_path(self):
+        self.assertEqual(format_from_path("a/b.JPG"), "jpg")
+        self.assertEqual(format_from_path("a/b.txt"), "png")
+        self.assertEqual(format_from_path(None), "png")
+
+    def test_capture_falls_back_without_cdp(self):
+        capture(self.driver)
+        capture(self.driver, full_page=True)
+        self.assertEqual(self.driver.calls, ["viewport", "full_page"])
+
+    def test_full_page_capture_through_cdp(self):
+        driver = ChromeScreenshotDriver()
+        self.assertEqual(capture(driver, full_page=True, fmt="JPG", quality=70)[1], "jpeg")
+        command, params = driver.calls[-1]
+        self.assertEqual(command, "Page.captureScreenshot")
+        self.assertEqual(params["clip"], {"x": 0, "y": 0, "width": 1280, "height": 5400, "scale": 1})
+        self.assertTrue(params["captureBeyondViewport"])
+
+        capture(driver)
+        self.assertNotIn("clip", driver.calls[-1][1])
+
+    def test_unsupported_formats(self):
+        self.assertEqual(normalize_format("JPG"), "jpg")
+        with self.assertRaisesRegex(SToolException, "unsupported screenshot format: gif"):
+            self.tools.screenshot(fmt="gif")
+        with self.assertRaises(SToolException):
+            encode(base64.b64encode(PNG).decode(), "png", "bmp")
+
+    def test_png_bytes(self):
+        self.assertEqual(self.tools.screenshot(), PNG)
+
+    def test_write_and_background_write(self):
+        path = os.path.join(self.tmpdir.name, "page.png")
+        self.assertEqual(self.tools.screenshot(path, full_page=True), path)
+
+        with ScreenshotWriter() as writer:
+            future = self.tools.screenshot(
+                os.path.join(self.tmpdir.name, "bg.png"), writer=writer)
+        self.assertEqual(open(future.result(), "rb").read(), PNG)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["bg.png", "page.png"])
+
+    @unittest.skipIf(HAS_PILLOW, "Pillow is installed")
+    def test_conversion_requires_pillow(self):
+        data = base64.b64encode(PNG).decode()
+        with self.assertRaises(SToolException):
+            encode(data, "png", "jpeg", quality=70)
+
+    @unittest.skipUnless(HAS_PILLOW, "Pillow is not installed")
+    def test_conversion(self):
+        data = base64.b64encode(PNG).decode()
+        self.assertTrue(encode(data, "png", "jpeg", quality=70).startswith(b"\xff\xd8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
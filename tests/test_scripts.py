@@ -0,0 +1,123 @@
+import unittest
+
+from s_tool import scripts
+from s_tool.exceptions import SToolException
+from s_tool.scripts import ScriptRegistry, iter_chunks, js_locator
+from tests.fakes import ChunkStore
+
+
+class FakePage:
+    """Emulates the page side of the s_tool helper scripts"""
+
+    def __init__(self, value=None, eval_allowed=True):
+        self.value = value
+        self.eval_allowed = eval_allowed
+        self.no_eval = False
+        self.functions = {}
+        self.chunks = ChunkStore()
+        self.scripts = []
+
+    def navigate(self):
+        self.functions.clear()
+        self.no_eval = False
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        if script == scripts.CALL_SCRIPT:
+            handle, call_args = args
+            if self.no_eval:
+                return scripts._NO_EVAL
+            if handle not in self.functions:
+                return scripts._MISSING
+            return self.functions[handle](*call_args)
+        if script == scripts.INSTALL_SCRIPT:
+            handle, call_args, _ = args
+            if not self.eval_allowed:
+                self.no_eval = True
+                return scripts._NO_EVAL
+            self.functions[handle] = lambda *a: sum(a)
+            return self.functions[handle](*call_args)
+        if script.startswith(scripts.CHUNK_INIT_SCRIPT.split("%s")[0]):
+            token, _ = args
+            return self.chunks.init(token, self.value)
+        if script == scripts.CHUNK_SLICE_SCRIPT:
+            return self.chunks.slice(*args)
+        if script == "return arguments[0] + arguments[1]":
+            return sum(args)
+        raise AssertionError(f"unexpected script {script}")
+
+
+class ScriptRegistryTestCase(unittest.TestCase):
+
+    def test_installs_once_per_page(self):
+        page = FakePage()
+        registry = ScriptRegistry()
+        handle = registry.register("return arguments[0] + arguments[1]")
+
+        self.assertEqual(registry.call(page, handle, 1, 2), 3)
+        self.assertEqual(registry.call(page, handle, 2, 2), 4)
+        self.assertEqual(page.scripts, [scripts.CALL_SCRIPT, scripts.INSTALL_SCRIPT,
+                                        scripts.CALL_SCRIPT])
+
+        page.navigate()
+        self.assertEqual(registry.call(page, handle, 1, 1), 2)
+        self.assertEqual(page.scripts[-1], scripts.INSTALL_SCRIPT)
+
+    def test_pages_without_eval_get_the_source(self):
+        page = FakePage(eval_allowed=False)
+        registry = ScriptRegistry()
+        handle = registry.register("return arguments[0] + arguments[1]")
+
+        self.assertEqual(registry.call(page, handle, 1, 2), 3)
+        self.assertEqual(registry.call(page, handle, 2, 2), 4)
+        self.assertEqual(page.scripts, [scripts.CALL_SCRIPT, scripts.INSTALL_SCRIPT,
+                                        "return arguments[0] + arguments[1]",
+                                        scripts.CALL_SCRIPT, "return arguments[0] + arguments[1]"])
+
+    def test_handles_are_stable(self):
+        registry = ScriptRegistry()
+        self.assertEqual(registry.register("return 1"), registry.register("return 1"))
+        with self.assertRaises(SToolException):
+            registry.call(FakePage(), "unknown")
+
+
+class IterChunksTestCase(unittest.TestCase):
+
+    def test_array_in_chunks(self):
+        page = FakePage(list(range(25)))
+        chunks = list(iter_chunks(page, "return window.rows", chunk_size=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual(sum(chunks, []), list(range(25)))
+        self.assertEqual(page.chunks.values, {})
+
+    def test_string_and_null(self):
+        page = FakePage("abcdefg")
+        self.assertEqual(list(iter_chunks(page, "return s", chunk_size=3)),
+                         ["abc", "def", "g"])
+        self.assertEqual(list(iter_chunks(FakePage(None), "return null")), [])
+
+    def test_surrogate_pairs_stay_together(self):
+        # the emoji takes two UTF-16 code units, at positions 2 and 3
+        page = FakePage("abc\U0001F600def")
+        chunks = list(iter_chunks(page, "return s", chunk_size=4))
+        self.assertEqual(chunks, ["abc", "\U0001F600de", "f"])
+        self.assertEqual("".join(chunks).encode("utf-8"), "abc\U0001F600def".encode("utf-8"))
+        self.assertEqual(list(iter_chunks(FakePage("\U0001F600\U0001F600"), "return s", chunk_size=1)),
+                         ["\U0001F600", "\U0001F600"])
+
+
+class JsLocatorTestCase(unittest.TestCase):
+
+    def test_locator_types(self):
+        self.assertEqual(js_locator("main"), (False, '[id="main"]'))
+        self.assertEqual(js_locator('a"b', "name"), (False, '[name="a\\"b"]'))
+        self.assertEqual(js_locator("btn", "class_name"), (False, '[class~="btn"]'))
+        self.assertEqual(js_locator("//li", "xpath"), (True, "//li"))
+        self.assertEqual(js_locator("It's \"x\"", "link_text"),
+                         (True, "//a[normalize-space(.)=concat(\"It's \", '\"', \"x\", '\"', \"\")]"))
+        with self.assertRaises(ValueError):
+            js_locator("x", "invalid")
+
+
+if __name__ == "__main__":
+    unittest.main()
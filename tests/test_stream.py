@@ -0,0 +1,65 @@
+import unittest
+
+from s_tool import scripts
+from s_tool.core import SeleniumTools
+from tests.fakes import ChunkStore, FakeDriver
+
+SOURCE = "<!DOCTYPE html><html><head><title>Log</title></head><body>" + \
+    "".join(f"<p class='line'>entry {n}</p>" for n in range(200)) + "</body></html>"
+
+
+class SourceDriver(FakeDriver):
+    """Serves the page source through the chunk scripts"""
+
+    def __init__(self, source=SOURCE):
+        self.source = source
+        self.chunks = ChunkStore()
+        self.calls = 0
+
+    def execute_script(self, script, *args):
+        self.calls += 1
+        if script == scripts.CHUNK_INIT_SCRIPT % scripts.PAGE_SOURCE_SCRIPT:
+            token, _ = args
+            return self.chunks.init(token, self.source)
+        if script == scripts.CHUNK_SLICE_SCRIPT:
+            return self.chunks.slice(*args)
+        raise AssertionError(f"unexpected script {script}")
+
+
+class StreamSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = SourceDriver()
+        self.tools = SeleniumTools(driver=self.driver)
+
+    def test_iter_text(self):
+        chunks = list(self.tools.iter_text(chunk_size=1000))
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+        self.assertEqual("".join(chunks), SOURCE)
+        self.assertEqual(self.driver.calls, len(chunks) + 1)
+        self.assertEqual(self.driver.chunks.values, {})
+
+    def test_document(self):
+        root = self.tools.document(chunk_size=333)
+        self.assertEqual(root.findtext(".//title"), "Log")
+        self.assertEqual(len(root.xpath("//p[@class='line']")), 200)
+
+    def test_astral_character_on_a_chunk_boundary(self):
+        head = "<html><body><p>"
+        # the high surrogate of the emoji is the last code unit of the first chunk
+        source = head + "x" * (999 - len(head)) + "\U0001F600</p></body></html>"
+        tools = SeleniumTools(driver=SourceDriver(source))
+        chunks = list(tools.iter_text(chunk_size=1000))
+        self.assertEqual(len(chunks[0]), 999)
+        self.assertEqual("".join(chunks), source)
+        self.assertEqual(tools.document(chunk_size=1000).findtext(".//p")[-1], "\U0001F600")
+
+    def test_driver_without_javascript(self):
+        self.driver.supports_javascript = False
+        self.driver.page_source = SOURCE
+        self.assertEqual("".join(self.tools.iter_text(chunk_size=100)), SOURCE)
+        self.assertEqual(self.driver.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
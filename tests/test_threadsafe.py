@@ -0,0 +1,163 @@
+import threading
+import time
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import ConcurrentSessionError, SToolException
+from s_tool.parser import LxmlParser
+from s_tool.threadsafe import (
+    GuardedExecutor,
+    SessionGuard,
+    ThreadLocalSessions,
+    make_session_guard,
+)
+from tests.fakes import FakeExecutor
+
+
+class SlowExecutor(FakeExecutor):
+    """Answers commands slowly and notes when two of them overlap"""
+
+    def __init__(self, delay=0.02):
+        super().__init__()
+        self.delay = delay
+        self.running = 0
+        self.overlaps = 0
+        self.lock = threading.Lock()
+
+    def respond(self, command, params):
+        with self.lock:
+            self.running += 1
+            if self.running > 1:
+                self.overlaps += 1
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        if command == "getTitle":
+            return "" if self.url == "about:blank" else "Page"
+        return super().respond(command, params)
+
+
+def run_threads(target, count=4):
+    errors = []
+
+    def run():
+        try:
+            target()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class SessionGuardTestCase(unittest.TestCase):
+
+    def make_tools(self, thread_safe):
+        self.executor = SlowExecutor()
+        return SeleniumTools(driver=WebDriver(command_executor=self.executor), thread_safe=thread_safe)
+
+    def test_lock_mode_serializes_commands(self):
+        tools = self.make_tools(True)
+        errors = run_threads(lambda: [tools.url() for _ in range(5)])
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.executor.overlaps, 0)
+        stats = tools.session_guard.stats()
+        self.assertGreater(stats["contended"], 0)
+        self.assertGreater(stats["wait_seconds"], 0)
+        self.assertGreaterEqual(stats["commands"], 20)
+
+    def test_detect_mode_raises_on_shared_use(self):
+        tools = self.make_tools("detect")
+        errors = run_threads(lambda: [tools.url() for _ in range(5)])
+
+        self.assertTrue(errors)
+        self.assertTrue(all(isinstance(error, ConcurrentSessionError) for error in errors))
+        self.assertIn("CONCURRENT_SESSION_USE", str(errors[0]))
+        self.assertEqual(tools.session_guard.stats()["violations"], len(errors))
+
+    def test_detect_mode_allows_one_thread(self):
+        tools = self.make_tools("detect")
+        tools.get("https://example.com")
+        self.assertEqual(tools.url(), "https://example.com")
+
+    def test_exclusive_block(self):
+        tools = self.make_tools("detect")
+        with tools.exclusive():
+            errors = run_threads(tools.url, count=1)
+            tools.url()
+        self.assertIsInstance(errors[0], ConcurrentSessionError)
+
+    def test_attach_once(self):
+        guard = SessionGuard()
+        driver = WebDriver(command_executor=SlowExecutor(0))
+        guard.attach(driver)
+        guard.attach(driver)
+        self.assertIsInstance(driver.command_executor, GuardedExecutor)
+        self.assertNotIsInstance(driver.command_executor.executor, GuardedExecutor)
+
+    def test_options(self):
+        self.assertIsNone(make_session_guard(None))
+        self.assertEqual(make_session_guard(True).mode, "lock")
+        self.assertEqual(make_session_guard("detect").mode, "detect")
+        with self.assertRaises(ValueError):
+            SessionGuard("share")
+        with self.assertRaises(SToolException):
+            SessionGuard().attach(object())
+
+
+class UpperParser:
+
+    def shout(self, html_string):
+        return html_string.upper()
+
+
+class CustomParserTestCase(unittest.TestCase):
+
+    def test_custom_parsers_stay_on_their_session(self):
+        custom = SeleniumTools(driver=WebDriver(command_executor=SlowExecutor(0)), parser=UpperParser)
+        plain = SeleniumTools(driver=WebDriver(command_executor=SlowExecutor(0)))
+
+        self.assertEqual(custom.parser.shout("<p>"), "<P>")
+        self.assertFalse(hasattr(plain.parser, "shout"))
+        self.assertFalse(hasattr(LxmlParser, "shout"))
+
+
+class ThreadLocalSessionsTestCase(unittest.TestCase):
+
+    def test_one_session_per_thread(self):
+        closed = []
+
+        class Tools:
+            def __init__(self):
+                self.thread = threading.current_thread().name
+
+            def __exit__(self, *exc):
+                closed.append(self)
+
+        sessions = ThreadLocalSessions(Tools)
+        seen = []
+        barrier = threading.Barrier(3)
+
+        def use():
+            barrier.wait()
+            seen.append((threading.current_thread().name, sessions.thread, sessions.session()))
+
+        self.assertEqual(run_threads(use, count=3), [])
+        self.assertEqual(len(sessions.sessions), 3)
+        self.assertTrue(all(name == thread for name, thread, _ in seen))
+        self.assertEqual(len({id(tools) for _, _, tools in seen}), 3)
+
+        sessions.close()
+        self.assertEqual(len(closed), 3)
+        self.assertEqual(sessions.sessions, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from s_tool.core import SeleniumTools
+from s_tool.exceptions import SToolException
+from s_tool.trace import TraceRecorder, load_trace, replay_driver, summarize
+from tests.fakes import ELEMENT_KEY, FakeExecutor
+
+
+class PageExecutor(FakeExecutor):
+    """Answers a few WebDriver commands like a browser"""
+
+    def respond(self, command, params):
+        if command == "getTitle":
+            return "" if self.url == "about:blank" else "Example"
+        if command == "getPageSource":
+            return f"<html><body><p id='msg'>{self.url}</p></body></html>"
+        if command == "findElement":
+            return {ELEMENT_KEY: "el-1"}
+        if command == "getElementText":
+            return self.url
+        return super().respond(command, params)
+
+
+def workflow(tools):
+    tools.get("https://example.com/a")
+    tools.get("https://example.com/b")
+    return tools.url(), tools.text(), tools.get_element("msg").text
+
+
+class TraceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "trace.jsonl.gz")
+
+    def record(self):
+        executor = PageExecutor()
+        with TraceRecorder(self.path) as recorder:
+            tools = SeleniumTools(driver=WebDriver(command_executor=executor), recorder=recorder)
+            result = workflow(tools)
+        return executor, result
+
+    def test_record_and_replay(self):
+        executor, recorded = self.record()
+        header, commands = load_trace(self.path)
+        self.assertEqual(header["session_id"], "s-1")
+        self.assertEqual(commands[0]["cmd"], "get")
+        self.assertNotIn("sessionId", commands[0]["params"])
+        self.assertTrue(all(entry["size"] > 0 for entry in commands))
+
+        driver = replay_driver(self.path)
+        tools = SeleniumTools(driver=driver)
+        self.assertEqual(workflow(tools), recorded)
+        self.assertEqual(driver.command_executor.remaining, 0)
+        self.assertEqual(len(executor.commands), len(commands) + 1)
+
+    def test_strict_replay_detects_divergence(self):
+        self.record()
+        tools = SeleniumTools(driver=replay_driver(self.path))
+        with self.assertRaises(SToolException):
+            tools.get("https://example.com/other")
+
+    def test_summarize(self):
+        self.record()
+        summary = summarize(self.path)
+        self.assertEqual(summary["get"]["count"], 3)  # with the validation page
+        self.assertIn("getPageSource", summary)
+
+    def test_recorder_needs_executor(self):
+        with TraceRecorder(self.path) as recorder:
+            with self.assertRaises(SToolException):
+                recorder.attach(object())
+
+
+if __name__ == "__main__":
+    unittest.main()
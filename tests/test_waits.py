@@ -0,0 +1,105 @@
+import unittest
+from urllib.parse import quote
+
+from selenium.common.exceptions import TimeoutException
+
+from s_tool.core import SeleniumTools
+from s_tool.http_backend import HttpDriver
+from s_tool.scripts import VISIBILITY_SCRIPT, normalize_locators
+from tests.fakes import FakeDriver
+
+
+class ScriptDriver(FakeDriver):
+
+    def __init__(self):
+        self.scripts = []
+
+    def execute_script(self, script, *args):
+        self.scripts.append((script, args))
+        return len(args[0]) + len(args[1])
+
+
+class FakePage:
+    """Returns the elements found by the wait script at each poll"""
+
+    def __init__(self, polls):
+        self.polls = list(polls)
+        self.calls = []
+
+    def __call__(self, handle, locators, match_any):
+        self.calls.append((locators, match_any))
+        return self.polls.pop(0) if len(self.polls) > 1 else self.polls[0]
+
+
+class WaitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = ScriptDriver()
+        self.tools = SeleniumTools(driver=self.driver)
+
+    def test_wait_for_all_checks_every_locator_in_one_call(self):
+        self.tools.call_script = FakePage([[None, None, None], [None, "b", None], ["a", "b", "c"]])
+        result = self.tools.wait_for_all(["a", ("b", "name"), ("//c", "xpath")], poll_frequency=0)
+
+        self.assertEqual(result.elements, ["a", "b", "c"])
+        self.assertEqual(result.first, 1)
+        self.assertEqual(len(self.tools.call_script.calls), 3)
+        locators, match_any = self.tools.call_script.calls[0]
+        self.assertEqual(locators, [[False, '[id="a"]'], [False, '[name="b"]'], [True, "//c"]])
+        self.assertFalse(match_any)
+
+    def test_wait_for_any(self):
+        self.tools.call_script = FakePage([[None, None], [None, "error"]])
+        result = self.tools.wait_for_any(["results", "error"], poll_frequency=0)
+
+        self.assertEqual(result.first, 1)
+        self.assertEqual(result.elements[result.first], "error")
+        self.assertTrue(self.tools.call_script.calls[0][1])
+
+    def test_timeout_names_the_locators(self):
+        self.tools.call_script = FakePage([["a", None]])
+        with self.assertRaisesRegex(TimeoutException, "all of 'id=a, id=b'"):
+            self.tools.wait_for_all(["a", "b"], timeout=0.05, poll_frequency=0.01)
+
+    def test_empty_locators(self):
+        with self.assertRaises(ValueError):
+            normalize_locators([])
+
+    def test_bulk_visibility_is_one_script_call(self):
+        count = self.tools.element_visibility(
+            ["element"], locators=["#banner", (".overlay", "css_selector"), ("modal", "class_name")])
+
+        self.assertEqual(count, 4)
+        self.assertEqual(len(self.driver.scripts), 1)
+        script, (elements, locators, hide) = self.driver.scripts[0]
+        self.assertEqual(script, VISIBILITY_SCRIPT)
+        self.assertEqual(elements, ["element"])
+        self.assertEqual(locators, [[False, "#banner"], [False, ".overlay"], [False, '[class~="modal"]']])
+        self.assertTrue(hide)
+
+    def test_visibility_without_elements(self):
+        self.assertEqual(self.tools.element_visibility(), 0)
+        self.assertEqual(self.driver.scripts, [])
+
+
+class HttpWaitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tools = SeleniumTools(driver=HttpDriver())
+        self.tools.get("data:text/html," + quote(
+            "<p id='shown'>yes</p><p id='secret' hidden>no</p><input type='hidden' id='token'>"))
+
+    def tearDown(self):
+        self.tools._close()
+
+    def test_wait_without_javascript(self):
+        result = self.tools.wait_for_any(["missing", "secret", "shown"], poll_frequency=0)
+        self.assertEqual(result.first, 2)
+        self.assertEqual(result.elements[2].text, "yes")
+
+        with self.assertRaises(TimeoutException):
+            self.tools.wait_for_all(["shown", "token"], timeout=0.05, poll_frequency=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()